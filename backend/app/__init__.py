@@ -5,7 +5,6 @@ from flask_sqlalchemy import SQLAlchemy
 
 from config import Config
 
-
 db = SQLAlchemy()
 logging.basicConfig(level=Config.LOG_LEVEL)
 
@@ -17,27 +16,111 @@ def init_app():
 
     db.init_app(app)
 
+    from .database import (
+        menu_cache,
+        menu_index,
+        idempotency_store,
+        order_events,
+        set_statement_timeout,
+    )
+
+    menu_cache.configure(
+        app.config["MENU_CACHE_SIZE"],
+        app.config["MENU_CACHE_TTL"],
+        enabled=app.config["MENU_CACHE_ENABLED"],
+    )
+    menu_index.configure(app.config["MENU_SEARCH_REFRESH"])
+    idempotency_store.configure(
+        app.config["IDEMPOTENCY_TTL"],
+        app.config["IDEMPOTENCY_WAIT"],
+        app.config["IDEMPOTENCY_LOCK_TIMEOUT"],
+        app.config["IDEMPOTENCY_CACHE_SIZE"],
+    )
+    order_events.configure(
+        app.config["ORDER_EVENTS_HISTORY"], app.config["ORDER_EVENTS_BUFFER"]
+    )
+
     with app.app_context():
+        set_statement_timeout(db.engine, app.config["DB_STATEMENT_TIMEOUT"])
+        if app.config["REQUEST_PROFILING"]:
+            from .profiling import init_profiling
+
+            init_profiling(app, db.engine)
+        if app.config["METRICS_ENABLED"]:
+            from .metrics import init_metrics, metrics
+
+            init_metrics(app)
+            metrics.register_cache("menu", menu_cache)
+            metrics.register_cache("idempotency", idempotency_store.cache)
+
         from .resources import (
             CreateFood,
             CreateAddon,
             CreateCustomer,
             CreateOrder,
+            ListOrders,
+            ExportOrders,
             ManageFood,
             ManageAddon,
             ManageCustomer,
+            SearchCustomers,
+            SearchMenu,
             ManageOrder,
+            OrderTicket,
+            OrderFeed,
+            SalesReport,
+            PoolStats,
+            IngestStats,
+            Metrics,
         )
         from .api import ExtendedAPI
+        from .commands import (
+            export_orders,
+            import_data,
+            migrate_db,
+            check_query_plans,
+            rebuild_sales_rollup,
+            purge_idempotency_keys,
+        )
 
         db.create_all()
+        app.cli.add_command(export_orders)
+        app.cli.add_command(import_data)
+        app.cli.add_command(migrate_db)
+        app.cli.add_command(check_query_plans)
+        app.cli.add_command(rebuild_sales_rollup)
+        app.cli.add_command(purge_idempotency_keys)
         api = ExtendedAPI(app, catch_all_404s=True)
         api.add_resource(CreateFood, "/api/menu/food")
         api.add_resource(ManageFood, "/api/menu/food/<int:food_id>")
         api.add_resource(CreateAddon, "/api/menu/addon")
         api.add_resource(ManageAddon, "/api/menu/addon/<int:addon_id>")
+        api.add_resource(SearchMenu, "/api/menu/search")
         api.add_resource(CreateCustomer, "/api/customer")
         api.add_resource(ManageCustomer, "/api/customer/<int:customer_id>")
+        api.add_resource(SearchCustomers, "/api/customer/search")
         api.add_resource(CreateOrder, "/api/customer/<int:customer_id>/order")
+        api.add_resource(ListOrders, "/api/order")
+        api.add_resource(ExportOrders, "/api/order/export")
         api.add_resource(ManageOrder, "/api/order/<int:order_id>")
+        api.add_resource(OrderTicket, "/api/order/ingest/<string:ticket>")
+        api.add_resource(OrderFeed, "/api/order/events")
+        api.add_resource(SalesReport, "/api/report/sales")
+        api.add_resource(PoolStats, "/api/status/pool")
+        api.add_resource(IngestStats, "/api/status/ingest")
+        if app.config["METRICS_ENABLED"]:
+            api.add_resource(Metrics, "/metrics")
+
+        if app.config["ORDER_INGEST_ENABLED"]:
+            from .core import ingest
+
+            ingest.start(
+                app,
+                app.config["ORDER_INGEST_QUEUE_SIZE"],
+                app.config["ORDER_INGEST_BATCH_SIZE"],
+                app.config["ORDER_INGEST_BATCH_WAIT"],
+                app.config["ORDER_INGEST_PUT_TIMEOUT"],
+                app.config["ORDER_INGEST_STATUS_SIZE"],
+                app.config["ORDER_INGEST_STATUS_TTL"],
+            )
         return app
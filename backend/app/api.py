@@ -5,6 +5,7 @@ from flask_restful import Api  # type: ignore
 from werkzeug.exceptions import HTTPException
 from werkzeug.http import HTTP_STATUS_CODES
 
+from .metrics import metrics
 from .errors import (
     GeneralException,
     GENERIC_SERVER_ERROR,
@@ -61,6 +62,10 @@ class ExtendedAPI(Api):
             "code": getattr(err, "code", GENERIC_SERVER_ERROR),
         }, getattr(err, "http_status_code", 500)
 
+        metrics.record_error(response[0]["code"])
+        if isinstance(err, GeneralException) and getattr(err, "headers", None):
+            response = (*response, err.headers)
+
         if (
             not response[0]["code"] in self.app.config["SILENT_EXCEPTIONS"]
             or is_http_exception  # XXX: Remove or change whenever handling HTTPExceptions is concrete
@@ -0,0 +1,406 @@
+import re
+import json
+import asyncio
+import time
+import logging
+from datetime import datetime
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import Headers
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from . import init_app
+from .core import ingest
+from .core.creator import Create
+from .core.finder import Find
+from .database import set_statement_timeout
+from .database import order_events
+from .metrics import metrics, record_profile
+from .profiling import RequestProfile, current_profile, track_statements
+from .database.aio import (
+    AsyncManageResturantData,
+    AsyncViewResturantData,
+    async_database_uri,
+)
+from .errors import (
+    GeneralException,
+    EntityNotFound,
+    EntryNotFound,
+    ImproperEntryData,
+    MissingEntryData,
+    GENERIC_SERVER_ERROR,
+)
+from .resources.helper import (
+    encode_cursor,
+    entity_etag,
+    is_current,
+    page_data,
+    page_date_cursor,
+    page_id_cursor,
+    page_limit,
+    query_datetime,
+    validator_headers,
+)
+from .resources.serializer import dumps
+
+
+class AsyncRequest:
+    """The parts of an ASGI HTTP request the handlers need."""
+
+    def __init__(self, scope: dict, receive) -> None:
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.args = dict(parse_qsl(scope.get("query_string", b"").decode()))
+        self.headers = Headers(
+            [
+                (key.decode("latin-1"), value.decode("latin-1"))
+                for key, value in scope.get("headers", [])
+            ]
+        )
+        self._receive = receive
+
+    async def get_json(self):
+        body = b""
+        while True:
+            message = await self._receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        try:
+            return json.loads(body or b"null")
+        except ValueError:
+            raise MissingEntryData
+
+
+class AsyncAPI:
+    """Serves the API over ASGI.
+
+    The read endpoints and order creation run on SQLAlchemy's asyncio engine, so
+    waiting on the database doesn't hold a thread. Every other request is handed
+    to the Flask app, which runs on a thread pool, as are requests sent with an
+    Idempotency-Key header, since the app stores their responses."""
+
+    def __init__(self, flask_app) -> None:
+        self.logger = logging.getLogger("AsyncAPI")
+        self.config = flask_app.config
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.engine = create_async_engine(
+            self.config["ASYNC_DATABASE_URI"]
+            or async_database_uri(self.config["SQLALCHEMY_DATABASE_URI"]),
+            **self.config["SQLALCHEMY_ENGINE_OPTIONS"],
+        )
+        set_statement_timeout(
+            self.engine.sync_engine, self.config["DB_STATEMENT_TIMEOUT"]
+        )
+        self.profiling = self.config["REQUEST_PROFILING"]
+        if self.profiling:
+            track_statements(self.engine.sync_engine)
+        # Loaded rows aren't expired on commit, as refreshing them lazily would
+        # need IO outside of an await
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.routes = [
+            ("GET", r"/api/menu/food", self.list_foods),
+            ("GET", r"/api/menu/food/(?P<food_id>\d+)", self.get_food),
+            ("GET", r"/api/menu/addon", self.list_addons),
+            ("GET", r"/api/menu/addon/(?P<addon_id>\d+)", self.get_addon),
+            ("GET", r"/api/customer/(?P<customer_id>\d+)", self.get_customer),
+            ("GET", r"/api/customer/(?P<customer_id>\d+)/order", self.list_orders),
+            ("POST", r"/api/customer/(?P<customer_id>\d+)/order", self.create_order),
+            ("GET", r"/api/order", self.list_orders),
+            ("GET", r"/api/order/(?P<order_id>\d+)", self.get_order),
+        ]
+        if self.config["ORDER_INGEST_ENABLED"]:
+            # queued orders are written by the Flask app's writer thread
+            self.routes = [
+                route for route in self.routes if route[2] != self.create_order
+            ]
+        # each route is reported in the metrics under its Flask rule
+        self.routes = [
+            (
+                method,
+                re.compile(pattern + "/?"),
+                re.sub(r"\(\?P<(\w+)>\\d\+\)", r"<int:\1>", pattern),
+                handler,
+            )
+            for method, pattern, handler in self.routes
+        ]
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+
+        keyed = any(name == b"idempotency-key" for name, _ in scope.get("headers", ()))
+        for method, pattern, route, handler in self.routes:
+            match = pattern.fullmatch(scope.get("path", ""))
+            if match and scope.get("method") == method and not keyed:
+                break
+        else:
+            await self.wsgi(scope, receive, send)
+            return
+
+        request = AsyncRequest(scope, receive)
+        params = {key: int(value) for key, value in match.groupdict().items()}
+        started = time.perf_counter()
+        profile = RequestProfile() if self.profiling else None
+        token = current_profile.set(profile)
+        try:
+            async with self.sessions() as session:
+                data, status, headers = await handler(session, request, **params)
+        except Exception as err:
+            data, status = self.handle_error(err)
+            headers = {}
+        finally:
+            current_profile.reset(token)
+        if profile is not None:
+            headers["Server-Timing"] = profile.server_timing()
+            profile.log(
+                request.method,
+                request.path,
+                status,
+                self.config["REQUEST_STATEMENT_THRESHOLD"],
+            )
+        if self.config["METRICS_ENABLED"]:
+            record_profile(route, request.method, status, started, profile)
+
+        # a 304 is sent without a body
+        body = b"" if data is None else dumps(data).encode()
+        content_type = [(b"content-type", b"application/json")] if body else []
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": content_type
+                + [(key.encode(), value.encode()) for key, value in headers.items()],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.to_thread(ingest.stop)
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def handle_error(self, err: Exception) -> tuple[dict, int]:
+        """Builds the same error response as ExtendedAPI.handle_error."""
+        if isinstance(err, GeneralException):
+            code = getattr(err, "code", GENERIC_SERVER_ERROR)
+            status = getattr(err, "http_status_code", 500)
+            message = getattr(err, "message", "An unexpected error occurred")
+            data = getattr(err, "data", {})
+        else:
+            code, status = GENERIC_SERVER_ERROR, 500
+            message, data = "An unexpected error occurred", {}
+        metrics.record_error(code)
+        if code not in self.config["SILENT_EXCEPTIONS"]:
+            self.logger.exception(err)
+        return {
+            "success": False,
+            "message": message,
+            "data": data,
+            "code": code,
+        }, status
+
+    @staticmethod
+    def _ok(data, status: int = 200, headers: Optional[dict] = None) -> tuple:
+        return (
+            {"success": True, "message": "", "code": 0, "data": data},
+            status,
+            headers or {},
+        )
+
+    def _conditional(
+        self, request: AsyncRequest, name: str, entity_id: int, entity, build
+    ) -> tuple:
+        """Answers with a 304 if the client's copy of an entity is current, and
+        with the data made by `build` otherwise."""
+        version, updated_at = entity.validators()
+        etag = entity_etag(name, entity_id, version, updated_at)
+        headers = validator_headers(etag, updated_at)
+        if is_current(etag, updated_at, request.headers):
+            return None, 304, headers
+        return self._ok(build(), headers=headers)
+
+    async def list_foods(self, session, request: AsyncRequest):
+        limit = page_limit(request.args, self.config)
+        foods = await AsyncViewResturantData(session).list_foods(
+            page_id_cursor(request.args),
+            limit + 1,
+            category=request.args.get("category"),
+        )
+        next_cursor = (
+            encode_cursor(foods[limit - 1].food_id) if len(foods) > limit else None
+        )
+        return (
+            page_data([food.convert_to_dict() for food in foods[:limit]], next_cursor),
+            200,
+            {},
+        )
+
+    async def get_food(self, session, request: AsyncRequest, food_id: int):
+        try:
+            food = await AsyncViewResturantData(session).view_food(food_id)
+        except EntityNotFound:
+            raise EntryNotFound
+        return self._conditional(request, "food", food_id, food, food.convert_to_dict)
+
+    async def list_addons(self, session, request: AsyncRequest):
+        limit = page_limit(request.args, self.config)
+        addons = await AsyncViewResturantData(session).list_addons(
+            page_id_cursor(request.args),
+            limit + 1,
+            addon_type=request.args.get("type"),
+        )
+        next_cursor = (
+            encode_cursor(addons[limit - 1].addon_id) if len(addons) > limit else None
+        )
+        return (
+            page_data(
+                [addon.convert_to_dict() for addon in addons[:limit]], next_cursor
+            ),
+            200,
+            {},
+        )
+
+    async def get_addon(self, session, request: AsyncRequest, addon_id: int):
+        try:
+            addon = await AsyncViewResturantData(session).view_addon(addon_id)
+        except EntityNotFound:
+            raise EntryNotFound
+        return self._conditional(
+            request, "addon", addon_id, addon, addon.convert_to_dict
+        )
+
+    async def get_customer(self, session, request: AsyncRequest, customer_id: int):
+        try:
+            customer = await AsyncViewResturantData(session).view_customer(customer_id)
+        except EntityNotFound:
+            raise EntryNotFound
+        return self._conditional(
+            request, "customer", customer_id, customer, customer.convert_to_dict
+        )
+
+    async def list_orders(
+        self, session, request: AsyncRequest, customer_id: Optional[int] = None
+    ):
+        viewer = AsyncViewResturantData(session)
+        if customer_id is not None:
+            try:
+                await viewer.view_customer(customer_id)
+            except EntityNotFound:
+                raise EntryNotFound("This customer does not exist.")
+
+        limit = page_limit(request.args, self.config)
+        rows = await viewer.list_orders(
+            page_date_cursor(request.args),
+            limit + 1,
+            since=query_datetime("since", request.args),
+            until=query_datetime("until", request.args),
+            customer_id=customer_id,
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1][0]
+            next_cursor = encode_cursor(last.order_date, last.order_id)
+        rows = rows[:limit]
+
+        order_items, item_mods = await viewer.view_orders_contents(
+            order.order_id for order, _ in rows
+        )
+        orders = [
+            Find._order_dict(
+                order, order_customer_id, order_items[order.order_id], item_mods
+            )
+            for order, order_customer_id in rows
+        ]
+        return page_data(orders, next_cursor), 200, {}
+
+    async def get_order(self, session, request: AsyncRequest, order_id: int):
+        viewer = AsyncViewResturantData(session)
+        try:
+            order = await viewer.view_order(order_id)
+        except EntityNotFound:
+            raise EntryNotFound
+        version, updated_at = order.validators()
+        etag = entity_etag("order", order_id, version, updated_at)
+        headers = validator_headers(etag, updated_at)
+        if is_current(etag, updated_at, request.headers):
+            return None, 304, headers
+
+        details = await viewer.view_order_details(order_id)
+        return self._ok(Find._order_dict(*details), headers=headers)
+
+    async def create_order(self, session, request: AsyncRequest, customer_id: int):
+        viewer = AsyncViewResturantData(session)
+        manager = AsyncManageResturantData(session)
+        try:
+            await viewer.view_customer(customer_id)
+        except EntityNotFound:
+            raise EntryNotFound("This customer does not exist.")
+
+        data = await request.get_json()
+        if not isinstance(data, dict):
+            raise MissingEntryData
+        order_data = data.get("order")
+        order_items = data.get("items")
+        if (
+            not order_data
+            or not order_items
+            or not {"payment_method", "type"} <= set(order_data)
+        ):
+            raise MissingEntryData
+        try:
+            order_items = {
+                int(food_id): addons for food_id, addons in order_items.items()
+            }
+        except (AttributeError, ValueError):
+            raise ImproperEntryData
+
+        # resolve the whole menu up front, so unknown items are rejected before
+        # anything is written
+        try:
+            foods = await viewer.view_foods(order_items)
+            addons = await viewer.view_addons(
+                addon_id
+                for food_addons in order_items.values()
+                for addon_id in food_addons
+            )
+        except EntityNotFound as e:
+            raise ImproperEntryData(str(e))
+
+        lines = Create._order_lines(order_items, foods, addons)
+        order = await manager.new_order(
+            datetime.now(), order_data.get("payment_method"), order_data.get("type")
+        )
+        await manager.new_customer_order(customer_id, order.order_id)
+        written = []
+        for food, food_addons, _ in lines:
+            order_item = await manager.new_order_item(
+                order.order_id, food.food_id, food.food_price, food.food_category
+            )
+            for addon in food_addons:
+                await manager.new_item_mod(
+                    order_item.order_item_id, addon.addon_id, 0, addon.addon_price
+                )
+            written.append(order_item)
+        await manager.add_sales(Create._order_sales(order, lines))
+        await session.commit()
+
+        order = Create._new_order_dict(order, customer_id, written, lines)
+        order_events.publish("created", order["id"], order)
+
+        headers = {"location": f"api/customer/{customer_id}/order/{order['id']}"}
+        return self._ok(order, status=201, headers=headers)
+
+
+def init_asgi_app() -> AsyncAPI:
+    """Initialize the API as an ASGI application."""
+    return AsyncAPI(init_app())
@@ -0,0 +1,308 @@
+import sys
+import csv
+import json
+import time
+import logging
+import datetime
+import decimal
+from itertools import groupby, islice
+from typing import Iterator
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, text
+
+from . import core, db
+from .database import Food, Addon, Customer, Order, OrderItem, ItemMod, CustomerOrder
+from .database import ManageResturantData, migrate, pending_migrations, table_scans
+from .database import idempotency_store
+from .resources.serializer import dumps
+
+IMPORTABLE = {
+    "food": Food,
+    "addon": Addon,
+    "customer": Customer,
+    "order": Order,
+    "order_item": OrderItem,
+    "item_mod": ItemMod,
+    "customer_order": CustomerOrder,
+}
+
+
+@click.command("export-orders")
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    default=None,
+    help="Only export orders placed at or after this date.",
+)
+@click.option(
+    "--until",
+    type=click.DateTime(),
+    default=None,
+    help="Only export orders placed before this date.",
+)
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="The file the orders are written to. Defaults to stdout.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of orders fetched per round trip.",
+)
+@with_appcontext
+def export_orders(since, until, output, batch_size):
+    """Export every order, with its items and modifications, as NDJSON."""
+    logger = logging.getLogger("export_orders")
+    batch_size = batch_size or current_app.config["EXPORT_BATCH_SIZE"]
+
+    count = 0
+    for order in core.find.export_orders(batch_size, since=since, until=until):
+        output.write(dumps(order))
+        output.write("\n")
+        count += 1
+
+    logger.info(f"Exported {count} orders.")
+    if output is not sys.stdout:
+        click.echo(f"Exported {count} orders.", err=True)
+
+
+def _converters(model) -> dict:
+    """Returns a function per column of `model` turning imported text into its value."""
+
+    def convert(python_type):
+        def converter(value):
+            if value is None or value == "":
+                return None
+            if isinstance(value, python_type):
+                return value
+            if python_type is datetime.datetime:
+                return datetime.datetime.fromisoformat(value)
+            if python_type is decimal.Decimal:
+                return decimal.Decimal(str(value))
+            return python_type(value)
+
+        return converter
+
+    return {
+        column.name: convert(column.type.python_type)
+        for column in model.__table__.columns
+    }
+
+
+def _read_rows(file, file_format: str) -> Iterator[dict]:
+    if file_format == "csv":
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _sync_sequence(model) -> None:
+    """Moves the primary key sequence past imported IDs (PostgreSQL only)."""
+    column = model.__table__.autoincrement_column
+    if db.engine.dialect.name != "postgresql" or column is None:
+        return
+    table = db.engine.dialect.identifier_preparer.format_table(model.__table__)
+    db.session.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence(:table, :column), "
+            f"(SELECT COALESCE(MAX({column.name}), 1) FROM {table}))"
+        ),
+        {"table": table, "column": column.name},
+    )
+    db.session.commit()
+
+
+@click.command("import-data")
+@click.argument("entity", type=click.Choice(sorted(IMPORTABLE)))
+@click.argument("file", type=click.File("r"))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "jsonl"]),
+    default=None,
+    help="Format of the file. Guessed from its extension by default.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of rows inserted per transaction.",
+)
+@with_appcontext
+def import_data(entity, file, file_format, batch_size):
+    """Bulk import rows of ENTITY from a CSV or JSONL FILE.
+
+    Columns are named after the database columns (e.g. food_name), and IDs are
+    kept as given. Empty values are left out, so that their columns get their
+    defaults. Order rows may also carry a customer_id, which links the order to
+    that customer. Rows are inserted with executemany, one transaction per
+    batch, bypassing the per-row commits of ManageResturantData, and the sales
+    rollup: run rebuild-sales-rollup once orders and their items are imported."""
+    logger = logging.getLogger("import_data")
+    model = IMPORTABLE[entity]
+    batch_size = batch_size or current_app.config["IMPORT_BATCH_SIZE"]
+    if not file_format:
+        file_format = "csv" if file.name.endswith(".csv") else "jsonl"
+
+    converters = _converters(model)
+    rows = _read_rows(file, file_format)
+
+    count = 0
+    started = time.perf_counter()
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        values, links = [], []
+        for index, row in enumerate(batch, start=count + 1):
+            unknown = set(row) - set(converters) - {"customer_id"}
+            if unknown:
+                raise click.ClickException(
+                    f"Row {index} has unknown columns: {', '.join(sorted(unknown))}"
+                )
+            try:
+                if model is Order and row.get("customer_id"):
+                    if not row.get("order_id"):
+                        raise click.ClickException(
+                            f"Row {index} has a customer_id but no order_id."
+                        )
+                    links.append(
+                        {
+                            "customer_id": int(row["customer_id"]),
+                            "order_id": int(row["order_id"]),
+                        }
+                    )
+                converted = {
+                    key: converters[key](value)
+                    for key, value in row.items()
+                    if key in converters
+                }
+            except (ValueError, TypeError, ArithmeticError) as e:
+                raise click.ClickException(f"Row {index} has an invalid value: {e}")
+            if model is Customer:
+                converted.update(Customer.search_keys(converted))
+            # empty values are left out rather than sent as NULL, so that columns
+            # get their defaults (versions, generated IDs)
+            values.append(
+                {key: value for key, value in converted.items() if value is not None}
+            )
+
+        try:
+            # executemany needs every row of a statement to carry the same
+            # columns, so each run of rows with the same columns is one statement
+            for _, run in groupby(values, key=lambda row: row.keys()):
+                db.session.execute(insert(model.__table__), list(run))
+            if links:
+                db.session.execute(insert(CustomerOrder.__table__), links)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.warning(f"Failed to import rows {count + 1} to {count + len(batch)}")
+            raise
+
+        count += len(batch)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Imported {count} rows ({count / elapsed:.0f} rows/sec)")
+
+    _sync_sequence(model)
+
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0
+    click.echo(
+        f"Imported {count} {entity} rows in {elapsed:.2f}s ({rate:.0f} rows/sec)"
+    )
+
+
+@click.command("migrate-db")
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Print the DDL of the pending migrations without applying it.",
+)
+@with_appcontext
+def migrate_db(dry_run):
+    """Bring an existing database up to the models.
+
+    Adds the tables, columns and indexes the database is missing, such as the
+    order totals, entity versions and foreign key indexes of newer releases."""
+    if dry_run:
+        statements = pending_migrations(db.engine, db.metadata)
+    else:
+        statements = migrate(db.engine, db.metadata)
+
+    for statement in statements:
+        click.echo(f"{statement};")
+    if not statements:
+        click.echo("The database is up to date.", err=True)
+    elif not dry_run:
+        click.echo(f"Applied {len(statements)} migrations.", err=True)
+
+    if not dry_run:
+        filled = ManageResturantData().fill_customer_search_keys(
+            current_app.config["IMPORT_BATCH_SIZE"]
+        )
+        if filled:
+            click.echo(f"Filled the search keys of {filled} customers.", err=True)
+        filled = ManageResturantData().fill_order_item_categories()
+        if filled:
+            click.echo(f"Filled the categories of {filled} order items.", err=True)
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans():
+    """Fail if any hot query scans a whole table.
+
+    The queries behind order lookups and customer searches are explained against
+    the database, which should have been migrated first."""
+    failed = False
+    for name, tables in table_scans(db.engine).items():
+        if tables:
+            failed = True
+            click.echo(f"FAIL {name}: scans {', '.join(tables)}")
+        else:
+            click.echo(f"ok   {name}")
+    if failed:
+        raise click.ClickException("Some hot queries scan whole tables.")
+
+
+@click.command("rebuild-sales-rollup")
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of rows fetched and written per round trip.",
+)
+@with_appcontext
+def rebuild_sales_rollup(batch_size):
+    """Rebuild the sales rollup behind the reports from every order.
+
+    Backfills the rollup after a migration or an import. Sales are filed under
+    the category their food had when ordered, or its current category for items
+    that don't record it. The rollup is replaced in one
+    transaction, so orders should not be changing while it runs."""
+    batch_size = batch_size or current_app.config["IMPORT_BATCH_SIZE"]
+    started = time.perf_counter()
+    count = ManageResturantData().rebuild_sales_rollup(batch_size)
+    click.echo(
+        f"Rebuilt {count} sales rollup rows in {time.perf_counter() - started:.2f}s"
+    )
+
+
+@click.command("purge-idempotency-keys")
+@with_appcontext
+def purge_idempotency_keys():
+    """Delete the expired idempotency keys along with their stored responses.
+
+    Expired keys are already ignored, and replaced when sent again, so this only
+    reclaims space; run it periodically."""
+    click.echo(f"Purged {idempotency_store.purge()} expired idempotency keys")
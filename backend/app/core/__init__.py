@@ -10,10 +10,14 @@ delete = Delete()
 from .updater import Update
 
 update = Update()
+from .ingestor import Ingest
+
+ingest = Ingest(create)
 
 __all__ = (
     "create",
     "delete",
     "find",
+    "ingest",
     "update",
 )
@@ -4,8 +4,25 @@ from typing import Union
 
 from sqlalchemy.exc import DataError
 
-from ..database import ManageResturantData, ViewResturantData
-from ..errors import ResturantException, BadRequest, ImproperEntryData
+from ..database import (
+    ManageResturantData,
+    ViewResturantData,
+    Food,
+    Addon,
+    Customer,
+    Sales,
+    add_sale,
+    sale_key,
+)
+from ..errors import (
+    ResturantException,
+    BadRequest,
+    ImproperEntryData,
+    MissingEntryData,
+    EntityNotFound,
+)
+
+from .validation import check_lengths, check_values, parse_price
 
 
 class Create:
@@ -14,6 +31,99 @@ class Create:
         self.viewer = ViewResturantData()
         self.logger = logging.getLogger("core.create")
 
+    def _bulk(self, model, rows: list, build, insert) -> list[dict]:
+        """Validates rows of request data one by one, and inserts the valid ones
+        in a single transaction.
+
+        `build` turns a row into column values, raising an exception for rows that
+        can't be inserted. One result is returned per row, in order."""
+        results: list[dict] = []
+        valid: list[tuple[int, dict]] = []
+        for index, row in enumerate(rows):
+            try:
+                if not isinstance(row, dict):
+                    raise MissingEntryData
+                values = build(row)
+                check_values(model, values)
+                check_lengths(model, values)
+            except (MissingEntryData, ImproperEntryData) as e:
+                results.append({"success": False, "message": str(e), "data": {}})
+                continue
+            results.append({})
+            valid.append((index, values))
+
+        if not valid:
+            return results
+
+        try:
+            with self.manager.unit_of_work():
+                entities = insert([values for _, values in valid])
+                for (index, _), entity in zip(valid, entities):
+                    results[index] = {
+                        "success": True,
+                        "message": "",
+                        "data": entity.convert_to_dict(),
+                    }
+        except DataError:
+            self.logger.warning(
+                f"A batch of {len(valid)} {model.__tablename__} rows was rejected."
+            )
+            raise ImproperEntryData
+
+        return results
+
+    def foods(self, foods: list) -> list[dict]:
+        def build(food: dict) -> dict:
+            if not {"name", "price", "category"} <= set(food):
+                raise MissingEntryData
+            if food.get("category") in self.manager.food_size_required and not food.get(
+                "size"
+            ):
+                raise ImproperEntryData("Food size is required for this category.")
+            return {
+                "food_name": food.get("name"),
+                "food_price": parse_price(food.get("price")),
+                "food_category": food.get("category"),
+                "food_size": food.get("size"),
+            }
+
+        return self._bulk(Food, foods, build, self.manager.new_food_items)
+
+    def addons(self, addons: list) -> list[dict]:
+        def build(addon: dict) -> dict:
+            if not {"name", "type", "price"} <= set(addon):
+                raise MissingEntryData
+            if addon.get("type") in self.manager.food_size_required and not addon.get(
+                "size"
+            ):
+                raise ImproperEntryData("Addon size is required for this type.")
+            return {
+                "addon_name": addon.get("name"),
+                "addon_type": addon.get("type"),
+                "addon_price": parse_price(addon.get("price")),
+                "addon_size": addon.get("size"),
+            }
+
+        return self._bulk(Addon, addons, build, self.manager.new_addon_items)
+
+    def customers(self, customers: list) -> list[dict]:
+        def build(customer: dict) -> dict:
+            if not {"name", "phone"} <= set(customer):
+                raise MissingEntryData
+            address = customer.get("address") or {}
+            if not isinstance(address, dict):
+                raise ImproperEntryData("The address must be an object.")
+            return {
+                "customer_name": customer.get("name"),
+                "customer_phone_number": customer.get("phone"),
+                "customer_street": address.get("street"),
+                "customer_city": address.get("city"),
+                "customer_province": address.get("province"),
+                "customer_postal_code": address.get("postal_code"),
+            }
+
+        return self._bulk(Customer, customers, build, self.manager.new_customers)
+
     def food(
         self, food_name: str, price: int, category: str, food_size=None
     ) -> Union[dict, bool]:
@@ -97,6 +207,100 @@ class Create:
 
         return customer.convert_to_dict()
 
+    def resolve_order(self, order_items: dict) -> tuple[dict, dict]:
+        """Resolves the foods and addons of an order, by ID.
+
+        The whole menu is resolved up front, so that orders with unknown items are
+        rejected before anything is written."""
+        return self.resolve_orders([order_items])
+
+    def resolve_orders(self, orders_items: list[dict]) -> tuple[dict, dict]:
+        """Resolves the foods and addons of several orders at once, by ID, raising
+        ImproperEntryData if any of them is unknown."""
+        try:
+            foods = self.viewer.view_foods(
+                food_id for order_items in orders_items for food_id in order_items
+            )
+            addons_by_id = self.viewer.view_addons(
+                addon_id
+                for order_items in orders_items
+                for food_addons in order_items.values()
+                for addon_id in food_addons
+            )
+        except EntityNotFound as e:
+            raise ImproperEntryData(str(e))
+        return foods, addons_by_id
+
+    @staticmethod
+    def _order_lines(
+        order_items: dict, foods: dict, addons_by_id: dict
+    ) -> list[tuple[Food, list[Addon], float]]:
+        """Prices the items of a new order from its resolved foods and addons,
+        returning each food with its addons and the price of the item."""
+        lines = []
+        for food_id, food_addons in order_items.items():
+            food = foods[food_id]
+            addons = [addons_by_id[addon_id] for addon_id in food_addons]
+            price = food.food_price + sum(addon.addon_price for addon in addons)
+            lines.append((food, addons, price))
+        return lines
+
+    @staticmethod
+    def _order_sales(order, lines: list) -> Sales:
+        """The sales of a new order, filed under the categories of its foods."""
+        sales: Sales = {}
+        for food, _, price in lines:
+            add_sale(sales, sale_key(order, food.food_category), 1, price)
+        return sales
+
+    @staticmethod
+    def _new_order_dict(
+        order, customer_id: int, order_items: list, lines: list
+    ) -> dict:
+        """The details of a new order, given the order items written for its lines."""
+        items = []
+        for order_item, (_, addons, _) in zip(order_items, lines):
+            item = order_item.convert_to_dict()
+            item["addons"] = [addon.convert_to_dict() for addon in addons]
+            items.append(item)
+
+        order = order.convert_to_dict()
+        order["price"] = float(sum(price for _, _, price in lines))
+        order["customer_id"] = customer_id
+        order["items"] = items
+        return order
+
+    def _new_order(
+        self,
+        customer_id: int,
+        order_items: dict,
+        payment_method: str,
+        order_type: str,
+        order_date: datetime,
+        foods: dict,
+        addons_by_id: dict,
+    ) -> dict:
+        # runs inside a unit of work
+        lines = self._order_lines(order_items, foods, addons_by_id)
+        order = self.manager.new_order(order_date, payment_method, order_type)
+        order_id = order.order_id
+        self.manager.new_customer_order(customer_id, order_id)
+        written = []
+        for food, addons, _ in lines:
+            order_item = self.manager.new_order_item(
+                order_id, food.food_id, food.food_price, food.food_category
+            )
+            for addon in addons:
+                self.manager.new_item_mod(
+                    order_item.order_item_id, addon.addon_id, 0, addon.addon_price
+                )
+            written.append(order_item)
+        self.manager.record_sales({}, self._order_sales(order, lines))
+
+        order = self._new_order_dict(order, customer_id, written, lines)
+        self.manager.order_changed("created", order_id, order)
+        return order
+
     def order(
         self,
         customer_id: int,
@@ -104,34 +308,34 @@ class Create:
         payment_method: str,
         order_type: str,
     ) -> Union[dict, bool]:
-        order = self.manager.new_order(datetime.now(), payment_method, order_type)
-        customer = self.viewer.view_customer(customer_id)
-        if not customer:
+        try:
+            self.viewer.view_customer(customer_id)
+        except EntityNotFound:
             return False
-        order_id = order.order_id
-        self.manager.new_customer_order(customer_id, order_id)
-        items: list[dict] = []
-        order_price = 0
-        for food_id in order_items:
-            food = self.viewer.view_food(food_id)
-            food_addons = order_items[food_id]
-            order_item = self.manager.new_order_item(order_id, food_id, food.food_price)
-            order_item_id = order_item.order_item_id
-
-            order_price += food.food_price
-            addons = []
-            for addon_id in food_addons:
-                addon = self.viewer.view_addon(addon_id)
-                addons.append(addon.convert_to_dict())
-                order_price += addon.addon_price
-                self.manager.new_item_mod(order_item_id, addon_id, 0, addon.addon_price)
-            item = order_item.convert_to_dict()
-            item["addons"] = addons
-            items.append(item)
 
-        order = order.convert_to_dict()
-        order["price"] = order_price
-        order["customer_id"] = customer_id
-        order["items"] = items
+        foods, addons_by_id = self.resolve_order(order_items)
+        with self.manager.unit_of_work():
+            return self._new_order(
+                customer_id,
+                order_items,
+                payment_method,
+                order_type,
+                datetime.now(),
+                foods,
+                addons_by_id,
+            )
 
-        return order
+    def orders(self, orders: list[dict]) -> list[dict]:
+        """Creates orders accepted earlier in a single transaction, each given as
+        the keyword arguments of `order` along with its `order_date`.
+
+        Their menu items are resolved again, as they may have changed since, all
+        at once. If any of the orders fails, none of them is created."""
+        foods, addons_by_id = self.resolve_orders(
+            [order["order_items"] for order in orders]
+        )
+        with self.manager.unit_of_work():
+            return [
+                self._new_order(**order, foods=foods, addons_by_id=addons_by_id)
+                for order in orders
+            ]
@@ -40,12 +40,14 @@ class Delete:
         return True
 
     def customer(self, customer_id: int, delete_orders=True) -> bool:
-        if delete_orders:
-            orders = self.viewer.view_customer_orders(customer_id)
-            for order in orders:
-                self.order(order.order_id)
         try:
-            self.manager.remove_customer(customer_id)
+            with self.manager.unit_of_work():
+                if delete_orders:
+                    order_ids = self.viewer.view_customer_order_ids(customer_id)
+                    self.manager.remove_orders(order_ids)
+                    for order_id in order_ids:
+                        self.manager.order_changed("deleted", order_id)
+                self.manager.remove_customer(customer_id)
         except EntityNotFound:
             return False
         except IntegrityError:
@@ -61,59 +63,33 @@ class Delete:
         return True
 
     def order(self, order_id: int) -> bool:
-        # frankly, if none of these exist it doesn't really matter
-        # altho, this implementation is ugly, idk how to do better
         try:
-            customer_id = self.viewer.view_order_customer(order_id).customer_id
-            self.manager.remove_customer_order(customer_id, order_id)
-        except EntityNotFound:
-            pass
-
-        try:
-            order_items = [
-                x.order_item_id for x in self.viewer.view_order_items(order_id)
-            ]
-            for order_item_id in order_items:
-                try:
-                    self.manager.remove_item_mods(order_item_id)
-                except EntityNotFound:
-                    pass
-            self.manager.remove_order_items(order_id)
-        except EntityNotFound:
-            pass
-
-        try:
-            self.manager.remove_order(order_id)
-        except EntityNotFound:
-            return False
+            with self.manager.unit_of_work():
+                removed = self.manager.remove_orders([order_id])
+                if removed:
+                    self.manager.order_changed("deleted", order_id)
         except Exception as e:
             self.logger.warning("An unhandled error occurred deleting the order.")
             self.logger.warning(f"Order ID: {order_id}")
             raise
 
-        return True
+        return bool(removed)
 
     def order_item(
         self, order_id: int, order_item_id: int, query_order=False
     ) -> Union[dict, bool]:
         try:
-            order = self.viewer.view_order(order_id)
+            order_item = self.viewer.view_order_item(order_item_id)
         except EntityNotFound:
             return False
 
-        price = order.convert_to_dict().get("price")
-        try:
-            order_item_price = (
-                self.viewer.view_order_item(order_item_id)
-                .convert_to_dict()
-                .get("price")
-            )
-        except EntityNotFound:
+        if order_item.order_id != order_id:
             return False
 
-        price -= order_item_price
-        self.manager.remove_order_item(order_item_id)
-        self.manager.update_order(order_id, order_price=price)
+        # the order's maintained total and sales are adjusted alongside the removal
+        with self.manager.tracking_sales(order_id):
+            self.manager.remove_order_item(order_item_id)
+            self.manager.order_changed("updated", order_id)
 
         if query_order:
             return find.order(order_id)
@@ -1,7 +1,8 @@
 import logging
-from typing import Union
+from datetime import datetime
+from typing import Iterator, Optional, Union
 
-from ..database import ManageResturantData, ViewResturantData
+from ..database import ManageResturantData, ViewResturantData, phone_digits
 from ..errors import EntityNotFound
 
 
@@ -51,37 +52,176 @@ class Find:
 
         return customer.convert_to_dict()
 
-    def order(self, order_id: int) -> Union[dict, bool]:
+    def version(self, view, entity_id: int) -> Union[tuple, bool]:
+        """Returns the version and last modification time of a row, using one
+        primary key lookup at most, or False if it doesn't exist."""
         try:
-            order = self.viewer.view_order(order_id)
-            order_price = self.viewer.view_order_grand_total(order_id)
+            entity = view(entity_id)
         except EntityNotFound:
             return False
-        except Exception as e:
-            self.logger.warning("An unhandled error occurred searching for an order.")
-            self.logger.warning(f"Order ID: {order_id}")
-            raise
+        return entity.validators()
+
+    def food_version(self, food_id: int) -> Union[tuple, bool]:
+        return self.version(self.viewer.view_food, food_id)
+
+    def addon_version(self, addon_id: int) -> Union[tuple, bool]:
+        return self.version(self.viewer.view_addon, addon_id)
+
+    def customer_version(self, customer_id: int) -> Union[tuple, bool]:
+        return self.version(self.viewer.view_customer, customer_id)
+
+    def order_version(self, order_id: int) -> Union[tuple, bool]:
+        return self.version(self.viewer.view_order, order_id)
+
+    def order(self, order_id: int) -> Union[dict, bool]:
         try:
-            order_items = self.viewer.view_order_items(order_id)
+            order, customer_id, order_items, item_mods = self.viewer.view_order_details(
+                order_id
+            )
         except EntityNotFound:
-            order_items = []
+            return False
         except Exception as e:
-            self.logger.warning(
-                "An unhandled error occurred looking for order items while searching for an order."
-            )
+            self.logger.warning("An unhandled error occurred searching for an order.")
             self.logger.warning(f"Order ID: {order_id}")
             raise
 
+        return self._order_dict(order, customer_id, order_items, item_mods)
+
+    @staticmethod
+    def _order_dict(
+        order, customer_id: Optional[int], order_items: list, item_mods: dict
+    ) -> dict:
+        order_price = order.order_total
+        summed_price = 0
         orderitems = []
         for order_item in order_items:
-            item_mods = self.viewer.view_item_mods(order_item.order_item_id)
+            mods = item_mods[order_item.order_item_id]
+            summed_price += order_item.order_item_price
+            summed_price += sum(item_mod.item_mod_price for item_mod in mods)
             orderitem = order_item.convert_to_dict()
-            orderitem["addons"] = [item_mod.convert_to_dict() for item_mod in item_mods]
+            orderitem["addons"] = [item_mod.convert_to_dict() for item_mod in mods]
             orderitems.append(orderitem)
 
+        if order_price is None:
+            # the total isn't maintained for this order, use the loaded rows
+            order_price = summed_price
+
         order = order.convert_to_dict()
         order["items"] = orderitems
-        order["price"] = order_price
-        order["customer_id"] = self.viewer.view_order_customer(order_id).customer_id
+        order["price"] = float(order_price)
+        order["customer_id"] = customer_id
 
         return order
+
+    def foods(
+        self, after: Optional[int], limit: int, category: Optional[str] = None
+    ) -> tuple[list[dict], Optional[int]]:
+        foods = self.viewer.list_foods(after, limit + 1, category=category)
+        next_after = foods[limit - 1].food_id if len(foods) > limit else None
+        return [food.convert_to_dict() for food in foods[:limit]], next_after
+
+    def addons(
+        self, after: Optional[int], limit: int, addon_type: Optional[str] = None
+    ) -> tuple[list[dict], Optional[int]]:
+        addons = self.viewer.list_addons(after, limit + 1, addon_type=addon_type)
+        next_after = addons[limit - 1].addon_id if len(addons) > limit else None
+        return [addon.convert_to_dict() for addon in addons[:limit]], next_after
+
+    def customers(
+        self, after: Optional[int], limit: int
+    ) -> tuple[list[dict], Optional[int]]:
+        customers = self.viewer.list_customers(after, limit + 1)
+        next_after = (
+            customers[limit - 1].customer_id if len(customers) > limit else None
+        )
+        return [
+            customer.convert_to_dict() for customer in customers[:limit]
+        ], next_after
+
+    def search_customers(
+        self,
+        limit: int,
+        phone: Optional[str] = None,
+        name: Optional[str] = None,
+        exact: bool = False,
+    ) -> list[dict]:
+        """Finds customers by the start of their phone number and/or name. The
+        name is matched case-insensitively, and only the digits of the phone
+        number are compared."""
+        customers = self.viewer.search_customers(
+            limit,
+            phone=phone_digits(phone) if phone else None,
+            name=name.lower() if name else None,
+            exact=exact,
+        )
+        return [customer.convert_to_dict() for customer in customers]
+
+    def search_menu(
+        self, query: str, limit: int, kind: Optional[str] = None
+    ) -> list[dict]:
+        """Finds food and addon items by the words of their name and category or
+        type, matching words by their start and tolerating misspellings. `kind`
+        restricts the search to "food" or "addon" items."""
+        return self.viewer.search_menu(query, limit, kind=kind)
+
+    def sales_report(
+        self,
+        grain: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        by: tuple[str, ...] = (),
+        **filters: Optional[str],
+    ) -> list[dict]:
+        """Finds the items sold and the sales per hour or day, broken down by the
+        `by` dimensions: category, order_type and/or payment_method."""
+        rows = self.viewer.sales_report(grain, since, until, by, **filters)
+        return [
+            {
+                "period": str(row[0]),
+                **dict(zip(by, row[1:-2])),
+                "items": int(row[-2]),
+                "sales": float(row[-1]),
+            }
+            for row in rows
+        ]
+
+    def orders(
+        self,
+        after: Optional[tuple[datetime, int]],
+        limit: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        customer_id: Optional[int] = None,
+    ) -> tuple[list[dict], Optional[tuple[datetime, int]]]:
+        rows = self.viewer.list_orders(
+            after, limit + 1, since=since, until=until, customer_id=customer_id
+        )
+        next_after = None
+        if len(rows) > limit:
+            last = rows[limit - 1][0]
+            next_after = (last.order_date, last.order_id)
+        rows = rows[:limit]
+
+        order_items, item_mods = self.viewer.view_orders_contents(
+            order.order_id for order, _ in rows
+        )
+        orders = [
+            self._order_dict(order, customer_id, order_items[order.order_id], item_mods)
+            for order, customer_id in rows
+        ]
+        return orders, next_after
+
+    def export_orders(
+        self,
+        batch_size: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[dict]:
+        for rows in self.viewer.stream_orders(batch_size, since=since, until=until):
+            order_items, item_mods = self.viewer.view_orders_contents(
+                order.order_id for order, _ in rows
+            )
+            for order, customer_id in rows:
+                yield self._order_dict(
+                    order, customer_id, order_items[order.order_id], item_mods
+                )
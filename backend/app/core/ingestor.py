@@ -0,0 +1,192 @@
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+from ..database import TTLCache
+from ..errors import GeneralException, OrderQueueFull
+
+from .creator import Create
+
+# closes the queue, once every order before it is written
+_STOP = object()
+
+
+class Ingest:
+    """Accepts orders onto an in-process queue, and writes them from a background
+    thread, many orders per transaction (group commit).
+
+    Orders are validated against the menu when they are accepted, and given a
+    ticket whose status clients poll until the order is written. The writer takes
+    whatever is queued, up to `batch_size` orders, waiting up to `batch_wait`
+    seconds for a batch to fill. If a batch fails, its orders are written one by
+    one, so that only the orders at fault fail.
+
+    The queue holds at most `queue_size` orders: past that, orders wait up to
+    `put_timeout` seconds for room and are then turned away with OrderQueueFull.
+    Stopping the writer, which happens on exit, writes every order queued first.
+    Tickets are only known to the process that accepted them."""
+
+    def __init__(self, create: Create) -> None:
+        self.create = create
+        self.logger = logging.getLogger("core.ingest")
+        self.app = None
+        self.batch_size = 100
+        self.batch_wait = 0.01
+        self.put_timeout = 0.5
+        self.queue: queue.Queue = queue.Queue(1000)
+        self.statuses = TTLCache(100000, 3600.0)
+        self._lock = threading.Lock()
+        self._queued: dict[str, dict] = {}
+        self._writer: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None
+
+    def start(
+        self,
+        app,
+        queue_size: int,
+        batch_size: int,
+        batch_wait: float,
+        put_timeout: float,
+        status_size: int,
+        status_ttl: float,
+    ) -> None:
+        """Starts the writer, within the app's context."""
+        if self.running:
+            self.stop()
+        self.app = app
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.put_timeout = put_timeout
+        self.queue = queue.Queue(queue_size)
+        self.statuses.configure(status_size, status_ttl)
+        self._writer = threading.Thread(
+            target=self._run, name="order-ingest", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Writes every queued order, then stops the writer."""
+        with self._lock:
+            # orders submitted from now on are turned away, so none is queued
+            # behind the stop
+            writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        atexit.unregister(self.stop)
+        self.queue.put(_STOP)
+        writer.join(timeout)
+
+    def submit(
+        self,
+        customer_id: int,
+        order_items: dict,
+        payment_method: str,
+        order_type: str,
+    ) -> dict:
+        """Validates an order and queues it, returning its ticket."""
+        if not self.running:
+            raise OrderQueueFull
+        self.create.resolve_order(order_items)
+        ticket = uuid.uuid4().hex
+        order = {
+            "customer_id": customer_id,
+            "order_items": order_items,
+            "payment_method": payment_method,
+            "order_type": order_type,
+            "order_date": datetime.now(),
+        }
+        deadline = time.monotonic() + self.put_timeout
+        while True:
+            # the writer is checked for under the lock `stop` clears it with, as
+            # an order queued behind the stop would never be written
+            with self._lock:
+                if not self.running:
+                    raise OrderQueueFull
+                try:
+                    self.queue.put_nowait((ticket, order))
+                except queue.Full:
+                    pass
+                else:
+                    self._queued[ticket] = order
+                    return {"id": ticket, "status": "queued"}
+            if time.monotonic() >= deadline:
+                raise OrderQueueFull
+            time.sleep(min(0.01, self.put_timeout))
+
+    def status(self, ticket: str) -> Optional[dict]:
+        """Returns the status of a ticket, or None if it is unknown or expired."""
+        with self._lock:
+            if ticket in self._queued:
+                return {"id": ticket, "status": "queued"}
+        return self.statuses.get(ticket)
+
+    def stats(self) -> dict:
+        """Returns the occupancy of the queue."""
+        return {
+            "running": self.running,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "batch_size": self.batch_size,
+        }
+
+    def _finish(self, ticket: str, status: dict) -> None:
+        self.statuses.set(ticket, {"id": ticket, **status})
+        with self._lock:
+            self._queued.pop(ticket, None)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=self.batch_wait))
+                except queue.Empty:
+                    break
+            stopping = any(entry is _STOP for entry in batch)
+            batch = [entry for entry in batch if entry is not _STOP]
+            if not batch:
+                continue
+            try:
+                self._write(batch)
+            except Exception as e:
+                # the writer outlives whatever goes wrong around a batch
+                for ticket, order in batch:
+                    if ticket in self._queued:
+                        self._fail(ticket, order, e)
+
+    def _write(self, batch: list[tuple[str, dict]]) -> None:
+        with self.app.app_context():
+            try:
+                created = self.create.orders([order for _, order in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    self._fail(*batch[0], e)
+                    return
+                created = None
+        if created is None:
+            self.logger.warning(
+                f"A batch of {len(batch)} orders failed, writing them one by one."
+            )
+            for entry in batch:
+                self._write([entry])
+            return
+        for (ticket, _), order in zip(batch, created):
+            self._finish(ticket, {"status": "created", "order": order})
+
+    def _fail(self, ticket: str, order: dict, error: Exception) -> None:
+        if isinstance(error, GeneralException):
+            message = str(error)
+        else:
+            self.logger.exception(f"The queued order {ticket} could not be written.")
+            message = "The order could not be created."
+        self._finish(ticket, {"status": "failed", "message": message})
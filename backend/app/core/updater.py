@@ -2,10 +2,47 @@ import logging
 
 from typing import Union
 
-from . import find
+from sqlalchemy.exc import DataError
 
-from ..database import ManageResturantData, ViewResturantData
-from ..errors import EntityNotFound
+from . import find
+from .validation import check_lengths, parse_price
+
+from ..database import (
+    ManageResturantData,
+    ViewResturantData,
+    Food,
+    Addon,
+    Customer,
+    Order,
+)
+from ..errors import EntityNotFound, ImproperEntryData
+
+# Each maps a field of request data to a function returning its column values.
+FOOD_FIELDS = {
+    "name": lambda name: {"food_name": name},
+    "price": lambda value: {"food_price": parse_price(value)},
+    "category": lambda category: {"food_category": category},
+    "size": lambda size: {"food_size": size},
+}
+ADDON_FIELDS = {
+    "name": lambda name: {"addon_name": name},
+    "type": lambda addon_type: {"addon_type": addon_type},
+    "price": lambda value: {"addon_price": parse_price(value)},
+    "size": lambda size: {"addon_size": size},
+}
+CUSTOMER_FIELDS = {
+    "name": lambda name: {"customer_name": name},
+    "phone": lambda phone: {"customer_phone_number": phone},
+    "address": lambda address: {
+        f"customer_{key}": address[key]
+        for key in ("street", "city", "province", "postal_code")
+        if address.get(key)
+    },
+}
+ORDER_FIELDS = {
+    "payment_method": lambda payment_method: {"order_payment_method": payment_method},
+    "order_type": lambda order_type: {"order_type": order_type},
+}
 
 
 class Update:
@@ -14,6 +51,137 @@ class Update:
         self.viewer = ViewResturantData()
         self.logger = logging.getLogger("core.update")
 
+    @staticmethod
+    def _fields(model, data: dict, fields: dict) -> tuple[dict, dict]:
+        """Validates each field of request data on its own.
+
+        Returns the column values of every valid field, along with whether each
+        provided field is valid. Empty fields are skipped."""
+        values, results = {}, {}
+        for field, convert in fields.items():
+            if not data.get(field):
+                continue
+            try:
+                field_values = convert(data.get(field))
+                if not field_values:
+                    raise ImproperEntryData
+                check_lengths(model, field_values)
+            except (ImproperEntryData, AttributeError, TypeError, ValueError):
+                results[field] = False
+                continue
+            values.update(field_values)
+            results[field] = True
+        return values, results
+
+    def _update(
+        self, model, entity_id: int, data: dict, fields: dict, apply, lookup
+    ) -> tuple[Union[dict, bool], dict]:
+        """Writes every valid field of request data with one UPDATE and one commit.
+
+        Returns the row as a dict, or False if it doesn't exist, along with whether
+        each provided field was applied."""
+        values, results = self._fields(model, data, fields)
+        if not values:
+            return lookup(entity_id), results
+
+        try:
+            with self.manager.unit_of_work():
+                entity = apply(entity_id, **values).convert_to_dict()
+        except EntityNotFound:
+            return False, results
+        except DataError:
+            self.logger.warning(
+                f"The database rejected an update of {model.__tablename__} {entity_id}."
+            )
+            raise ImproperEntryData
+        except Exception as e:
+            self.logger.warning(
+                f"An unhandled error occurred updating a {model.__tablename__} row."
+            )
+            self.logger.warning(f"ID: {entity_id} Values: {values}")
+            raise
+
+        return entity, results
+
+    def food(self, food_id: int, food_data: dict) -> tuple[Union[dict, bool], dict]:
+        return self._update(
+            Food, food_id, food_data, FOOD_FIELDS, self.manager.update_food, find.food
+        )
+
+    def addon(self, addon_id: int, addon_data: dict) -> tuple[Union[dict, bool], dict]:
+        return self._update(
+            Addon,
+            addon_id,
+            addon_data,
+            ADDON_FIELDS,
+            self.manager.update_addon,
+            find.addon,
+        )
+
+    def customer(
+        self, customer_id: int, customer_data: dict
+    ) -> tuple[Union[dict, bool], dict]:
+        return self._update(
+            Customer,
+            customer_id,
+            customer_data,
+            CUSTOMER_FIELDS,
+            self.manager.update_customer,
+            find.customer,
+        )
+
+    def order(self, order_id: int, order_data: dict) -> tuple[Union[dict, bool], dict]:
+        """Applies the items, customer and details of an order in one transaction."""
+        values, results = self._fields(Order, order_data, ORDER_FIELDS)
+
+        order_items = order_data.get("order_items")
+        if order_items:
+            try:
+                order_items = {
+                    int(food_id): list(addons)
+                    for food_id, addons in order_items.items()
+                }
+            except (AttributeError, TypeError, ValueError):
+                results["order_items"] = False
+            else:
+                # unknown menu items reject the whole request before anything is written
+                foods, addons = self._menu(order_items)
+                results["order_items"] = True
+
+        customer_id = order_data.get("customer_id")
+        if customer_id:
+            try:
+                self.viewer.view_customer(int(customer_id))
+            except (EntityNotFound, TypeError, ValueError):
+                results["customer_id"] = False
+            else:
+                results["customer_id"] = True
+
+        # the items, type and payment method of an order make up its sales
+        if values or results.get("order_items"):
+            transaction = self.manager.tracking_sales(order_id)
+        else:
+            transaction = self.manager.unit_of_work()
+        try:
+            with transaction:
+                if values:
+                    self.manager.update_order(order_id, **values)
+                else:
+                    self.viewer.view_order(order_id)
+                if results.get("customer_id"):
+                    self.manager.update_customer_order(order_id, int(customer_id))
+                if results.get("order_items"):
+                    self._add_order_items(order_id, order_items, foods, addons)
+                self.manager.order_changed("updated", order_id)
+        except EntityNotFound:
+            return False, results
+        except Exception as e:
+            self.logger.warning("An unhandled error occurred updating an order.")
+            self.logger.warning(f"Order ID: {order_id} Data: {order_data}")
+            raise
+
+        return find.order(order_id), results
+
     def food_name(self, food_id: int, food_name: str) -> bool:
         try:
             self.manager.update_food(food_id, food_name=food_name)
@@ -141,7 +309,7 @@ class Update:
 
     def customer_phone(self, customer_id: int, phone: int) -> bool:
         try:
-            self.manager.update_customer(customer_id, customer_phone=phone)
+            self.manager.update_customer(customer_id, customer_phone_number=phone)
         except EntityNotFound:
             return False
         except Exception as e:
@@ -157,7 +325,7 @@ class Update:
         try:
             self.manager.update_customer(
                 customer_id,
-                customer_stress=customer_address.get("street"),
+                customer_street=customer_address.get("street"),
                 customer_city=customer_address.get("city"),
                 customer_province=customer_address.get("province"),
                 customer_postal_code=customer_address.get("postal_code"),
@@ -183,7 +351,7 @@ class Update:
 
     def customer_street(self, customer_id: int, street: str) -> bool:
         try:
-            self.manager.update_customer(customer_id, customer_stress=street)
+            self.manager.update_customer(customer_id, customer_street=street)
         except EntityNotFound:
             return False
         except Exception as e:
@@ -243,9 +411,9 @@ class Update:
         self, order_id: int, payment_method: str, query_order: bool = False
     ) -> Union[dict, bool]:
         try:
-            self.manager.update_order(
-                order_id, order_payment_method=payment_method
-            ).convert_to_dict()
+            with self.manager.tracking_sales(order_id):
+                self.manager.update_order(order_id, order_payment_method=payment_method)
+                self.manager.order_changed("updated", order_id)
         except EntityNotFound:
             return False
         except Exception as e:
@@ -266,7 +434,9 @@ class Update:
         self, order_id: int, order_type: str, query_order: bool = False
     ) -> Union[dict, bool]:
         try:
-            order = self.manager.update_order(order_id, order_type=order_type)
+            with self.manager.tracking_sales(order_id):
+                self.manager.update_order(order_id, order_type=order_type)
+                self.manager.order_changed("updated", order_id)
         except EntityNotFound:
             return False
         except Exception as e:
@@ -283,21 +453,18 @@ class Update:
         self, order_id: int, customer_id: int, query_order: bool = False
     ) -> Union[dict, bool]:
         try:
-            self.manager.remove_customer_order(customer_id, order_id)
+            self.viewer.view_order(order_id)
+            self.viewer.view_customer(customer_id)
         except EntityNotFound:
             return False
-        except Exception as e:
-            self.logger.warning(
-                "An unhandled error occurred removing the old order customer."
-            )
-            self.logger.warning(f"Order ID: {order_id} Customer ID: {customer_id}")
-            raise
 
         try:
-            customer_order = self.manager.new_customer_order(customer_id, order_id)
+            with self.manager.unit_of_work():
+                self.manager.update_customer_order(order_id, customer_id)
+                self.manager.order_changed("updated", order_id)
         except Exception as e:
             self.logger.warning(
-                "An unhandled error occurred creating the new order customer."
+                "An unhandled error occurred changing the order customer."
             )
             self.logger.warning(f"Order ID: {order_id} Customer ID: {customer_id}")
             raise
@@ -311,9 +478,12 @@ class Update:
         self, order_item_id: int, food_id: int, price: int, query_order: bool = False
     ) -> Union[dict, bool]:
         try:
-            self.manager.update_order_item(
-                order_item_id, food_id=food_id, order_item_price=price
-            )
+            order_id = self.viewer.view_order_item(order_item_id).order_id
+            with self.manager.tracking_sales(order_id):
+                self.manager.update_order_item(
+                    order_item_id, food_id=food_id, order_item_price=price
+                )
+                self.manager.order_changed("updated", order_id)
         except EntityNotFound:
             return False
         except Exception as e:
@@ -324,7 +494,6 @@ class Update:
             raise
 
         if query_order:
-            order_id = self.viewer.view_order_item(order_item_id).order_id
             return find.order(order_id)
 
         return True
@@ -333,7 +502,7 @@ class Update:
         self, order_id: int, order_items: dict, query_order: bool = False
     ) -> Union[dict, bool]:
         try:
-            order = self.viewer.view_food(order_id).convert_to_dict()
+            self.viewer.view_order(order_id)
         except EntityNotFound:
             return False
         except Exception as e:
@@ -343,24 +512,45 @@ class Update:
             self.logger.warning(f"Order ID: {order_id}")
             raise
 
-        orderitems = []
-        addons = []
-        for food_id in order_items:
-            food = self.viewer.view_food(food_id).convert_to_dict()
-            food_addons = order_items[food_id]
-            order_item = self.manager.new_order_item(
-                order.get("id"), food_id, food.get("price")
-            )
-            orderitems.append(order_item.convert_to_dict())
-            for addon_id in food_addons:
-                addon = self.viewer.view_addon(addon_id)
-                addon_price = addon["price"]
-                addons.append(addon.convert_to_dict())
-                self.manager.new_item_mod(
-                    order_item.get("id"), addon_id, 1, addon_price
-                )
+        # resolve the whole menu up front, so unknown items are rejected before
+        # anything is written
+        foods, addons = self._menu(order_items)
+        with self.manager.tracking_sales(order_id):
+            self._add_order_items(order_id, order_items, foods, addons)
+            self.manager.order_changed("updated", order_id)
 
         if query_order:
             return find.order(order_id)
 
         return True
+
+    def _menu(self, order_items: dict) -> tuple[dict, dict]:
+        """Looks up every food and addon of new order items in batches."""
+        try:
+            foods = self.viewer.view_foods(order_items)
+            addons = self.viewer.view_addons(
+                addon_id
+                for food_addons in order_items.values()
+                for addon_id in food_addons
+            )
+        except EntityNotFound as e:
+            raise ImproperEntryData(str(e))
+        return foods, addons
+
+    def _add_order_items(
+        self, order_id: int, order_items: dict, foods: dict, addons: dict
+    ) -> None:
+        for food_id in order_items:
+            order_item = self.manager.new_order_item(
+                order_id,
+                food_id,
+                foods[food_id].food_price,
+                foods[food_id].food_category,
+            )
+            for addon_id in order_items[food_id]:
+                self.manager.new_item_mod(
+                    order_item.order_item_id,
+                    addon_id,
+                    1,
+                    addons[addon_id].addon_price,
+                )
@@ -0,0 +1,32 @@
+from sqlalchemy import String
+
+from ..errors import ImproperEntryData, MissingEntryData
+
+
+def check_lengths(model, values: dict) -> None:
+    """Raises ImproperEntryData if a value is too long for its column."""
+    for key, value in values.items():
+        length = getattr(model.__table__.c[key].type, "length", None)
+        if length and isinstance(value, str) and len(value) > length:
+            raise ImproperEntryData(f"{key} must be at most {length} characters.")
+
+
+def check_values(model, values: dict) -> None:
+    """Raises MissingEntryData if a required value is null, and
+    ImproperEntryData if a text value is not a string."""
+    for key, value in values.items():
+        column = model.__table__.c[key]
+        if value is None:
+            if not column.nullable:
+                raise MissingEntryData(f"{key} is required.")
+        elif isinstance(column.type, String) and not isinstance(value, str):
+            raise ImproperEntryData(f"{key} must be a string.")
+
+
+def parse_price(value) -> float:
+    """Converts a price of request data, raising ImproperEntryData if it is not
+    a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ImproperEntryData("The price must be a number.")
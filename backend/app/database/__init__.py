@@ -1,5 +1,13 @@
+from .cache import TTLCache, MenuCache, menu_cache
+from .search import MenuIndex, menu_index
+from .idempotency import IdempotencyStore, idempotency_store
+from .events import OrderEvents, order_events
+from .pool import set_statement_timeout, pool_stats
 from .manager import ManageResturantData
 from .viewer import ViewResturantData
+from .rollup import Sales, add_sale, sale_key
+from .schema import pending_migrations, migrate
+from .plans import table_scans
 from .models import (
     Base,
     Food,
@@ -9,11 +17,31 @@ from .models import (
     OrderItem,
     ItemMod,
     CustomerOrder,
+    SalesRollup,
+    IdempotencyKey,
+    phone_digits,
 )
 
 __all__ = (
+    "TTLCache",
+    "MenuCache",
+    "menu_cache",
+    "MenuIndex",
+    "menu_index",
+    "IdempotencyStore",
+    "idempotency_store",
+    "OrderEvents",
+    "order_events",
+    "set_statement_timeout",
+    "pool_stats",
     "ManageResturantData",
     "ViewResturantData",
+    "Sales",
+    "add_sale",
+    "sale_key",
+    "pending_migrations",
+    "migrate",
+    "table_scans",
     "Base",
     "Food",
     "Addon",
@@ -22,4 +50,7 @@ __all__ = (
     "OrderItem",
     "ItemMod",
     "CustomerOrder",
+    "SalesRollup",
+    "IdempotencyKey",
+    "phone_digits",
 )
@@ -0,0 +1,263 @@
+from datetime import datetime
+from typing import Iterable, Optional as optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..errors import EntityNotFound
+
+from .cache import menu_cache
+from .manager import order_change, order_of_item
+from .models import Food, Addon, Customer, Order, CustomerOrder, OrderItem, ItemMod
+from .rollup import Sales, add_to_rollup, rollup_rows
+from .viewer import (
+    addons_page,
+    customers_page,
+    foods_page,
+    group_orders_contents,
+    order_with_customer,
+    orders_page,
+)
+
+# The asyncio driver used in place of each synchronous one
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_uri(uri: str) -> str:
+    """Swaps the driver of a database URI for its asyncio counterpart."""
+    scheme, rest = uri.split(":", 1)
+    return ASYNC_DRIVERS.get(scheme.split("+", 1)[0], scheme) + ":" + rest
+
+
+class AsyncViewResturantData:
+    """The asyncio counterpart of ViewResturantData, reading through an AsyncSession."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def _view_menu_item(self, model, entity_id: int, missing: str):
+        entity = menu_cache.load_detached(model, entity_id)
+        if entity:
+            return entity
+        generation = menu_cache.generation()
+        entity = await self.session.get(model, entity_id)
+        if not entity:
+            raise EntityNotFound(missing)
+        menu_cache.store(entity, generation)
+        return entity
+
+    async def _view_menu_items(self, model, entity_ids: Iterable[int], name: str):
+        key = model.__mapper__.primary_key[0]
+        entities = {}
+        for entity_id in set(entity_ids):
+            entities[entity_id] = menu_cache.load_detached(model, entity_id)
+        uncached = [entity_id for entity_id, entity in entities.items() if not entity]
+        if uncached:
+            generation = menu_cache.generation()
+            for entity in await self.session.scalars(
+                select(model).where(key.in_(uncached))
+            ):
+                menu_cache.store(entity, generation)
+                entities[getattr(entity, key.key)] = entity
+        missing = [entity_id for entity_id, entity in entities.items() if not entity]
+        if missing:
+            raise EntityNotFound(
+                f"The {name} items {sorted(missing)} do not exist in the database."
+            )
+        return entities
+
+    async def view_food(self, food_id: int) -> Food:
+        """Returns the details of a given food item."""
+        return await self._view_menu_item(
+            Food, food_id, "The food item does not exist in the database."
+        )
+
+    async def view_addon(self, addon_id: int) -> Addon:
+        """Returns the details of a given addon item."""
+        return await self._view_menu_item(
+            Addon, addon_id, "The addon item does not exist in the database."
+        )
+
+    async def view_foods(self, food_ids: Iterable[int]) -> dict[int, Food]:
+        """Returns the details of the given food items, keyed by their ID."""
+        return await self._view_menu_items(Food, food_ids, "food")
+
+    async def view_addons(self, addon_ids: Iterable[int]) -> dict[int, Addon]:
+        """Returns the details of the given addon items, keyed by their ID."""
+        return await self._view_menu_items(Addon, addon_ids, "addon")
+
+    async def view_customer(self, customer_id: int) -> Customer:
+        """Returns the details of a given customer."""
+        entity = await self.session.get(Customer, customer_id)
+        if not entity:
+            raise EntityNotFound(
+                f'The customer "{customer_id}" does not exist in the database.'
+            )
+        return entity
+
+    async def view_order(self, order_id: int) -> Order:
+        """Returns the details of a given order."""
+        entity = await self.session.get(Order, order_id)
+        if not entity:
+            raise EntityNotFound("The order does not exist in the database.")
+        return entity
+
+    async def view_order_details(
+        self, order_id: int
+    ) -> tuple[Order, optional[int], list[OrderItem], dict[int, list[ItemMod]]]:
+        """Returns a given order alongside its customer ID, items and item modifications."""
+        row = (await self.session.execute(order_with_customer(order_id))).first()
+        if not row:
+            raise EntityNotFound("The order does not exist in the database.")
+        order, customer_id = row
+
+        order_items, item_mods = await self.view_orders_contents([order_id])
+
+        return order, customer_id, order_items[order_id], item_mods
+
+    async def view_orders_contents(
+        self, order_ids: Iterable[int]
+    ) -> tuple[dict[int, list[OrderItem]], dict[int, list[ItemMod]]]:
+        """Returns the items of the given orders keyed by order ID, and the item
+        modifications of those items keyed by order item ID, in two queries."""
+        order_ids = list(order_ids)
+        if not order_ids:
+            return {}, {}
+
+        items = (
+            await self.session.scalars(
+                select(OrderItem)
+                .where(OrderItem.order_id.in_(order_ids))
+                .order_by(OrderItem.order_item_id)
+            )
+        ).all()
+        mods = []
+        if items:
+            mods = (
+                await self.session.scalars(
+                    select(ItemMod).where(
+                        ItemMod.order_item_id.in_(
+                            [item.order_item_id for item in items]
+                        )
+                    )
+                )
+            ).all()
+
+        return group_orders_contents(order_ids, items, mods)
+
+    async def list_foods(
+        self, after: optional[int], limit: int, category: optional[str] = None
+    ) -> list[Food]:
+        """Returns up to `limit` food items following the food ID `after`."""
+        return (await self.session.scalars(foods_page(after, limit, category))).all()
+
+    async def list_addons(
+        self, after: optional[int], limit: int, addon_type: optional[str] = None
+    ) -> list[Addon]:
+        """Returns up to `limit` addon items following the addon ID `after`."""
+        return (await self.session.scalars(addons_page(after, limit, addon_type))).all()
+
+    async def list_customers(self, after: optional[int], limit: int) -> list[Customer]:
+        """Returns up to `limit` customers following the customer ID `after`."""
+        return (await self.session.scalars(customers_page(after, limit))).all()
+
+    async def list_orders(
+        self,
+        after: optional[tuple[datetime, int]],
+        limit: int,
+        since: optional[datetime] = None,
+        until: optional[datetime] = None,
+        customer_id: optional[int] = None,
+    ) -> list[tuple[Order, optional[int]]]:
+        """Returns up to `limit` orders with their customer ID, ordered by date."""
+        rows = await self.session.execute(
+            orders_page(after, limit, since, until, customer_id=customer_id)
+        )
+        return [tuple(row) for row in rows]
+
+
+class AsyncManageResturantData:
+    """The asyncio counterpart of ManageResturantData, covering only the writes
+    that create an order; every other write goes through ManageResturantData.
+
+    Changes are only flushed, so that callers commit them in one transaction."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def _touch_order(self, order_id, delta=0) -> None:
+        await self.session.execute(order_change(order_id, delta))
+
+    async def new_order(
+        self, order_date, order_payment_method: str, order_type: str
+    ) -> Order:
+        """Adds order details to the database."""
+        order_details = Order(
+            order_date=order_date,
+            order_payment_method=order_payment_method,
+            order_type=order_type,
+            order_total=0,
+        )
+        self.session.add(order_details)
+        await self.session.flush()
+        return order_details
+
+    async def new_customer_order(
+        self, customer_id: int, order_id: int
+    ) -> CustomerOrder:
+        """Adds customer order details to the database."""
+        customer_order_details = CustomerOrder(
+            customer_id=customer_id, order_id=order_id
+        )
+        self.session.add(customer_order_details)
+        await self.session.flush()
+        return customer_order_details
+
+    async def new_order_item(
+        self,
+        order_id: int,
+        food_id: int,
+        order_item_price: float,
+        order_item_category: optional[str] = None,
+    ) -> OrderItem:
+        """Adds order item details to the database, along with the category its
+        sales are filed under."""
+        order_item_details = OrderItem(
+            order_id=order_id,
+            food_id=food_id,
+            order_item_price=order_item_price,
+            order_item_category=order_item_category,
+        )
+        self.session.add(order_item_details)
+        await self._touch_order(order_id, order_item_price)
+        await self.session.flush()
+        return order_item_details
+
+    async def new_item_mod(
+        self,
+        order_item_id: int,
+        addon_id: int,
+        item_mod_qty: int,
+        item_mod_price: float,
+    ) -> ItemMod:
+        """Adds item modification details to the database."""
+        item_mod_details = ItemMod(
+            order_item_id=order_item_id,
+            addon_id=addon_id,
+            item_mod_qty=item_mod_qty,
+            item_mod_price=item_mod_price,
+        )
+        self.session.add(item_mod_details)
+        await self._touch_order(order_of_item(order_item_id), item_mod_price)
+        await self.session.flush()
+        return item_mod_details
+
+    async def add_sales(self, sales: Sales) -> None:
+        """Adds the sales of new orders to the sales rollup."""
+        if sales:
+            dialect = self.session.get_bind().dialect.name
+            await self.session.execute(add_to_rollup(dialect), rollup_rows(sales))
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional as optional
+
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from .. import db
+
+
+class TTLCache:
+    """A thread-safe LRU cache whose entries expire `ttl` seconds after being stored."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, enabled=True) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, maxsize: int, ttl: float, enabled=True) -> None:
+        """Changes the size bound, TTL and state of the cache, emptying it."""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self.enabled = enabled
+            self._entries.clear()
+
+    def get(self, key: Hashable) -> optional[Any]:
+        """Returns the value stored for a key, or None if it is missing or expired."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores a value, evicting the least recently used entry if the cache is full."""
+        if not self.enabled or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._set(key, value)
+
+    def _set(self, key: Hashable, value: Any) -> None:
+        # runs under the lock
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Removes a key from the cache, if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache, and resets its counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns the counters and occupancy of the cache."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+class MenuCache(TTLCache):
+    """Caches menu rows (Food and Addon) by primary key.
+
+    Column values are stored rather than ORM instances, since instances are bound
+    to the session of the request that loaded them. Each worker process holds its
+    own cache, so writes made by another process are only seen once the TTL ends.
+
+    Rows read before an eviction of theirs aren't stored, as they may predate the
+    change evicting them: readers take the `generation` of the cache before
+    reading rows to store."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # the number of evictions so far, and that number as of each row's last
+        self._evictions = 0
+        self._evicted: dict[tuple[str, int], int] = {}
+
+    @staticmethod
+    def _key(model, entity_id: int) -> tuple[str, int]:
+        return model.__tablename__, int(entity_id)
+
+    def load(self, model, entity_id: int) -> optional[Any]:
+        """Returns a cached row attached to the current session, without any SQL."""
+        entity = self.load_detached(model, entity_id)
+        if entity is None:
+            return None
+        return db.session.merge(entity, load=False)
+
+    def load_detached(self, model, entity_id: int) -> optional[Any]:
+        """Returns a cached row that isn't attached to any session."""
+        values = self.get(self._key(model, entity_id))
+        if values is None:
+            return None
+        entity = model(**values)
+        make_transient_to_detached(entity)
+        return entity
+
+    def generation(self) -> int:
+        """Returns the number of evictions so far, to be passed to `store` for the
+        rows read from now on."""
+        with self._lock:
+            return self._evictions
+
+    def store(self, entity, generation: int) -> None:
+        """Caches the column values of a loaded row, unless it was evicted since
+        the cache was at `generation`."""
+        if not self.enabled or self.maxsize <= 0:
+            return
+        mapper = inspect(type(entity))
+        values = {attr.key: getattr(entity, attr.key) for attr in mapper.column_attrs}
+        key = self._key(type(entity), mapper.primary_key_from_instance(entity)[0])
+        with self._lock:
+            if self._evicted.get(key, 0) <= generation:
+                self._set(key, values)
+
+    def evict(self, model, entity_id: int) -> None:
+        """Removes a row from the cache, and keeps copies read before from being
+        stored."""
+        key = self._key(model, entity_id)
+        with self._lock:
+            self._evictions += 1
+            self._evicted[key] = self._evictions
+            self._entries.pop(key, None)
+
+
+menu_cache = MenuCache()
@@ -0,0 +1,118 @@
+import time
+import queue
+import threading
+from collections import deque
+from typing import Iterable, Optional as optional
+
+
+class OrderEvent:
+    """A change to an order, published once it is committed, along with the order
+    as it was committed when it is known (created orders)."""
+
+    __slots__ = ("id", "kind", "order_id", "order")
+
+    def __init__(
+        self, event_id: str, kind: str, order_id: int, order: optional[dict]
+    ) -> None:
+        self.id = event_id
+        self.kind = kind
+        self.order_id = order_id
+        self.order = order
+
+
+class Subscription:
+    """The events published for one subscriber, buffered up to `maxsize`.
+
+    A subscriber falling further behind is dropped, and `overflowed` set, so that
+    one slow client doesn't hold every publisher back; it resumes from the history
+    when it reconnects."""
+
+    def __init__(self, maxsize: int, backlog: Iterable[OrderEvent] = ()) -> None:
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.overflowed = False
+        # whether events were missed, as the last one received left the history,
+        # and the ID of the event the subscription then starts after
+        self.missed = False
+        self.resume_id = ""
+        for event in backlog:
+            self.put(event)
+
+    def put(self, event: OrderEvent) -> bool:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+            return False
+        return True
+
+    def get(self, timeout: float) -> optional[OrderEvent]:
+        """Returns the next event, or None if none was published in time."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class OrderEvents:
+    """An in-process publisher of order changes to subscribers (the live order
+    feed), keeping the last `history` events for subscribers resuming after a
+    disconnect.
+
+    Event IDs are made of the start time of the process and a sequence number, so
+    that IDs from another process or a previous run are recognized as unknown.
+    Only the changes made by this process are published."""
+
+    def __init__(self, history: int = 1000, buffer: int = 256) -> None:
+        self.buffer = buffer
+        self.history: deque[OrderEvent] = deque(maxlen=history)
+        self._prefix = f"{time.time_ns():x}-"
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+
+    def configure(self, history: int, buffer: int) -> None:
+        """Changes the bounds of the history and subscriber buffers."""
+        with self._lock:
+            self.buffer = buffer
+            self.history = deque(self.history, maxlen=history)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, kind: str, order_id: int, order: optional[dict] = None) -> str:
+        """Publishes a change to every subscriber, returning the ID of its event."""
+        with self._lock:
+            self._sequence += 1
+            event = OrderEvent(f"{self._prefix}{self._sequence}", kind, order_id, order)
+            self.history.append(event)
+            for subscription in list(self._subscribers):
+                if not subscription.put(event):
+                    self._subscribers.discard(subscription)
+        return event.id
+
+    def subscribe(self, last_event_id: optional[str] = None) -> Subscription:
+        """Subscribes to the events published from now on, preceded by those
+        published after `last_event_id` if it is given and still in the history."""
+        with self._lock:
+            backlog: list[OrderEvent] = []
+            missed = False
+            if last_event_id:
+                ids = [event.id for event in self.history]
+                if last_event_id in ids:
+                    backlog = list(self.history)[ids.index(last_event_id) + 1 :]
+                else:
+                    missed = True
+            subscription = Subscription(max(self.buffer, len(backlog)), backlog)
+            subscription.missed = missed
+            if missed and self.history:
+                subscription.resume_id = self.history[-1].id
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+order_events = OrderEvents()
@@ -0,0 +1,252 @@
+import json
+import time
+import uuid
+import threading
+from datetime import timedelta
+from typing import Callable, Iterable, Optional as optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import db
+from ..errors import IdempotencyKeyReused, RequestInProgress
+
+from .cache import TTLCache
+from .models import IdempotencyKey, utcnow
+
+# The status, headers and body of a stored response
+StoredResponse = tuple[int, dict, str]
+
+
+def bind_claim(order_ids: Iterable[int]) -> None:
+    """Writes the order created under the idempotency key claimed by the current
+    request onto its claim, in the transaction creating the order.
+
+    Raises RequestInProgress if the claim was taken over meanwhile, so that the
+    transaction is rolled back rather than creating the order a second time."""
+    claim = db.session.info.get("idempotency_claim")
+    order_ids = list(order_ids)
+    if claim is None or not order_ids:
+        return
+    key, claim_id = claim
+    bound = db.session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.idempotency_key == key)
+        .where(IdempotencyKey.claim_id == claim_id)
+        .where(IdempotencyKey.order_id.is_(None))
+        .values(order_id=order_ids[0])
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not bound:
+        raise RequestInProgress("The idempotency key was claimed by a retry.")
+    del db.session.info["idempotency_claim"]
+
+
+class IdempotencyStore:
+    """Stores the first successful response to each idempotency key, so that
+    retries of a request replay it rather than running the request again.
+
+    A key is claimed with an INSERT, committed before the request runs. The
+    order the request creates is written to the claim in the same transaction
+    (see `bind_claim`), and its response once the request succeeds, while failed
+    requests release their claim so that they can be retried. A retry finding an
+    order but no response, as the first request died in between, rebuilds the
+    response from the order. Stored responses are cached in memory in front of
+    the table. A duplicate arriving while the first request runs waits for it,
+    on an event when both are handled by this process and by polling the claim
+    otherwise, for up to `wait` seconds.
+
+    Claims expire `ttl` seconds after they were made. Claims that created nothing
+    after `lock_timeout` seconds are taken over, as their request is presumed
+    lost; should it still be running, it fails when committing its order."""
+
+    def __init__(
+        self,
+        ttl: float = 86400.0,
+        wait: float = 10.0,
+        lock_timeout: float = 60.0,
+        cache_size: int = 1024,
+    ) -> None:
+        self.cache = TTLCache(cache_size, ttl)
+        self.ttl = ttl
+        self.wait = wait
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._running: dict[str, threading.Event] = {}
+
+    def configure(
+        self, ttl: float, wait: float, lock_timeout: float, cache_size: int
+    ) -> None:
+        """Changes the lifetimes of the store, emptying its cache."""
+        self.ttl = ttl
+        self.wait = wait
+        self.lock_timeout = lock_timeout
+        self.cache.configure(cache_size, ttl)
+
+    def _cached(self, key: str, request_hash: str) -> optional[StoredResponse]:
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        if cached[0] != request_hash:
+            raise IdempotencyKeyReused
+        return cached[1]
+
+    def _claim(
+        self,
+        key: str,
+        request_hash: str,
+        deadline: float,
+        recover: Callable[[int], StoredResponse],
+    ) -> tuple[optional[str], optional[StoredResponse]]:
+        """Claims a key, returning the ID of the claim, or returns the response
+        stored for it."""
+        delay = 0.05
+        while True:
+            now = utcnow()
+            claim_id = uuid.uuid4().hex
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(
+                        insert(IdempotencyKey).values(
+                            idempotency_key=key,
+                            request_hash=request_hash,
+                            claim_id=claim_id,
+                            created_at=now,
+                            expires_at=now + timedelta(seconds=self.ttl),
+                        )
+                    )
+                return claim_id, None
+            except IntegrityError:
+                pass
+
+            with db.engine.connect() as connection:
+                claim = connection.execute(
+                    select(IdempotencyKey.__table__).where(
+                        IdempotencyKey.idempotency_key == key
+                    )
+                ).first()
+            if claim is None:
+                # released in the meantime
+                continue
+            lost = (
+                claim.response_status is None
+                and claim.order_id is None
+                and claim.created_at <= now - timedelta(seconds=self.lock_timeout)
+            )
+            if claim.expires_at <= now or lost:
+                statement = delete(IdempotencyKey).where(
+                    IdempotencyKey.idempotency_key == key,
+                    IdempotencyKey.claim_id == claim.claim_id,
+                )
+                if lost:
+                    # unless its request created its order in the meantime
+                    statement = statement.where(IdempotencyKey.order_id.is_(None))
+                with db.engine.begin() as connection:
+                    connection.execute(statement)
+                continue
+            if claim.request_hash != request_hash:
+                raise IdempotencyKeyReused
+            if claim.response_status is not None:
+                stored = (
+                    claim.response_status,
+                    json.loads(claim.response_headers),
+                    claim.response_body,
+                )
+                self.cache.set(key, (request_hash, stored))
+                return None, stored
+            if claim.order_id is not None:
+                # the order was created, but its response not stored (yet)
+                return None, recover(claim.order_id)
+
+            # the first request is still running in another process
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RequestInProgress
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 1.0)
+
+    def _complete(
+        self, key: str, claim_id: str, request_hash: str, response: StoredResponse
+    ) -> None:
+        status, headers, body = response
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.idempotency_key == key)
+                .where(IdempotencyKey.claim_id == claim_id)
+                .values(
+                    response_status=status,
+                    response_headers=json.dumps(headers),
+                    response_body=body,
+                )
+            )
+        self.cache.set(key, (request_hash, response))
+
+    def _release(self, key: str, claim_id: str) -> None:
+        with db.engine.begin() as connection:
+            connection.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.idempotency_key == key)
+                .where(IdempotencyKey.claim_id == claim_id)
+                .where(IdempotencyKey.order_id.is_(None))
+                .where(IdempotencyKey.response_status.is_(None))
+            )
+
+    def run(
+        self,
+        key: str,
+        request_hash: str,
+        handler: Callable[[], StoredResponse],
+        recover: Callable[[int], StoredResponse],
+    ) -> tuple[StoredResponse, bool]:
+        """Returns the response stored for a key, or runs `handler` and stores the
+        response it returns if it is a success. Also returns whether the response
+        was replayed. `recover` rebuilds the response to a request that created
+        an order but died before its response was stored.
+
+        Raises IdempotencyKeyReused if the key was sent with another request, and
+        RequestInProgress if the first request with the key outlasts the wait."""
+        deadline = time.monotonic() + self.wait
+        while True:
+            stored = self._cached(key, request_hash)
+            if stored is not None:
+                return stored, True
+            with self._lock:
+                event = self._running.get(key)
+                if event is None:
+                    event = self._running[key] = threading.Event()
+                    break
+            if not event.wait(max(deadline - time.monotonic(), 0)):
+                raise RequestInProgress
+
+        try:
+            claim_id, stored = self._claim(key, request_hash, deadline, recover)
+            if stored is not None:
+                return stored, True
+            db.session.info["idempotency_claim"] = (key, claim_id)
+            try:
+                response = handler()
+            except BaseException:
+                self._release(key, claim_id)
+                raise
+            finally:
+                db.session.info.pop("idempotency_claim", None)
+            if 200 <= response[0] < 300:
+                self._complete(key, claim_id, request_hash, response)
+            else:
+                self._release(key, claim_id)
+            return response, False
+        finally:
+            with self._lock:
+                del self._running[key]
+            event.set()
+
+    def purge(self) -> int:
+        """Deletes the expired keys, returning how many were deleted."""
+        with db.engine.begin() as connection:
+            return connection.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.expires_at <= utcnow())
+            ).rowcount
+
+
+idempotency_store = IdempotencyStore()
@@ -1,11 +1,65 @@
-from typing import Optional as optional
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Iterable, Iterator, Optional as optional
 
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.inspection import inspect
+from sqlalchemy.sql import ClauseElement
 
 from .. import db
-from ..errors import ResturantException, EntityNotFound
-
-from .models import Food, Addon, Customer, Order, CustomerOrder, OrderItem, ItemMod
+from ..errors import ResturantException, EntityNotFound, RequestInProgress
+
+from .cache import menu_cache
+from .search import menu_index
+from .events import order_events
+from .idempotency import bind_claim
+from .rollup import (
+    Sales,
+    add_to_rollup,
+    order_sales_query,
+    rollup_rows,
+    sales_change,
+    sales_of,
+)
+from .models import (
+    Food,
+    Addon,
+    Customer,
+    Order,
+    CustomerOrder,
+    OrderItem,
+    ItemMod,
+    SalesRollup,
+    Versioned,
+)
+
+
+def order_change(order_id, delta=0):
+    """Builds the UPDATE marking an order as changed, and adding `delta` to its
+    maintained total.
+
+    `order_id` and `delta` may be literal values or SQL expressions. Orders whose
+    total is not maintained (NULL) keep a NULL total."""
+    values = Order.bump()
+    if isinstance(delta, ClauseElement) or Decimal(str(delta)):
+        if not isinstance(delta, ClauseElement):
+            delta = Decimal(str(delta))
+        values[Order.order_total] = Order.order_total + delta
+    return (
+        update(Order)
+        .where(Order.order_id == order_id)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def order_of_item(order_item_id: int):
+    """Builds a scalar subquery resolving the order a given order item belongs to."""
+    return (
+        select(OrderItem.order_id)
+        .where(OrderItem.order_item_id == order_item_id)
+        .scalar_subquery()
+    )
 
 
 class ManageResturantData:
@@ -14,6 +68,196 @@ class ManageResturantData:
     def __init__(self) -> None:
         self.food_size_required = ["pizza"]
 
+    @contextmanager
+    def unit_of_work(self) -> Iterator["ManageResturantData"]:
+        """Groups every change made inside the block into a single transaction.
+
+        Rows are only flushed while the block runs, so generated IDs are available
+        straight away, and everything is committed once when the outermost block
+        exits. Any exception rolls the whole transaction back."""
+        # The depth lives on the session, which is scoped to the current request,
+        # because managers are shared between threads.
+        info = db.session.info
+        depth = info.get("unit_of_work", 0)
+        info["unit_of_work"] = depth + 1
+        try:
+            yield self
+        except BaseException:
+            info["unit_of_work"] = depth
+            if not depth:
+                ManageResturantData._rollback_session()
+            raise
+        info["unit_of_work"] = depth
+        if not depth:
+            self._commit_session()
+
+    @staticmethod
+    def _rollback_session() -> None:
+        """Rolls the session back, dropping the changes queued on it."""
+        db.session.rollback()
+        db.session.info.pop("menu_changes", None)
+        db.session.info.pop("sales_changes", None)
+        db.session.info.pop("order_changes", None)
+
+    @staticmethod
+    def _commit_session() -> None:
+        """Commits the session along with the sales queued on it, then applies the
+        menu changes queued on it to the menu cache and the search index, and
+        publishes the order changes queued on it.
+
+        An order created under an idempotency key is recorded on its claim in the
+        same transaction."""
+        created = [
+            order_id
+            for order_id, (kind, _) in db.session.info.get("order_changes", {}).items()
+            if kind == "created"
+        ]
+        try:
+            bind_claim(created)
+        except RequestInProgress:
+            ManageResturantData._rollback_session()
+            raise
+
+        sales = db.session.info.pop("sales_changes", None)
+        if sales:
+            dialect = db.session.get_bind().dialect.name
+            db.session.execute(add_to_rollup(dialect), rollup_rows(sales))
+
+        changes = []
+        queued = db.session.info.pop("menu_changes", ())
+        if queued:
+            # new menu items get their IDs, and are captured for the index before
+            # the commit expires them
+            db.session.flush()
+            for model, entity_id, entity in queued:
+                document = None if entity is None else menu_index.document(entity)
+                if document is not None:
+                    entity_id = document["id"]
+                changes.append((model, entity_id, document))
+        db.session.commit()
+        for model, entity_id, document in changes:
+            menu_cache.evict(model, entity_id)
+            if document is None:
+                menu_index.remove(model, entity_id)
+            else:
+                menu_index.add(document)
+        for order_id, (kind, order) in db.session.info.pop("order_changes", {}).items():
+            order_events.publish(kind, order_id, order)
+
+    @contextmanager
+    def tracking_sales(self, order_id: int) -> Iterator["ManageResturantData"]:
+        """Runs the block in a unit of work, rolling whatever it changes about the
+        sales of an order (its items, type or payment method, or the order as a
+        whole) into the sales rollup in the same transaction."""
+        with self.unit_of_work():
+            # concurrent changes to the order wait, as they would otherwise both
+            # record the change from the same sales
+            db.session.execute(
+                select(Order.order_id)
+                .where(Order.order_id == order_id)
+                .with_for_update()
+            )
+            before = self.order_sales(order_id)
+            yield self
+            self.record_sales(before, self.order_sales(order_id))
+
+    @staticmethod
+    def order_sales(order_id: int) -> Sales:
+        """Returns the sales of an order, by rollup key."""
+        return sales_of(
+            db.session.execute(order_sales_query(Order.order_id == order_id))
+        )
+
+    @staticmethod
+    def record_sales(before: Sales, after: Sales) -> None:
+        """Queues the change from the sales `before` to the sales `after` to be
+        added to the sales rollup when the session is committed."""
+        queued = db.session.info.setdefault("sales_changes", {})
+        for key, (items, amount) in sales_change(before, after).items():
+            entry = queued.setdefault(key, [0, 0])
+            entry[0] += items
+            entry[1] += amount
+
+    @staticmethod
+    def order_changed(kind: str, order_id: int, order: optional[dict] = None) -> None:
+        """Queues a change to an order ("created", "updated" or "deleted") to be
+        published once the session is committed, with the order as it will be
+        committed if it is known.
+
+        Several changes to an order in a transaction are published as one, without
+        the order unless the last change gave it."""
+        queued = db.session.info.setdefault("order_changes", {})
+        if kind != "deleted" and queued.get(order_id, ("",))[0] == "created":
+            kind = "created"
+        queued[order_id] = (kind, order)
+
+    @staticmethod
+    def _commit() -> None:
+        """Commits the session, or only flushes it inside a unit of work."""
+        if db.session.info.get("unit_of_work"):
+            db.session.flush()
+        else:
+            ManageResturantData._commit_session()
+
+    @staticmethod
+    def _bulk_insert(model, rows: list[dict]) -> list:
+        """Inserts rows with one executemany-style INSERT, returning their entities
+        in the order of `rows`.
+
+        Dialects that can't return generated keys in parameter order (MySQL) fall
+        back to a regular flush of the new entities."""
+        if not rows:
+            return []
+        dialect = db.session.get_bind().dialect
+        if dialect.insert_executemany_returning_sort_by_parameter_order:
+            return db.session.scalars(
+                insert(model).returning(model, sort_by_parameter_order=True), rows
+            ).all()
+        entities = [model(**row) for row in rows]
+        db.session.add_all(entities)
+        db.session.flush()
+        return entities
+
+    @staticmethod
+    def _menu_changed(model, entity_id: optional[int] = None, entity=None) -> None:
+        """Queues a changed menu row to be dropped from the cache and re-indexed
+        for search once the change to it is committed. Removed rows are passed
+        without their entity, and are dropped from the index."""
+        db.session.info.setdefault("menu_changes", []).append(
+            (model, entity_id, entity)
+        )
+
+    @staticmethod
+    def _update_entity(model, entity_id: int, values: dict, missing: str):
+        """Applies `values` to one row with a single UPDATE, and returns the row.
+
+        The updated row comes back through RETURNING where the dialect supports
+        it, and is otherwise loaded by primary key. Raises EntityNotFound with the
+        `missing` message if no row has that ID."""
+        key = inspect(model).primary_key[0]
+        if issubclass(model, Versioned):
+            values = {**values, **model.bump()}
+        statement = update(model).where(key == entity_id).values(values)
+        if db.session.get_bind().dialect.update_returning:
+            entity = db.session.scalars(statement.returning(model)).first()
+        elif db.session.execute(statement).rowcount:
+            entity = db.session.get(model, entity_id, populate_existing=True)
+        else:
+            entity = None
+        if entity is None:
+            raise EntityNotFound(missing)
+        return entity
+
+    @staticmethod
+    def _touch_order(order_id, delta=0) -> None:
+        """Marks an order as changed, adding `delta` to its maintained total."""
+        db.session.execute(order_change(order_id, delta))
+
+    @staticmethod
+    def _order_of_item(order_item_id: int):
+        """Returns a scalar subquery resolving the order a given order item belongs to."""
+        return order_of_item(order_item_id)
+
     def new_food_item(
         self,
         food_name: str,
@@ -33,15 +277,30 @@ class ManageResturantData:
             food_size=food_size,
         )
         db.session.add(food_details)
-        db.session.commit()
+        self._menu_changed(Food, entity=food_details)
+        self._commit()
         return food_details
 
-    def update_food(self, food_id: int, **kwargs) -> int:
-        """Updates the value of an attribute of a given food item."""
-        entity = Food.query.filter(Food.food_id == food_id).first()
-        if not entity:
-            raise EntityNotFound("The food item does not exist in the database.")
+    def new_food_items(self, foods: list[dict]) -> list[Food]:
+        """Adds several food items to the menu in one batched insert.
+
+        Each dict holds the keyword arguments of `new_food_item`."""
+        if any(
+            food.get("food_category") in self.food_size_required
+            and not food.get("food_size")
+            for food in foods
+        ):
+            raise ResturantException("A size is required for this food type.")
+
+        food_details = self._bulk_insert(Food, foods)
+        for entity in food_details:
+            self._menu_changed(Food, entity=entity)
+        self._commit()
+        return food_details
 
+    def update_food(self, food_id: int, **kwargs) -> Food:
+        """Updates the given attributes of a food item with a single statement,
+        returning the updated food item."""
         required = [
             column.name for column in inspect(Food).c if not column.name.endswith("_id")
         ]
@@ -62,11 +321,12 @@ class ManageResturantData:
             if kwargs.get(req):
                 update_dict[getattr(Food, req)] = kwargs.get(req)
 
-        update = Food.query.filter(Food.food_id == food_id).update(
-            update_dict, synchronize_session=False
+        entity = self._update_entity(
+            Food, food_id, update_dict, "The food item does not exist in the database."
         )
-        db.session.commit()
-        return update
+        self._menu_changed(Food, food_id, entity)
+        self._commit()
+        return entity
 
     def remove_food(self, food_id: int) -> None:
         """Removes a food item from the menu."""
@@ -74,7 +334,8 @@ class ManageResturantData:
         if not entity:
             raise EntityNotFound("The food item does not exist in the database.")
         db.session.delete(entity)
-        db.session.commit()
+        self._menu_changed(Food, food_id)
+        self._commit()
         return
 
     def new_addon_item(
@@ -97,15 +358,30 @@ class ManageResturantData:
             addon_size=addon_size,
         )
         db.session.add(addon_details)
-        db.session.commit()
+        self._menu_changed(Addon, entity=addon_details)
+        self._commit()
         return addon_details
 
-    def update_addon(self, addon_id: int, **kwargs) -> int:
-        """Updates the value of an attribute of a given addon."""
-        entity = Addon.query.filter(Addon.addon_id == addon_id).first()
-        if not entity:
-            raise EntityNotFound("The addon item does not exist in the database.")
+    def new_addon_items(self, addons: list[dict]) -> list[Addon]:
+        """Adds several addon items to the menu in one batched insert.
+
+        Each dict holds the keyword arguments of `new_addon_item`."""
+        if any(
+            addon.get("addon_type") in self.food_size_required
+            and not addon.get("addon_size")
+            for addon in addons
+        ):
+            raise ResturantException("A size is required for this addon type.")
+
+        addon_details = self._bulk_insert(Addon, addons)
+        for entity in addon_details:
+            self._menu_changed(Addon, entity=entity)
+        self._commit()
+        return addon_details
 
+    def update_addon(self, addon_id: int, **kwargs) -> Addon:
+        """Updates the given attributes of an addon with a single statement,
+        returning the updated addon."""
         required = [
             column.name
             for column in inspect(Addon).c
@@ -128,12 +404,15 @@ class ManageResturantData:
             if kwargs.get(req):
                 update_dict[getattr(Addon, req)] = kwargs.get(req)
 
-        update = Addon.query.filter(Addon.addon_id == addon_id).update(
-            update_dict, synchronize_session=False
+        entity = self._update_entity(
+            Addon,
+            addon_id,
+            update_dict,
+            "The addon item does not exist in the database.",
         )
-
-        db.session.commit()
-        return update
+        self._menu_changed(Addon, addon_id, entity)
+        self._commit()
+        return entity
 
     def remove_addon(self, addon_id: int) -> None:
         """Removes an addon item from the menu."""
@@ -141,7 +420,8 @@ class ManageResturantData:
         if not entity:
             raise EntityNotFound("The addon item does not exist in the database.")
         db.session.delete(entity)
-        db.session.commit()
+        self._menu_changed(Addon, addon_id)
+        self._commit()
         return
 
     def new_customer(
@@ -161,17 +441,31 @@ class ManageResturantData:
             customer_city=customer_city,
             customer_province=customer_province,
             customer_postal_code=customer_postal_code,
+            **Customer.search_keys(
+                {
+                    "customer_name": customer_name,
+                    "customer_phone_number": customer_phone_number,
+                }
+            ),
         )
         db.session.add(customer_details)
-        db.session.commit()
+        self._commit()
         return customer_details
 
-    def update_customer(self, customer_id: int, **kwargs) -> int:
-        """Updates the value of an attribute of a given customer."""
-        entity = Customer.query.filter(Customer.customer_id == customer_id).first()
-        if not entity:
-            raise EntityNotFound("The customer does not exist in the database.")
+    def new_customers(self, customers: list[dict]) -> list[Customer]:
+        """Adds several customers to the database in one batched insert.
+
+        Each dict holds the keyword arguments of `new_customer`."""
+        customer_details = self._bulk_insert(
+            Customer,
+            [{**customer, **Customer.search_keys(customer)} for customer in customers],
+        )
+        self._commit()
+        return customer_details
 
+    def update_customer(self, customer_id: int, **kwargs) -> Customer:
+        """Updates the given attributes of a customer with a single statement,
+        returning the updated customer."""
         required = [
             column.name
             for column in inspect(Customer).c
@@ -187,12 +481,50 @@ class ManageResturantData:
         for req in required:
             if kwargs.get(req):
                 update_dict[getattr(Customer, req)] = kwargs.get(req)
-
-        update = Customer.query.filter(Customer.customer_id == customer_id).update(
-            update_dict, synchronize_session=False
+        for key, value in Customer.search_keys(kwargs).items():
+            update_dict[getattr(Customer, key)] = value
+
+        entity = self._update_entity(
+            Customer,
+            customer_id,
+            update_dict,
+            "The customer does not exist in the database.",
         )
-        db.session.commit()
-        return update
+        self._commit()
+        return entity
+
+    def fill_customer_search_keys(self, batch_size: int = 5000) -> int:
+        """Fills the normalized search columns of customers that lack them, one
+        batch per transaction. Returns the number of customers filled."""
+        count = 0
+        while True:
+            customers = db.session.execute(
+                select(
+                    Customer.customer_id,
+                    Customer.customer_name,
+                    Customer.customer_phone_number,
+                )
+                .where(
+                    (Customer.customer_phone_digits == None)  # noqa: E711
+                    | (Customer.customer_name_lower == None)  # noqa: E711
+                )
+                .order_by(Customer.customer_id)
+                .limit(batch_size)
+            ).all()
+            if not customers:
+                return count
+            db.session.execute(
+                update(Customer),
+                [
+                    {
+                        "customer_id": customer.customer_id,
+                        **Customer.search_keys(customer._asdict()),
+                    }
+                    for customer in customers
+                ],
+            )
+            self._commit()
+            count += len(customers)
 
     def remove_customer(self, customer_id: int) -> None:
         """Removes a customer from the database."""
@@ -200,9 +532,39 @@ class ManageResturantData:
         if not entity:
             raise EntityNotFound("The customer does not exist in the database.")
         db.session.delete(entity)
-        db.session.commit()
+        self._commit()
         return
 
+    def fill_order_item_categories(self) -> int:
+        """Records the current category of their food on the order items that
+        lack one, so that their sales stay under it when the food is moved to
+        another category. Returns the number of order items filled."""
+        filled = db.session.execute(
+            update(OrderItem)
+            .where(OrderItem.order_item_category == None)  # noqa: E711
+            .values(
+                order_item_category=select(Food.food_category)
+                .where(Food.food_id == OrderItem.food_id)
+                .scalar_subquery()
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self._commit()
+        return filled
+
+    def rebuild_sales_rollup(self, batch_size: int = 5000) -> int:
+        """Rolls every order up anew, replacing the sales rollup in one transaction.
+        Returns the number of rollup rows written."""
+        rows = db.session.execute(
+            order_sales_query().execution_options(yield_per=batch_size)
+        )
+        rollup = rollup_rows(sales_of(rows))
+        db.session.execute(delete(SalesRollup))
+        for start in range(0, len(rollup), batch_size):
+            db.session.execute(insert(SalesRollup), rollup[start : start + batch_size])
+        self._commit()
+        return len(rollup)
+
     def new_order(
         self, order_date, order_payment_method: str, order_type: str
     ) -> Order:
@@ -211,17 +573,15 @@ class ManageResturantData:
             order_date=order_date,
             order_payment_method=order_payment_method,
             order_type=order_type,
+            order_total=0,
         )
         db.session.add(order_details)
-        db.session.commit()
+        self._commit()
         return order_details
 
-    def update_order(self, order_id: int, **kwargs) -> int:
-        """Updates the value of an attribute of a given order."""
-        entity = Order.query.filter(Order.order_id == order_id).first()
-        if not entity:
-            raise EntityNotFound("The order does not exist in the database.")
-
+    def update_order(self, order_id: int, **kwargs) -> Order:
+        """Updates the given attributes of an order with a single statement,
+        returning the updated order."""
         required = [
             column.name
             for column in inspect(Order).c
@@ -238,11 +598,11 @@ class ManageResturantData:
             if kwargs.get(req):
                 update_dict[getattr(Order, req)] = kwargs.get(req)
 
-        update = Order.query.filter(Order.order_id == order_id).update(
-            update_dict, synchronize_session=False
+        entity = self._update_entity(
+            Order, order_id, update_dict, "The order does not exist in the database."
         )
-        db.session.commit()
-        return update
+        self._commit()
+        return entity
 
     def remove_order(self, order_id: int) -> None:
         """Removes an order from the database."""
@@ -250,16 +610,47 @@ class ManageResturantData:
         if not entity:
             raise EntityNotFound("The order does not exist in the database.")
         db.session.delete(entity)
-        db.session.commit()
+        self._commit()
         return
 
+    def remove_orders(self, order_ids: Iterable[int], batch_size: int = 500) -> int:
+        """Removes orders along with their items, item modifications and customer
+        links, and takes their sales out of the sales rollup.
+
+        Each batch of orders is removed with one DELETE per table, rather than
+        row by row. Returns the number of orders removed."""
+        order_ids = list(order_ids)
+        removed = 0
+        for start in range(0, len(order_ids), batch_size):
+            batch = order_ids[start : start + batch_size]
+            sales = db.session.execute(order_sales_query(Order.order_id.in_(batch)))
+            self.record_sales(sales_of(sales), {})
+
+            items = select(OrderItem.order_item_id).where(OrderItem.order_id.in_(batch))
+            # the rows referring to the orders go first, for the foreign keys
+            for statement in (
+                delete(ItemMod).where(ItemMod.order_item_id.in_(items)),
+                delete(OrderItem).where(OrderItem.order_id.in_(batch)),
+                delete(CustomerOrder).where(CustomerOrder.order_id.in_(batch)),
+            ):
+                db.session.execute(
+                    statement.execution_options(synchronize_session=False)
+                )
+            removed += db.session.execute(
+                delete(Order)
+                .where(Order.order_id.in_(batch))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        self._commit()
+        return removed
+
     def new_customer_order(self, customer_id: int, order_id: int) -> CustomerOrder:
         """Adds customer order details to the database."""
         customer_order_details = CustomerOrder(
             customer_id=customer_id, order_id=order_id
         )
         db.session.add(customer_order_details)
-        db.session.commit()
+        self._commit()
         return customer_order_details
 
     def remove_customer_order(self, customer_id: int, order_id: int) -> None:
@@ -272,9 +663,23 @@ class ManageResturantData:
         if not entity:
             raise EntityNotFound("The customer order does not exist in the database.")
         db.session.delete(entity)
-        db.session.commit()
+        self._touch_order(order_id)
+        self._commit()
         return
 
+    def update_customer_order(self, order_id: int, customer_id: int) -> None:
+        """Moves an order to another customer, linking it if it had no customer."""
+        moved = db.session.execute(
+            update(CustomerOrder)
+            .where(CustomerOrder.order_id == order_id)
+            .values(customer_id=customer_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not moved:
+            db.session.add(CustomerOrder(customer_id=customer_id, order_id=order_id))
+        self._touch_order(order_id)
+        self._commit()
+
     def remove_customer_orders(self, customer_id: int) -> None:
         """Removes all customer orders for a given customer."""
         entities = CustomerOrder.query.filter(
@@ -284,18 +689,27 @@ class ManageResturantData:
             raise EntityNotFound("The customer does not have any orders.")
         for entity in entities:
             db.session.delete(entity)
-        db.session.commit()
+        self._commit()
         return
 
     def new_order_item(
-        self, order_id: int, food_id: int, order_item_price: float
+        self,
+        order_id: int,
+        food_id: int,
+        order_item_price: float,
+        order_item_category: optional[str] = None,
     ) -> OrderItem:
-        """Adds order item details to the database."""
+        """Adds order item details to the database, along with the category its
+        sales are filed under (the current category of its food)."""
         order_item_details = OrderItem(
-            order_id=order_id, food_id=food_id, order_item_price=order_item_price
+            order_id=order_id,
+            food_id=food_id,
+            order_item_price=order_item_price,
+            order_item_category=order_item_category,
         )
         db.session.add(order_item_details)
-        db.session.commit()
+        self._touch_order(order_id, order_item_price)
+        self._commit()
         return order_item_details
 
     def update_order_item(self, order_item_id: int, **kwargs) -> int:
@@ -322,31 +736,54 @@ class ManageResturantData:
             if kwargs.get(req):
                 update_dict[getattr(OrderItem, req)] = kwargs.get(req)
 
+        delta = 0
+        if OrderItem.order_item_price in update_dict:
+            delta = (
+                Decimal(str(update_dict[OrderItem.order_item_price]))
+                - entity.order_item_price
+            )
+        self._touch_order(entity.order_id, delta)
+
         update = OrderItem.query.filter(
             OrderItem.order_item_id == order_item_id
         ).update(update_dict, synchronize_session=False)
-        db.session.commit()
+        self._commit()
         return update
 
     def remove_order_item(self, order_item_id: int) -> None:
-        """Removes an order item from the database."""
+        """Removes an order item and its modifications from the database."""
         entity = OrderItem.query.filter(
             OrderItem.order_item_id == order_item_id
         ).first()
         if not entity:
             raise EntityNotFound("The order item does not exist in the database.")
+        mods = ItemMod.query.filter(ItemMod.order_item_id == order_item_id).all()
+        for mod in mods:
+            db.session.delete(mod)
         db.session.delete(entity)
-        db.session.commit()
+        self._touch_order(
+            entity.order_id,
+            -(entity.order_item_price + sum(mod.item_mod_price for mod in mods)),
+        )
+        self._commit()
         return
 
     def remove_order_items(self, order_id: int) -> None:
-        """Removes all order items for a given order."""
+        """Removes all order items for a given order, and their modifications."""
         entities = OrderItem.query.filter(OrderItem.order_id == order_id).all()
         if not entities:
             raise EntityNotFound("The order does not have any items.")
+        # the modifications of the items go with them, and out of the total
+        mods = ItemMod.order_item_id.in_([entity.order_item_id for entity in entities])
+        mods_price = sum(db.session.scalars(select(ItemMod.item_mod_price).where(mods)))
+        db.session.execute(delete(ItemMod).where(mods))
         for entity in entities:
             db.session.delete(entity)
-        db.session.commit()
+        self._touch_order(
+            order_id,
+            -(sum(entity.order_item_price for entity in entities) + mods_price),
+        )
+        self._commit()
 
     def new_item_mod(
         self,
@@ -363,7 +800,8 @@ class ManageResturantData:
             item_mod_price=item_mod_price,
         )
         db.session.add(item_mod_details)
-        db.session.commit()
+        self._touch_order(self._order_of_item(order_item_id), item_mod_price)
+        self._commit()
         return item_mod_details
 
     def update_item_mod(self, order_item_id: int, addon_id: int, **kwargs) -> int:
@@ -383,12 +821,23 @@ class ManageResturantData:
             if kwargs.get(req):
                 update_dict[getattr(ItemMod, req)] = kwargs.get(req)
 
+        delta = 0
+        if ItemMod.item_mod_price in update_dict:
+            old_price = (
+                select(ItemMod.item_mod_price)
+                .where(ItemMod.order_item_id == order_item_id)
+                .where(ItemMod.addon_id == addon_id)
+                .scalar_subquery()
+            )
+            delta = Decimal(str(update_dict[ItemMod.item_mod_price])) - old_price
+        self._touch_order(self._order_of_item(order_item_id), delta)
+
         update = (
             ItemMod.query.filter(ItemMod.order_item_id == order_item_id)
             .filter(ItemMod.addon_id == addon_id)
             .update(update_dict, synchronize_session=False)
         )
-        db.session.commit()
+        self._commit()
         return update
 
     def remove_item_mod(self, order_item_id: int, addon_id: int) -> None:
@@ -403,7 +852,8 @@ class ManageResturantData:
                 "The item modification does not exist in the database."
             )
         db.session.delete(entity)
-        db.session.commit()
+        self._touch_order(self._order_of_item(order_item_id), -entity.item_mod_price)
+        self._commit()
         return
 
     def remove_item_mods(self, order_item_id: int) -> None:
@@ -413,5 +863,9 @@ class ManageResturantData:
             raise EntityNotFound("The order item does not have any modifications.")
         for entity in entities:
             db.session.delete(entity)
-        db.session.commit()
+        self._touch_order(
+            self._order_of_item(order_item_id),
+            -sum(entity.item_mod_price for entity in entities),
+        )
+        self._commit()
         return
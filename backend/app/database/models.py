@@ -1,46 +1,147 @@
-from typing import Any
+from typing import Any, Callable, Optional
 from datetime import datetime, timedelta, timezone
 
 from .. import db
 
 Column = db.Column
 String = db.String
+Text = db.Text
 Integer = db.Integer
 Numeric = db.Numeric
 DateTime = db.DateTime
 ForeignKey = db.ForeignKey
+Index = db.Index
 
 Base: Any = db.Model
 
 
-class Customer(Base):
+class Serializable:
+    """Serializes rows through the `__fields__` declared by their model.
+
+    The conversion of each field is worked out from its column type once per
+    model, so the dicts built only hold JSON native values, which the response
+    encoder writes in a single pass without a fallback hook."""
+
+    __fields__: tuple[tuple[str, str], ...] = ()
+
+    @classmethod
+    def _field_converters(cls) -> tuple[tuple[str, str, Optional[Callable]], ...]:
+        """Returns the (key, attribute, converter) of each field, the converter
+        being None for values that are already JSON native."""
+        converters = cls.__dict__.get("_converters")
+        if converters is None:
+            converters = []
+            for key, attr in cls.__fields__:
+                column_type = cls.__table__.c[attr].type
+                converter = None
+                if isinstance(column_type, Numeric):
+                    converter = float
+                elif isinstance(column_type, DateTime):
+                    converter = str
+                converters.append((key, attr, converter))
+            converters = cls._converters = tuple(converters)
+        return converters
+
+    def convert_to_dict(self) -> dict:
+        data = {}
+        for key, attr, converter in self._field_converters():
+            value = getattr(self, attr)
+            if converter is not None and value is not None:
+                value = converter(value)
+            data[key] = value
+        return data
+
+
+def utcnow() -> datetime:
+    """Returns the current time in UTC, as the naive datetime the columns store."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Versioned:
+    """Rows carrying a version, bumped on every change, and the time of that change.
+
+    Together they validate cached copies of the row's resource (ETag and
+    Last-Modified), without loading or serializing anything else."""
+
+    # names of the (version, modification time) columns
+    __version__: tuple[str, str]
+
+    @classmethod
+    def bump(cls) -> dict:
+        """Returns the UPDATE values marking a row as changed."""
+        version, updated_at = cls.__version__
+        return {version: getattr(cls, version) + 1, updated_at: utcnow()}
+
+    def validators(self) -> tuple[int, Optional[datetime]]:
+        """Returns the version and the last modification time of the row."""
+        version, updated_at = self.__version__
+        return getattr(self, version), getattr(self, updated_at)
+
+
+def phone_digits(phone: Optional[str]) -> Optional[str]:
+    """Normalizes a phone number to its digits, as customers are searched by."""
+    if phone is None:
+        return None
+    return "".join(char for char in phone if char.isdigit())
+
+
+class Customer(Serializable, Versioned, Base):
     __tablename__ = "customer"
+    __table_args__ = (
+        # searches walk a prefix range of the normalized columns, in key order
+        Index("ix_customer_phone_digits", "customer_phone_digits", "customer_id"),
+        Index("ix_customer_name_lower", "customer_name_lower", "customer_id"),
+    )
     customer_id = Column(
         Integer(), primary_key=True, nullable=False, unique=True, autoincrement=True
     )
     customer_name = Column(String(45), nullable=False)
-    customer_phone_number = Column(String(12), nullable=False)
+    customer_phone_number = Column(String(12), nullable=False, index=True)
 
     customer_street = Column(String(45), nullable=True)
     customer_city = Column(String(45), nullable=True)
     customer_province = Column(String(45), nullable=True)
     customer_postal_code = Column(String(45), nullable=True)
 
-    def convert_to_dict(self) -> dict:
-        obj_dict = {
-            "id": self.customer_id,
-            "name": self.customer_name,
-            "phone_number": self.customer_phone_number,
-            "street": self.customer_street,
-            "city": self.customer_city,
-            "province": self.customer_province,
-            "postal_code": self.customer_postal_code,
-        }
-        return obj_dict
-
-
-class Order(Base):
+    # Normalized copies of the phone number and name, kept by search_keys
+    customer_phone_digits = Column(String(12), nullable=True)
+    customer_name_lower = Column(String(45), nullable=True)
+
+    customer_version = Column(Integer(), nullable=False, default=1, server_default="1")
+    customer_updated_at = Column(DateTime, nullable=True, default=utcnow)
+    __version__ = ("customer_version", "customer_updated_at")
+
+    # (key, attribute) pairs making up the serialized form of the row
+    __fields__ = (
+        ("id", "customer_id"),
+        ("name", "customer_name"),
+        ("phone_number", "customer_phone_number"),
+        ("street", "customer_street"),
+        ("city", "customer_city"),
+        ("province", "customer_province"),
+        ("postal_code", "customer_postal_code"),
+    )
+
+    @staticmethod
+    def search_keys(values: dict) -> dict:
+        """Returns the normalized columns to store alongside the given values of
+        customer_name and customer_phone_number."""
+        keys = {}
+        if values.get("customer_phone_number") is not None:
+            keys["customer_phone_digits"] = phone_digits(
+                values["customer_phone_number"]
+            )
+        if values.get("customer_name") is not None:
+            keys["customer_name_lower"] = values["customer_name"].lower()
+        return keys
+
+
+class Order(Serializable, Versioned, Base):
     __tablename__ = "order"
+    __table_args__ = (
+        # keyset pagination of orders walks (order_date, order_id)
+        Index("ix_order_order_date_order_id", "order_date", "order_id"),
+    )
     order_id = Column(
         Integer(), primary_key=True, nullable=False, unique=True, autoincrement=True
     )
@@ -49,19 +150,31 @@ class Order(Base):
     )
     order_payment_method = Column(String(45), nullable=False)
     order_type = Column(String(45), nullable=False)
+    # Running total kept current by ManageResturantData. NULL means the total
+    # is not maintained for this order, and must be aggregated instead.
+    order_total = Column(Numeric(7, 2), nullable=True)
 
-    def convert_to_dict(self) -> dict:
-        obj_dict = {
-            "id": self.order_id,
-            "date": self.order_date,
-            "payment_method": self.order_payment_method,
-            "type": self.order_type,
-        }
-        return obj_dict
+    # Bumped whenever the order, its items, their modifications or its customer
+    # change, as they all make up the order's resource
+    order_version = Column(Integer(), nullable=False, default=1, server_default="1")
+    order_updated_at = Column(DateTime, nullable=True, default=utcnow)
+    __version__ = ("order_version", "order_updated_at")
 
+    # (key, attribute) pairs making up the serialized form of the row
+    __fields__ = (
+        ("id", "order_id"),
+        ("date", "order_date"),
+        ("payment_method", "order_payment_method"),
+        ("type", "order_type"),
+    )
 
-class Food(Base):
+
+class Food(Serializable, Versioned, Base):
     __tablename__ = "food"
+    __table_args__ = (
+        # keyset pagination of the foods of a category walks (category, food_id)
+        Index("ix_food_food_category_food_id", "food_category", "food_id"),
+    )
     food_id = Column(
         Integer(), primary_key=True, nullable=False, unique=True, autoincrement=True
     )
@@ -71,19 +184,26 @@ class Food(Base):
 
     food_size = Column(String(45), nullable=True)
 
-    def convert_to_dict(self) -> dict:
-        obj_dict = {
-            "id": self.food_id,
-            "name": self.food_name,
-            "category": self.food_category,
-            "price": self.food_price,
-            "size": self.food_size,
-        }
-        return obj_dict
+    food_version = Column(Integer(), nullable=False, default=1, server_default="1")
+    food_updated_at = Column(DateTime, nullable=True, default=utcnow)
+    __version__ = ("food_version", "food_updated_at")
 
+    # (key, attribute) pairs making up the serialized form of the row
+    __fields__ = (
+        ("id", "food_id"),
+        ("name", "food_name"),
+        ("category", "food_category"),
+        ("price", "food_price"),
+        ("size", "food_size"),
+    )
 
-class Addon(Base):
+
+class Addon(Serializable, Versioned, Base):
     __tablename__ = "addon"
+    __table_args__ = (
+        # keyset pagination of the addons of a type walks (addon_type, addon_id)
+        Index("ix_addon_addon_type_addon_id", "addon_type", "addon_id"),
+    )
     addon_id = Column(
         Integer(), primary_key=True, nullable=False, unique=True, autoincrement=True
     )
@@ -93,51 +213,66 @@ class Addon(Base):
 
     addon_size = Column(String(45), nullable=True)
 
-    def convert_to_dict(self) -> dict:
-        obj_dict = {
-            "id": self.addon_id,
-            "name": self.addon_name,
-            "type": self.addon_type,
-            "price": self.addon_price,
-            "size": self.addon_size,
-        }
-        return obj_dict
+    addon_version = Column(Integer(), nullable=False, default=1, server_default="1")
+    addon_updated_at = Column(DateTime, nullable=True, default=utcnow)
+    __version__ = ("addon_version", "addon_updated_at")
+
+    # (key, attribute) pairs making up the serialized form of the row
+    __fields__ = (
+        ("id", "addon_id"),
+        ("name", "addon_name"),
+        ("type", "addon_type"),
+        ("price", "addon_price"),
+        ("size", "addon_size"),
+    )
 
 
-class CustomerOrder(Base):
+class CustomerOrder(Serializable, Base):
     __tablename__ = "customer_order"
     customer_id = Column(
         Integer(), ForeignKey("customer.customer_id"), primary_key=True, nullable=False
     )
+    # the primary key leads with customer_id, so lookups by order need their own
     order_id = Column(
-        Integer(), ForeignKey("order.order_id"), primary_key=True, nullable=False
+        Integer(),
+        ForeignKey("order.order_id"),
+        primary_key=True,
+        nullable=False,
+        index=True,
     )
 
-    def convert_to_dict(self) -> dict:
-        obj_dict = {"customer_id": self.customer_id, "order_id": self.order_id}
-        return obj_dict
+    # (key, attribute) pairs making up the serialized form of the row
+    __fields__ = (
+        ("customer_id", "customer_id"),
+        ("order_id", "order_id"),
+    )
 
 
-class OrderItem(Base):
+class OrderItem(Serializable, Base):
     __tablename__ = "order_item"
     order_item_id = Column(
         Integer(), primary_key=True, nullable=False, unique=True, autoincrement=True
     )
-    order_id = Column(Integer(), ForeignKey("order.order_id"), nullable=False)
-    food_id = Column(Integer(), ForeignKey("food.food_id"), nullable=False)
+    order_id = Column(
+        Integer(), ForeignKey("order.order_id"), nullable=False, index=True
+    )
+    food_id = Column(Integer(), ForeignKey("food.food_id"), nullable=False, index=True)
     order_item_price = Column(Numeric(5, 2), nullable=False)
+    # The category of the food when it was ordered, which the item's sales stay
+    # filed under. NULL for items from before it was recorded, filed under the
+    # current category of their food instead.
+    order_item_category = Column(String(45), nullable=True)
 
-    def convert_to_dict(self) -> dict:
-        obj_dict = {
-            "id": self.order_item_id,
-            "order_id": self.order_id,
-            "food_id": self.food_id,
-            "price": self.order_item_price,
-        }
-        return obj_dict
+    # (key, attribute) pairs making up the serialized form of the row
+    __fields__ = (
+        ("id", "order_item_id"),
+        ("order_id", "order_id"),
+        ("food_id", "food_id"),
+        ("price", "order_item_price"),
+    )
 
 
-class ItemMod(Base):
+class ItemMod(Serializable, Base):
     __tablename__ = "item_mod"
     order_item_id = Column(
         Integer(),
@@ -145,17 +280,52 @@ class ItemMod(Base):
         primary_key=True,
         nullable=False,
     )
+    # lookups by order_item_id use the primary key, which leads with it
     addon_id = Column(
-        Integer(), ForeignKey("addon.addon_id"), primary_key=True, nullable=False
+        Integer(),
+        ForeignKey("addon.addon_id"),
+        primary_key=True,
+        nullable=False,
+        index=True,
     )
     item_mod_qty = Column(Integer(), nullable=False)
     item_mod_price = Column(Numeric(5, 2), nullable=False)
 
-    def convert_to_dict(self) -> dict:
-        obj_dict = {
-            "order_item_id": self.order_item_id,
-            "addon_id": self.addon_id,
-            "qty": self.item_mod_qty,
-            "price": self.item_mod_price,
-        }
-        return obj_dict
+    # (key, attribute) pairs making up the serialized form of the row
+    __fields__ = (
+        ("order_item_id", "order_item_id"),
+        ("addon_id", "addon_id"),
+        ("qty", "item_mod_qty"),
+        ("price", "item_mod_price"),
+    )
+
+
+class SalesRollup(Base):
+    __tablename__ = "sales_rollup"
+    # "hour" or "day", and the start of that hour or day
+    rollup_grain = Column(String(4), primary_key=True)
+    rollup_start = Column(DateTime, primary_key=True)
+    food_category = Column(String(45), primary_key=True)
+    order_type = Column(String(45), primary_key=True)
+    order_payment_method = Column(String(45), primary_key=True)
+    # order items sold, and their price along with that of their modifications
+    rollup_items = Column(Integer(), nullable=False, default=0)
+    rollup_sales = Column(Numeric(12, 2), nullable=False, default=0)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_key"
+    idempotency_key = Column(String(255), primary_key=True)
+    # digest of the method, path and body of the request first sent with the key
+    request_hash = Column(String(64), nullable=False)
+    # identifies the claim, as a lost claim is replaced by a new one
+    claim_id = Column(String(32), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # the order created by the first request, written in the transaction creating
+    # it, so that a request dying before its response is stored isn't run again
+    order_id = Column(Integer(), nullable=True)
+    # the stored response, all NULL while the first request is being handled
+    response_status = Column(Integer(), nullable=True)
+    response_headers = Column(Text, nullable=True)
+    response_body = Column(Text, nullable=True)
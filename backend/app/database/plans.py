@@ -0,0 +1,141 @@
+import re
+import json
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from .manager import order_of_item
+from .models import Customer, CustomerOrder, OrderItem, ItemMod
+from .rollup import sales_report
+from .viewer import (
+    addons_page,
+    customers_search,
+    foods_page,
+    order_with_customer,
+    orders_page,
+)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN of a statement, in the dialect's machine-readable form."""
+
+    inherit_cache = False
+
+    def __init__(self, statement) -> None:
+        self.statement = statement
+
+
+def _explain(connection: Connection, statement) -> list[dict]:
+    # the rows are read off the DBAPI cursor, as the result would otherwise be
+    # typed after the columns of the explained statement
+    cursor = connection.execute(Explain(statement)).cursor
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = {
+        "sqlite": "EXPLAIN QUERY PLAN ",
+        "postgresql": "EXPLAIN (FORMAT JSON) ",
+        "mysql": "EXPLAIN ",
+        "mariadb": "EXPLAIN ",
+    }[compiler.dialect.name]
+    return prefix + compiler.process(element.statement, **kw)
+
+
+# The statements behind order lookups, menu listings, customer searches and reports,
+# with whether they walk an index in order (pagination, prefix ranges), which reads
+# a range of it rather than seeking into it
+HOT_QUERIES: dict[str, tuple[Callable, bool]] = {
+    "order with customer": (lambda: order_with_customer(1), False),
+    "items of orders": (
+        lambda: select(OrderItem).where(OrderItem.order_id.in_([1, 2])),
+        False,
+    ),
+    "modifications of items": (
+        lambda: select(ItemMod).where(ItemMod.order_item_id.in_([1, 2])),
+        False,
+    ),
+    "customer of order": (
+        lambda: select(CustomerOrder).where(CustomerOrder.order_id == 1),
+        False,
+    ),
+    "order of item": (lambda: select(order_of_item(1)), False),
+    "customer by phone": (
+        lambda: select(Customer).where(Customer.customer_phone_number == "5550000"),
+        False,
+    ),
+    "customers by phone": (lambda: customers_search(20, phone="555"), True),
+    "customers by name": (lambda: customers_search(20, name="ali"), True),
+    "orders of customer": (lambda: orders_page(None, 50, customer_id=1), False),
+    "orders page": (lambda: orders_page((datetime(2020, 1, 1), 1), 50), True),
+    "orders since": (lambda: orders_page(None, 50, since=datetime(2020, 1, 1)), True),
+    "foods of category": (lambda: foods_page(None, 50, category="pizza"), False),
+    "addons of type": (lambda: addons_page(None, 50, addon_type="topping"), False),
+    "daily sales": (
+        lambda: sales_report("day", since=datetime(2020, 1, 1), by=("category",)),
+        True,
+    ),
+}
+
+
+def _sqlite_scans(connection: Connection, statement, ordered: bool) -> list[str]:
+    scans = []
+    for row in _explain(connection, statement):
+        detail = row["detail"]
+        match = re.match(r"SCAN (\S+)", detail)
+        if not match or detail.startswith("SCAN CONSTANT ROW"):
+            continue
+        # an ordered walk of an index is expected when paginating
+        if ordered and "USING" in detail and "INDEX" in detail:
+            continue
+        scans.append(match.group(1))
+    return scans
+
+
+def _postgresql_scans(connection: Connection, statement, ordered: bool) -> list[str]:
+    # tiny tables are scanned sequentially whatever their indexes, so scans
+    # are only taken when no index can serve the query at all
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = next(iter(_explain(connection, statement)[0].values()))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            scans.append(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+def _mysql_scans(connection: Connection, statement, ordered: bool) -> list[str]:
+    scans = []
+    for row in _explain(connection, statement):
+        # ALL is a full table scan, while index is a full scan of an index
+        if row["type"] == "ALL" or (row["type"] == "index" and not ordered):
+            scans.append(row["table"])
+    return scans
+
+
+def table_scans(engine: Engine) -> dict[str, list[str]]:
+    """Explains every hot query, returning the tables each one scans in full."""
+    explain = {
+        "sqlite": _sqlite_scans,
+        "postgresql": _postgresql_scans,
+        "mysql": _mysql_scans,
+        "mariadb": _mysql_scans,
+    }[engine.dialect.name]
+
+    scans = {}
+    for name, (statement, ordered) in HOT_QUERIES.items():
+        # each query is explained in its own transaction, which is rolled back
+        with engine.connect() as connection:
+            scans[name] = explain(connection, statement(), ordered)
+    return scans
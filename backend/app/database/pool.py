@@ -0,0 +1,53 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+
+def set_statement_timeout(engine: Engine, timeout: int) -> None:
+    """Limits how long each statement may run on every new connection, in ms.
+
+    Only MySQL and PostgreSQL support this. A timeout of 0 leaves it unlimited."""
+    if not timeout:
+        return
+    if engine.dialect.name == "postgresql":
+        statement = f"SET statement_timeout = {int(timeout)}"
+    elif engine.dialect.name in ("mysql", "mariadb"):
+        # only applies to read-only SELECT statements
+        statement = f"SET SESSION max_execution_time = {int(timeout)}"
+    else:
+        return
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+        # psycopg opens a transaction for the SET, which must not linger
+        if engine.dialect.name == "postgresql":
+            dbapi_connection.commit()
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Returns the occupancy of the connection pool of an engine."""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if not isinstance(pool, QueuePool):
+        return stats
+
+    # Threads blocked in checkout wait on the pool queue's condition; the count is
+    # read from it since SQLAlchemy doesn't expose it.
+    waiters = getattr(getattr(pool._pool, "not_empty", None), "_waiters", None)
+    stats.update(
+        {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "waiters": len(waiters) if waiters is not None else None,
+        }
+    )
+    return stats
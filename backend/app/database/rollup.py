@@ -0,0 +1,159 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Optional as optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.inspection import inspect
+
+from .models import Food, Order, OrderItem, ItemMod, SalesRollup
+
+# (hour, food category, order type, payment method) -> [items, sales]
+Sales = dict[tuple[datetime, str, str, str], list]
+
+GRAINS = ("hour", "day")
+
+DIMENSIONS = {
+    "category": SalesRollup.food_category,
+    "order_type": SalesRollup.order_type,
+    "payment_method": SalesRollup.order_payment_method,
+}
+
+
+def sale_key(order, food_category: str) -> tuple[datetime, str, str, str]:
+    """Returns the key an order's items of a food category are rolled up under."""
+    hour = order.order_date.replace(minute=0, second=0, microsecond=0)
+    return hour, food_category, order.order_type, order.order_payment_method
+
+
+def add_sale(sales: Sales, key: tuple, items: int, amount) -> None:
+    """Adds items sold, and the amount they were sold for, to `sales`."""
+    entry = sales.setdefault(key, [0, Decimal(0)])
+    entry[0] += items
+    entry[1] += Decimal(str(amount))
+
+
+def sales_change(before: Sales, after: Sales) -> Sales:
+    """Returns what turns the sales `before` into the sales `after`."""
+    change: Sales = {}
+    for key in before.keys() | after.keys():
+        items, amount = after.get(key, (0, Decimal(0)))
+        old_items, old_amount = before.get(key, (0, Decimal(0)))
+        if items != old_items or amount != old_amount:
+            change[key] = [items - old_items, amount - old_amount]
+    return change
+
+
+def order_sales_query(*criteria):
+    """Builds the query of the sales of the orders matching `criteria`, grouped by
+    their rollup key, though down to the order date rather than its hour."""
+    mods = (
+        select(func.coalesce(func.sum(ItemMod.item_mod_price), 0))
+        .where(ItemMod.order_item_id == OrderItem.order_item_id)
+        .scalar_subquery()
+    )
+    # items are filed under the category their food had when they were ordered
+    category = func.coalesce(OrderItem.order_item_category, Food.food_category)
+    key = (
+        Order.order_date,
+        category,
+        Order.order_type,
+        Order.order_payment_method,
+    )
+    return (
+        select(
+            *key,
+            func.count(OrderItem.order_item_id),
+            func.sum(OrderItem.order_item_price + mods),
+        )
+        .join(OrderItem, OrderItem.order_id == Order.order_id)
+        .join(Food, Food.food_id == OrderItem.food_id)
+        .where(Order.order_date.is_not(None), *criteria)
+        .group_by(*key)
+    )
+
+
+def sales_of(rows: Iterable) -> Sales:
+    """Rolls the rows of `order_sales_query` up by hour."""
+    sales: Sales = {}
+    for order_date, food_category, order_type, payment_method, items, amount in rows:
+        hour = order_date.replace(minute=0, second=0, microsecond=0)
+        add_sale(
+            sales, (hour, food_category, order_type, payment_method), items, amount
+        )
+    return sales
+
+
+def rollup_rows(sales: Sales) -> list[dict]:
+    """Returns the rollup rows of `sales`, for every grain."""
+    rows: dict[tuple, dict] = {}
+    for (hour, food_category, order_type, payment_method), (
+        items,
+        amount,
+    ) in sales.items():
+        for grain, start in zip(GRAINS, (hour, hour.replace(hour=0))):
+            key = (grain, start, food_category, order_type, payment_method)
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = {
+                    "rollup_grain": grain,
+                    "rollup_start": start,
+                    "food_category": food_category,
+                    "order_type": order_type,
+                    "order_payment_method": payment_method,
+                    "rollup_items": 0,
+                    "rollup_sales": Decimal(0),
+                }
+            row["rollup_items"] += items
+            row["rollup_sales"] += amount
+    return list(rows.values())
+
+
+def add_to_rollup(dialect: str):
+    """Builds the executemany-style upsert adding rollup rows to those in place."""
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(SalesRollup)
+        return statement.on_duplicate_key_update(
+            rollup_items=SalesRollup.rollup_items + statement.inserted.rollup_items,
+            rollup_sales=SalesRollup.rollup_sales + statement.inserted.rollup_sales,
+        )
+    statement = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}[dialect](
+        SalesRollup
+    )
+    return statement.on_conflict_do_update(
+        index_elements=inspect(SalesRollup).primary_key,
+        set_={
+            "rollup_items": SalesRollup.rollup_items + statement.excluded.rollup_items,
+            "rollup_sales": SalesRollup.rollup_sales + statement.excluded.rollup_sales,
+        },
+    )
+
+
+def sales_report(
+    grain: str,
+    since: optional[datetime] = None,
+    until: optional[datetime] = None,
+    by: tuple[str, ...] = (),
+    **filters: optional[str],
+):
+    """Builds the query of the sales per hour or day between `since` and `until`,
+    broken down by the `by` dimensions and filtered by dimension."""
+    group = (SalesRollup.rollup_start, *(DIMENSIONS[name] for name in by))
+    query = select(
+        *group,
+        func.sum(SalesRollup.rollup_items),
+        func.sum(SalesRollup.rollup_sales),
+    ).where(SalesRollup.rollup_grain == grain)
+    if since is not None:
+        query = query.where(SalesRollup.rollup_start >= since)
+    if until is not None:
+        query = query.where(SalesRollup.rollup_start < until)
+    for name, value in filters.items():
+        if value is not None:
+            query = query.where(DIMENSIONS[name] == value)
+    # moved and deleted orders leave emptied rows behind
+    return (
+        query.group_by(*group)
+        .having(func.sum(SalesRollup.rollup_items) != 0)
+        .order_by(*group)
+    )
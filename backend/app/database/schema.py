@@ -0,0 +1,59 @@
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable, MetaData
+
+
+def pending_migrations(engine: Engine, metadata: MetaData) -> list[str]:
+    """Returns the DDL bringing an existing database up to the models.
+
+    Only additive changes are made: missing tables, columns and indexes. New
+    columns must be nullable or carry a server default, so existing rows are
+    valid without a rewrite."""
+    inspector = inspect(engine)
+    dialect = engine.dialect
+    preparer = dialect.identifier_preparer
+    tables = set(inspector.get_table_names())
+
+    statements = []
+    for table in metadata.sorted_tables:
+        if table.name not in tables:
+            statements.append(str(CreateTable(table).compile(dialect=dialect)).strip())
+            statements.extend(
+                str(CreateIndex(index).compile(dialect=dialect))
+                for index in sorted(table.indexes, key=lambda index: index.name)
+            )
+            continue
+
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise ValueError(
+                    f"The column {table.name}.{column.name} can't be added to "
+                    "existing rows, as it is NOT NULL without a server default."
+                )
+            statements.append(
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                f"{CreateColumn(column).compile(dialect=dialect)}"
+            )
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        statements.extend(
+            str(CreateIndex(index).compile(dialect=dialect))
+            for index in sorted(table.indexes, key=lambda index: index.name)
+            if index.name not in indexes
+        )
+    return statements
+
+
+def migrate(engine: Engine, metadata: MetaData) -> list[str]:
+    """Applies the pending migrations in one transaction, returning their DDL.
+
+    MySQL commits each DDL statement on its own, so a failure there leaves the
+    statements before it applied; running the migration again resumes it."""
+    statements = pending_migrations(engine, metadata)
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+    return statements
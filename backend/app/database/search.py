@@ -0,0 +1,231 @@
+import re
+import time
+import threading
+from typing import Optional as optional
+
+from sqlalchemy import select
+
+from .. import db
+
+from .models import Food, Addon
+
+# Longest prefix indexed per token; longer query tokens are checked against the
+# tokens this prefix leads to
+MAX_PREFIX = 16
+# Least trigram similarity for a query token to match a token it isn't a prefix of
+FUZZY_THRESHOLD = 0.35
+
+
+def tokenize(text: optional[str]) -> list[str]:
+    """Splits text into lowercase words."""
+    return re.findall(r"\w+", text.lower()) if text else []
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+class MenuIndex:
+    """An in-memory type-ahead index over the names and categories of the menu.
+
+    Every word of a menu item's fields is indexed by each of its prefixes, for
+    type-ahead, and by its trigrams, so misspelled words still match. The index is
+    loaded from the database on first use, kept current by ManageResturantData as
+    menu items change, and reloaded every `refresh` seconds to pick up the writes
+    of other processes."""
+
+    # kind of each model, and the attributes indexed with the weight of their words
+    FIELDS = {
+        Food: ("food", (("food_name", 2.0), ("food_category", 1.0))),
+        Addon: ("addon", (("addon_name", 2.0), ("addon_type", 1.0))),
+    }
+
+    def __init__(self, refresh: float = 300.0) -> None:
+        self._lock = threading.Lock()
+        # held by the one thread reloading the index
+        self._reload = threading.Lock()
+        # the changes made while the index is reloaded, None otherwise
+        self._pending: optional[list] = None
+        self.refresh = refresh
+        self._clear()
+
+    def _clear(self) -> None:
+        self._loaded_at: optional[float] = None
+        # (kind, id) -> the serialized item, and the weight of each of its words
+        self._documents: dict[tuple[str, int], dict] = {}
+        self._weights: dict[tuple[str, int], dict[str, float]] = {}
+        # word -> the items holding it; prefix & trigram -> the words holding them
+        self._words: dict[str, set[tuple[str, int]]] = {}
+        self._prefixes: dict[str, set[str]] = {}
+        self._trigrams: dict[str, set[str]] = {}
+
+    def configure(self, refresh: float) -> None:
+        """Changes the reload interval of the index, emptying it. An interval of 0
+        never reloads it."""
+        with self._lock:
+            self.refresh = refresh
+            self._clear()
+
+    @classmethod
+    def document(cls, entity) -> dict:
+        """Captures what the index holds of a menu item, while it is loaded."""
+        kind, fields = cls.FIELDS[type(entity)]
+        weights: dict[str, float] = {}
+        for attr, weight in fields:
+            for word in tokenize(getattr(entity, attr)):
+                weights[word] = max(weights.get(word, 0.0), weight)
+        data = entity.convert_to_dict()
+        return {"kind": kind, "id": data["id"], "data": data, "weights": weights}
+
+    def _add(self, document: dict) -> None:
+        key = (document["kind"], document["id"])
+        self._remove(key)
+        self._documents[key] = {"kind": document["kind"], **document["data"]}
+        self._weights[key] = document["weights"]
+        for word in document["weights"]:
+            if word not in self._words:
+                self._words[word] = set()
+                for end in range(1, min(len(word), MAX_PREFIX) + 1):
+                    self._prefixes.setdefault(word[:end], set()).add(word)
+                for trigram in trigrams(word):
+                    self._trigrams.setdefault(trigram, set()).add(word)
+            self._words[word].add(key)
+
+    def _remove(self, key: tuple[str, int]) -> None:
+        self._documents.pop(key, None)
+        for word in self._weights.pop(key, ()):
+            holders = self._words[word]
+            holders.discard(key)
+            if holders:
+                continue
+            del self._words[word]
+            for end in range(1, min(len(word), MAX_PREFIX) + 1):
+                self._prefixes[word[:end]].discard(word)
+                if not self._prefixes[word[:end]]:
+                    del self._prefixes[word[:end]]
+            for trigram in trigrams(word):
+                self._trigrams[trigram].discard(word)
+                if not self._trigrams[trigram]:
+                    del self._trigrams[trigram]
+
+    def add(self, document: dict) -> None:
+        """Indexes a menu item captured by `document`, replacing its previous entry."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(document)
+            if self._loaded_at is not None:
+                self._add(document)
+
+    def remove(self, model, entity_id: int) -> None:
+        """Drops a menu item from the index."""
+        key = (self.FIELDS[model][0], int(entity_id))
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(key)
+            self._remove(key)
+
+    def _stale(self, now: float) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or bool(
+            self.refresh and now - loaded_at >= self.refresh
+        )
+
+    def ensure_loaded(self) -> None:
+        """Loads every menu item from the database, unless the index is current.
+
+        One thread reloads the index at a time. The others wait for it while the
+        index is empty, and keep searching the previous one otherwise. Changes
+        made during the reload are applied again over the loaded items, as they
+        may have been read before them."""
+        if not self._stale(time.monotonic()):
+            return
+        if not self._reload.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            now = time.monotonic()
+            with self._lock:
+                if not self._stale(now):
+                    return
+                self._pending = []
+            try:
+                documents = [
+                    self.document(entity)
+                    for model in self.FIELDS
+                    for entity in db.session.scalars(select(model))
+                ]
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                changes, self._pending = self._pending, None
+                self._clear()
+                for document in documents:
+                    self._add(document)
+                for change in changes:
+                    if isinstance(change, dict):
+                        self._add(change)
+                    else:
+                        self._remove(change)
+                self._loaded_at = now
+        finally:
+            self._reload.release()
+
+    def _word_scores(self, token: str) -> dict[str, float]:
+        """Scores the indexed words a query word matches, between 0 and 1."""
+        scores = {}
+        for word in self._prefixes.get(token[:MAX_PREFIX], ()):
+            if word.startswith(token):
+                # complete words rank above words merely starting with the token
+                scores[word] = 1.0 if word == token else 0.8
+        if len(token) < 3:
+            return scores
+
+        query = trigrams(token)
+        shared: dict[str, int] = {}
+        for trigram in query:
+            for word in self._trigrams.get(trigram, ()):
+                shared[word] = shared.get(word, 0) + 1
+        for word, count in shared.items():
+            similarity = count / (len(query) + len(trigrams(word)) - count)
+            if similarity >= FUZZY_THRESHOLD and word not in scores:
+                scores[word] = similarity * 0.6
+        return scores
+
+    def search(self, query: str, limit: int, kind: optional[str] = None) -> list[dict]:
+        """Returns up to `limit` menu items matching every word of the query, best
+        first, as their serialized form with their `kind`."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            totals: optional[dict[tuple[str, int], float]] = None
+            for token in tokens:
+                scores: dict[tuple[str, int], float] = {}
+                for word, score in self._word_scores(token).items():
+                    for key in self._words[word]:
+                        if kind and key[0] != kind:
+                            continue
+                        weighted = score * self._weights[key][word]
+                        scores[key] = max(scores.get(key, 0.0), weighted)
+                if totals is None:
+                    totals = scores
+                else:
+                    totals = {
+                        key: total + scores[key]
+                        for key, total in totals.items()
+                        if key in scores
+                    }
+                if not totals:
+                    return []
+
+            ranked = sorted(
+                totals.items(),
+                key=lambda item: (-item[1], self._documents[item[0]]["name"], item[0]),
+            )
+            return [dict(self._documents[key]) for key, _ in ranked[:limit]]
+
+
+menu_index = MenuIndex()
@@ -1,32 +1,206 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, Optional as optional
+
+from sqlalchemy import and_, func, or_, select, union_all
+from sqlalchemy.orm import Session
 from sqlalchemy.orm.query import Query
 
+from .. import db
 from ..errors import EntityNotFound
 
+from .cache import menu_cache
+from .search import menu_index
+from .rollup import sales_report
 from .models import Food, Addon, Customer, Order, OrderItem, ItemMod, CustomerOrder
 
 
+def foods_page(after: optional[int], limit: int, category: optional[str] = None):
+    """Builds the query of up to `limit` food items following the food ID `after`."""
+    query = select(Food)
+    if category:
+        query = query.where(Food.food_category == category)
+    if after is not None:
+        query = query.where(Food.food_id > after)
+    return query.order_by(Food.food_id).limit(limit)
+
+
+def addons_page(after: optional[int], limit: int, addon_type: optional[str] = None):
+    """Builds the query of up to `limit` addon items following the addon ID `after`."""
+    query = select(Addon)
+    if addon_type:
+        query = query.where(Addon.addon_type == addon_type)
+    if after is not None:
+        query = query.where(Addon.addon_id > after)
+    return query.order_by(Addon.addon_id).limit(limit)
+
+
+def customers_page(after: optional[int], limit: int):
+    """Builds the query of up to `limit` customers following the customer ID `after`."""
+    query = select(Customer)
+    if after is not None:
+        query = query.where(Customer.customer_id > after)
+    return query.order_by(Customer.customer_id).limit(limit)
+
+
+def _prefix_range(column, prefix: str):
+    # a range rather than LIKE, so every dialect and collation seeks the index;
+    # the LIKE keeps the match exact wherever the collation orders differently
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(
+        column >= prefix, column < upper, column.startswith(prefix, autoescape=True)
+    )
+
+
+def customers_search(
+    limit: int,
+    phone: optional[str] = None,
+    name: optional[str] = None,
+    exact: bool = False,
+):
+    """Builds the query of up to `limit` customers whose phone number (given as
+    digits) and/or lowercased name start with the given values.
+
+    Customers are ordered by the phone number when one is given, and the name
+    otherwise, so the query walks the matching range of a single index."""
+    query = select(Customer)
+    if phone:
+        if exact:
+            query = query.where(Customer.customer_phone_digits == phone)
+        else:
+            query = query.where(_prefix_range(Customer.customer_phone_digits, phone))
+    if name:
+        query = query.where(_prefix_range(Customer.customer_name_lower, name))
+    key = Customer.customer_phone_digits if phone else Customer.customer_name_lower
+    return query.order_by(key, Customer.customer_id).limit(limit)
+
+
+def orders_page(
+    after: optional[tuple[datetime, int]],
+    limit: int,
+    since: optional[datetime] = None,
+    until: optional[datetime] = None,
+    customer_id: optional[int] = None,
+):
+    """Builds the query of up to `limit` orders with their customer ID, by date.
+
+    `after` is the (order_date, order_id) of the last order of the previous page,
+    so every page is a range scan of the order date index."""
+    query = select(Order, CustomerOrder.customer_id)
+    if customer_id is not None:
+        query = query.join(
+            CustomerOrder, CustomerOrder.order_id == Order.order_id
+        ).where(CustomerOrder.customer_id == customer_id)
+    else:
+        query = query.outerjoin(CustomerOrder, CustomerOrder.order_id == Order.order_id)
+    if since:
+        query = query.where(Order.order_date >= since)
+    if until:
+        query = query.where(Order.order_date < until)
+    if after:
+        after_date, after_id = after
+        query = query.where(
+            or_(
+                Order.order_date > after_date,
+                and_(Order.order_date == after_date, Order.order_id > after_id),
+            )
+        )
+    return query.order_by(Order.order_date, Order.order_id).limit(limit)
+
+
+def order_with_customer(order_id: int):
+    """Builds the query of an order alongside the ID of its customer."""
+    return (
+        select(Order, CustomerOrder.customer_id)
+        .outerjoin(CustomerOrder, CustomerOrder.order_id == Order.order_id)
+        .where(Order.order_id == order_id)
+    )
+
+
+def group_orders_contents(
+    order_ids: Iterable[int], items: Iterable, mods: Iterable
+) -> tuple[dict[int, list[Query]], dict[int, list[Query]]]:
+    """Groups loaded order items by order ID, and item modifications by order item ID."""
+    order_items: dict[int, list[Query]] = {order_id: [] for order_id in order_ids}
+    item_mods: dict[int, list[Query]] = {}
+    for item in items:
+        order_items[item.order_id].append(item)
+        item_mods[item.order_item_id] = []
+    for mod in mods:
+        item_mods[mod.order_item_id].append(mod)
+    return order_items, item_mods
+
+
 class ViewResturantData:
 
     @staticmethod
     def view_food(food_id: int) -> Query:
         """Returns the details of a given food item."""
+        entity = menu_cache.load(Food, food_id)
+        if entity:
+            return entity
+        generation = menu_cache.generation()
         entity = Food.query.filter(Food.food_id == food_id).first()
         if not entity:
             raise EntityNotFound("The food item does not exist in the database.")
+        menu_cache.store(entity, generation)
         return entity
 
     @staticmethod
     def view_addon(addon_id: int) -> Query:
         """Returns the details of a given addon item."""
+        entity = menu_cache.load(Addon, addon_id)
+        if entity:
+            return entity
+        generation = menu_cache.generation()
         entity = Addon.query.filter(Addon.addon_id == addon_id).first()
         if not entity:
             raise EntityNotFound("The addon item does not exist in the database.")
+        menu_cache.store(entity, generation)
         return entity
 
+    @staticmethod
+    def view_foods(food_ids: Iterable[int]) -> dict[int, Query]:
+        """Returns the details of the given food items, keyed by their ID."""
+        entities = {}
+        for food_id in set(food_ids):
+            entities[food_id] = menu_cache.load(Food, food_id)
+        uncached = [food_id for food_id, entity in entities.items() if not entity]
+        if uncached:
+            generation = menu_cache.generation()
+            for entity in Food.query.filter(Food.food_id.in_(uncached)):
+                menu_cache.store(entity, generation)
+                entities[entity.food_id] = entity
+        missing = [food_id for food_id, entity in entities.items() if not entity]
+        if missing:
+            raise EntityNotFound(
+                f"The food items {sorted(missing)} do not exist in the database."
+            )
+        return entities
+
+    @staticmethod
+    def view_addons(addon_ids: Iterable[int]) -> dict[int, Query]:
+        """Returns the details of the given addon items, keyed by their ID."""
+        entities = {}
+        for addon_id in set(addon_ids):
+            entities[addon_id] = menu_cache.load(Addon, addon_id)
+        uncached = [addon_id for addon_id, entity in entities.items() if not entity]
+        if uncached:
+            generation = menu_cache.generation()
+            for entity in Addon.query.filter(Addon.addon_id.in_(uncached)):
+                menu_cache.store(entity, generation)
+                entities[entity.addon_id] = entity
+        missing = [addon_id for addon_id, entity in entities.items() if not entity]
+        if missing:
+            raise EntityNotFound(
+                f"The addon items {sorted(missing)} do not exist in the database."
+            )
+        return entities
+
     @staticmethod
     def view_customer(customer_id: int) -> Query:
         """Returns the details of a given customer."""
-        entity = Customer.query.filter(Customer.customer_id == customer_id).first()
+        entity = db.session.get(Customer, customer_id)
         if not entity:
             raise EntityNotFound(
                 f'The customer "{customer_id}" does not exist in the database.'
@@ -43,6 +217,15 @@ class ViewResturantData:
             raise EntityNotFound("The customer does not have any orders.")
         return entities
 
+    @staticmethod
+    def view_customer_order_ids(customer_id: int) -> list[int]:
+        """Returns the IDs of every order of a given customer."""
+        return db.session.scalars(
+            select(CustomerOrder.order_id).where(
+                CustomerOrder.customer_id == customer_id
+            )
+        ).all()
+
     @staticmethod
     def view_order(order_id: int) -> Query:
         """Returns the details of a given order."""
@@ -52,24 +235,165 @@ class ViewResturantData:
         return entity
 
     @staticmethod
-    def view_order_grand_total(order_id: int) -> int:
-        """Returns the grand total of a given order."""
-        order_entity = Order.query.filter(Order.order_id == order_id).first()
-        if not order_entity:
+    def view_order_details(
+        order_id: int,
+    ) -> tuple[Query, optional[int], list[Query], dict[int, list[Query]]]:
+        """Returns a given order alongside its customer ID, items and item modifications.
+
+        The whole order is loaded in a fixed number of queries, regardless of how
+        many items it contains."""
+        row = db.session.execute(order_with_customer(order_id)).first()
+        if not row:
             raise EntityNotFound("The order does not exist in the database.")
+        order, customer_id = row
 
-        order_items = OrderItem.query.filter(OrderItem.order_id == order_id).all()
-        total = 0
-        # XXX: This *might* be incredibly slow. I have no idea, I've literally never written SQL before.
-        for item in order_items:
-            total += int(item.order_item_price)
-            mod = ItemMod.query.filter(
-                ItemMod.order_item_id == item.order_item_id
+        order_items, item_mods = ViewResturantData.view_orders_contents([order_id])
+
+        return order, customer_id, order_items[order_id], item_mods
+
+    @staticmethod
+    def view_orders_contents(
+        order_ids: Iterable[int],
+    ) -> tuple[dict[int, list[Query]], dict[int, list[Query]]]:
+        """Returns the items of the given orders keyed by order ID, and the item
+        modifications of those items keyed by order item ID, in two queries."""
+        order_ids = list(order_ids)
+        if not order_ids:
+            return {}, {}
+
+        items = db.session.scalars(
+            select(OrderItem)
+            .where(OrderItem.order_id.in_(order_ids))
+            .order_by(OrderItem.order_item_id)
+        ).all()
+        mods = []
+        if items:
+            mods = db.session.scalars(
+                select(ItemMod).where(
+                    ItemMod.order_item_id.in_([item.order_item_id for item in items])
+                )
             ).all()
-            for m in mod:
-                total += int(m.item_mod_price)
 
-        return total
+        return group_orders_contents(order_ids, items, mods)
+
+    @staticmethod
+    def list_foods(
+        after: optional[int], limit: int, category: optional[str] = None
+    ) -> list[Query]:
+        """Returns up to `limit` food items following the food ID `after`."""
+        return db.session.scalars(foods_page(after, limit, category)).all()
+
+    @staticmethod
+    def list_addons(
+        after: optional[int], limit: int, addon_type: optional[str] = None
+    ) -> list[Query]:
+        """Returns up to `limit` addon items following the addon ID `after`."""
+        return db.session.scalars(addons_page(after, limit, addon_type)).all()
+
+    @staticmethod
+    def list_customers(after: optional[int], limit: int) -> list[Query]:
+        """Returns up to `limit` customers following the customer ID `after`."""
+        return db.session.scalars(customers_page(after, limit)).all()
+
+    @staticmethod
+    def search_customers(
+        limit: int,
+        phone: optional[str] = None,
+        name: optional[str] = None,
+        exact: bool = False,
+    ) -> list[Query]:
+        """Returns up to `limit` customers matching a phone number and/or name."""
+        return db.session.scalars(customers_search(limit, phone, name, exact)).all()
+
+    @staticmethod
+    def search_menu(query: str, limit: int, kind: optional[str] = None) -> list[dict]:
+        """Returns up to `limit` serialized menu items matching a query, from the
+        in-memory menu index; SQL is only run to load the index."""
+        menu_index.ensure_loaded()
+        return menu_index.search(query, limit, kind=kind)
+
+    @staticmethod
+    def sales_report(
+        grain: str,
+        since: optional[datetime] = None,
+        until: optional[datetime] = None,
+        by: tuple[str, ...] = (),
+        **filters: optional[str],
+    ) -> list:
+        """Returns the sales per hour or day from the sales rollup, as rows of the
+        period start, the `by` dimensions, the items sold and the amount."""
+        return db.session.execute(
+            sales_report(grain, since, until, by, **filters)
+        ).all()
+
+    @staticmethod
+    def list_orders(
+        after: optional[tuple[datetime, int]],
+        limit: int,
+        since: optional[datetime] = None,
+        until: optional[datetime] = None,
+        customer_id: optional[int] = None,
+    ) -> list[tuple[Query, optional[int]]]:
+        """Returns up to `limit` orders with their customer ID, ordered by date.
+
+        `after` is the (order_date, order_id) of the last order of the previous
+        page, so every page is a range scan of the order date index."""
+        rows = db.session.execute(
+            orders_page(after, limit, since, until, customer_id=customer_id)
+        )
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def stream_orders(
+        batch_size: int,
+        since: optional[datetime] = None,
+        until: optional[datetime] = None,
+    ) -> Iterator[list[tuple[Query, optional[int]]]]:
+        """Yields every order with its customer ID by date, `batch_size` at a time.
+
+        The orders are read through a server-side cursor held by a dedicated
+        session, so memory stays flat and the request's session remains free for
+        loading the contents of each batch."""
+        query = select(Order, CustomerOrder.customer_id).outerjoin(
+            CustomerOrder, CustomerOrder.order_id == Order.order_id
+        )
+        if since:
+            query = query.where(Order.order_date >= since)
+        if until:
+            query = query.where(Order.order_date < until)
+        query = query.order_by(Order.order_date, Order.order_id).execution_options(
+            yield_per=batch_size
+        )
+
+        with Session(db.engine) as session:
+            for partition in session.execute(query).partitions():
+                yield [tuple(row) for row in partition]
+
+    @staticmethod
+    def view_order_grand_total(order_id: int) -> Decimal:
+        """Returns the grand total of a given order.
+
+        The maintained `order_total` is used when present, otherwise the prices of
+        the order items and their modifications are summed in a single statement."""
+        item_prices = select(OrderItem.order_item_price.label("price")).where(
+            OrderItem.order_id == order_id
+        )
+        mod_prices = (
+            select(ItemMod.item_mod_price.label("price"))
+            .join(OrderItem, OrderItem.order_item_id == ItemMod.order_item_id)
+            .where(OrderItem.order_id == order_id)
+        )
+        prices = union_all(item_prices, mod_prices).subquery()
+        aggregate = select(func.coalesce(func.sum(prices.c.price), 0)).scalar_subquery()
+
+        row = db.session.execute(
+            select(func.coalesce(Order.order_total, aggregate)).where(
+                Order.order_id == order_id
+            )
+        ).first()
+        if not row:
+            raise EntityNotFound("The order does not exist in the database.")
+        return Decimal(row[0])
 
     @staticmethod
     def view_order_customer(order_id: int) -> Query:
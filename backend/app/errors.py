@@ -5,8 +5,11 @@ MISSING_ENTRY_DATA = 4001
 # MISSING_FOOD_SIZE = 4002
 BAD_ENTRY_DATA = 4003
 ENTRY_NOT_FOUND = 4004
+REQUEST_IN_PROGRESS = 4009
+IDEMPOTENCY_KEY_REUSED = 4022
 
 GENERIC_SERVER_ERROR = 5000
+ORDER_QUEUE_FULL = 5003
 
 
 class GeneralException(Exception):
@@ -82,6 +85,43 @@ class ImproperEntryData(GeneralException):
         )
 
 
+class RequestInProgress(GeneralException):
+    def __init__(self, *args, **kwargs):
+        super().__init__(
+            default_message="A request with this idempotency key is still in progress",
+            data={} if not kwargs.get("data") else kwargs.get("data"),
+            http_status_code=409,
+            code=REQUEST_IN_PROGRESS,
+            *args,
+            **kwargs,
+        )
+
+
+class IdempotencyKeyReused(GeneralException):
+    def __init__(self, *args, **kwargs):
+        super().__init__(
+            default_message="This idempotency key was used for a different request",
+            data={} if not kwargs.get("data") else kwargs.get("data"),
+            http_status_code=422,
+            code=IDEMPOTENCY_KEY_REUSED,
+            *args,
+            **kwargs,
+        )
+
+
+class OrderQueueFull(GeneralException):
+    def __init__(self, *args, **kwargs):
+        super().__init__(
+            default_message="Too many orders are waiting to be written, retry shortly",
+            data={} if not kwargs.get("data") else kwargs.get("data"),
+            http_status_code=503,
+            code=ORDER_QUEUE_FULL,
+            headers={"Retry-After": "1"},
+            *args,
+            **kwargs,
+        )
+
+
 class CoreError(GeneralException):
     pass
 
@@ -0,0 +1,237 @@
+import time
+import threading
+from bisect import bisect_left
+from typing import Optional
+
+from flask import Flask, g, request
+
+from .profiling import RequestProfile, current_profile
+
+# Upper bounds of the request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _shard() -> dict:
+    return {"requests": {}, "latency": {}, "db": {}, "errors": {}}
+
+
+def _merge(into: dict, shard: dict) -> None:
+    for key, count in shard["requests"].copy().items():
+        into["requests"][key] = into["requests"].get(key, 0) + count
+    for key, count in shard["errors"].copy().items():
+        into["errors"][key] = into["errors"].get(key, 0) + count
+    for name in ("latency", "db"):
+        for key, values in shard[name].copy().items():
+            merged = into[name].setdefault(key, [0] * len(values))
+            for index, value in enumerate(list(values)):
+                merged[index] += value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """Collects request metrics and renders them in the Prometheus text format.
+
+    Every thread records into its own shard, so recording a sample takes no lock;
+    shards are only merged when the metrics are scraped. The shards of threads
+    that have exited are folded into a retired total then, and whenever another
+    thread records its first sample."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: list[tuple[threading.Thread, dict]] = []
+        self._retired = _shard()
+        self._caches: dict = {}
+
+    def _local_shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _shard()
+            with self._lock:
+                # servers starting a thread per request would otherwise keep the
+                # shard of every thread until the next scrape
+                self._retire_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead_shards(self) -> None:
+        """Folds the shards of threads that have exited into the retired total.
+        Called with the lock held."""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _merge(self._retired, shard)
+        self._shards = live
+
+    def register_cache(self, name: str, cache) -> None:
+        """Reports the hit ratio of a TTLCache under the given name."""
+        self._caches[name] = cache
+
+    def record_request(
+        self,
+        route: str,
+        method: str,
+        status: int,
+        duration: float,
+        db_time: Optional[float] = None,
+        statements: Optional[int] = None,
+    ) -> None:
+        """Records a handled request, with the time it and its statements took."""
+        shard = self._local_shard()
+        key = (route, method, status)
+        shard["requests"][key] = shard["requests"].get(key, 0) + 1
+
+        # bucket counts, then the sum and count of the samples
+        latency = shard["latency"].get(route)
+        if latency is None:
+            latency = shard["latency"][route] = [0] * (len(self.buckets) + 3)
+        latency[bisect_left(self.buckets, duration)] += 1
+        latency[-2] += duration
+        latency[-1] += 1
+
+        if db_time is not None:
+            db = shard["db"].get(route)
+            if db is None:
+                db = shard["db"][route] = [0.0, 0]
+            db[0] += db_time
+            db[1] += statements or 0
+
+    def record_error(self, code: int) -> None:
+        """Records an error response, by its code from app.errors."""
+        errors = self._local_shard()["errors"]
+        errors[code] = errors.get(code, 0) + 1
+
+    def collect(self) -> dict:
+        """Merges the shards of every thread."""
+        with self._lock:
+            self._retire_dead_shards()
+            live = list(self._shards)
+            totals = _shard()
+            _merge(totals, self._retired)
+        for _, shard in live:
+            _merge(totals, shard)
+        return totals
+
+    def render(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        totals = self.collect()
+        lines = [
+            "# HELP http_requests_total Requests handled, by route, method and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (route, method, status), count in sorted(totals["requests"].items()):
+            labels = _labels(route=route, method=method, status=status)
+            lines.append(f"http_requests_total{labels} {count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds Time taken to handle requests, by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for route, latency in sorted(totals["latency"].items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), latency):
+                cumulative += count
+                labels = _labels(route=route, le=bound)
+                lines.append(
+                    f"http_request_duration_seconds_bucket{labels} {cumulative}"
+                )
+            labels = _labels(route=route)
+            lines.append(f"http_request_duration_seconds_sum{labels} {latency[-2]}")
+            lines.append(f"http_request_duration_seconds_count{labels} {latency[-1]}")
+
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent running SQL statements, by route.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for route, (seconds, _) in sorted(totals["db"].items()):
+            lines.append(
+                f"http_request_db_seconds_total{_labels(route=route)} {seconds}"
+            )
+        lines += [
+            "# HELP http_request_db_statements_total SQL statements run, by route.",
+            "# TYPE http_request_db_statements_total counter",
+        ]
+        for route, (_, statements) in sorted(totals["db"].items()):
+            lines.append(
+                f"http_request_db_statements_total{_labels(route=route)} {statements}"
+            )
+
+        lines += [
+            "# HELP api_errors_total Error responses, by their API error code.",
+            "# TYPE api_errors_total counter",
+        ]
+        for code, count in sorted(totals["errors"].items()):
+            lines.append(f"api_errors_total{_labels(code=code)} {count}")
+
+        caches = {name: cache.stats() for name, cache in self._caches.items()}
+        for metric, kind, description, value in (
+            ("cache_hits_total", "counter", "Cache lookups that hit.", "hits"),
+            ("cache_misses_total", "counter", "Cache lookups that missed.", "misses"),
+            ("cache_entries", "gauge", "Entries held by the cache.", "size"),
+        ):
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+            for name, stats in caches.items():
+                lines.append(f"{metric}{_labels(cache=name)} {stats[value]}")
+        lines += [
+            "# HELP cache_hit_ratio Share of cache lookups that hit.",
+            "# TYPE cache_hit_ratio gauge",
+        ]
+        for name, stats in caches.items():
+            lookups = stats["hits"] + stats["misses"]
+            ratio = stats["hits"] / lookups if lookups else 0.0
+            lines.append(f"cache_hit_ratio{_labels(cache=name)} {ratio}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def record_profile(
+    route: str,
+    method: str,
+    status: int,
+    started: float,
+    profile: Optional[RequestProfile] = None,
+) -> None:
+    """Records a finished request, including its statements if it was profiled."""
+    metrics.record_request(
+        route,
+        method,
+        status,
+        time.perf_counter() - started,
+        db_time=profile.db_time if profile else None,
+        statements=profile.statements if profile else None,
+    )
+
+
+def init_metrics(app: Flask) -> None:
+    """Records the route, status and latency of every request."""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            record_profile(
+                route,
+                request.method,
+                response.status_code,
+                started,
+                current_profile.get(),
+            )
+        return response
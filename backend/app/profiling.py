@@ -0,0 +1,100 @@
+import time
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("request")
+
+
+class RequestProfile:
+    """The SQL statements a request issued, and the time spent on them."""
+
+    __slots__ = ("started", "statements", "db_time")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+
+    def server_timing(self) -> str:
+        """Returns the value of the Server-Timing header reporting the request."""
+        total = (time.perf_counter() - self.started) * 1000
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} statements", '
+            f"app;dur={total:.2f}"
+        )
+
+    def log(self, method: str, path: str, status: int, threshold: int) -> None:
+        """Logs the request, as a warning if it issued more than `threshold`
+        statements."""
+        total = (time.perf_counter() - self.started) * 1000
+        flagged = threshold and self.statements > threshold
+        message = (
+            f"method={method} path={path} status={status} "
+            f"statements={self.statements} db_ms={self.db_time * 1000:.2f} "
+            f"total_ms={total:.2f}"
+        )
+        if flagged:
+            message += " statement_threshold_exceeded=1"
+        logger.log(logging.WARNING if flagged else logging.INFO, message)
+
+
+# The profile of the request being handled, per thread and per asyncio task
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def track_statements(engine: Engine) -> None:
+    """Counts and times the statements run on an engine against the profile of
+    the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = conn.info["statement_started"].pop()
+        profile = current_profile.get()
+        if profile is not None:
+            profile.statements += 1
+            profile.db_time += time.perf_counter() - started
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # failed statements never reach after_cursor_execute
+        if context.connection is None:
+            return
+        started = context.connection.info.get("statement_started")
+        if started:
+            started.pop()
+
+
+def init_profiling(app: Flask, engine: Engine) -> None:
+    """Reports the statements of every request in a Server-Timing header and a
+    log line."""
+    track_statements(engine)
+    threshold = app.config["REQUEST_STATEMENT_THRESHOLD"]
+
+    @app.before_request
+    def start_profile():
+        g.profile_token = current_profile.set(RequestProfile())
+
+    @app.after_request
+    def report_profile(response):
+        profile = current_profile.get()
+        if profile is not None:
+            response.headers["Server-Timing"] = profile.server_timing()
+            profile.log(request.method, request.path, response.status_code, threshold)
+        return response
+
+    @app.teardown_request
+    def end_profile(exc):
+        token = g.pop("profile_token", None)
+        if token is not None:
+            current_profile.reset(token)
@@ -1,15 +1,35 @@
 from .addon import CreateAddon, ManageAddon
 from .food import CreateFood, ManageFood
-from .customer import CreateCustomer, ManageCustomer
-from .order import CreateOrder, ManageOrder
+from .menu import SearchMenu
+from .customer import CreateCustomer, ManageCustomer, SearchCustomers
+from .order import (
+    CreateOrder,
+    ExportOrders,
+    ListOrders,
+    ManageOrder,
+    OrderFeed,
+    OrderTicket,
+)
+from .report import SalesReport
+from .status import IngestStats, Metrics, PoolStats
 
 __all__ = (
     "CreateAddon",
     "ManageAddon",
     "CreateFood",
     "ManageFood",
+    "SearchMenu",
     "CreateCustomer",
     "ManageCustomer",
+    "SearchCustomers",
     "CreateOrder",
+    "ListOrders",
+    "ExportOrders",
     "ManageOrder",
+    "OrderTicket",
+    "OrderFeed",
+    "SalesReport",
+    "PoolStats",
+    "IngestStats",
+    "Metrics",
 )
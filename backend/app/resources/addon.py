@@ -2,14 +2,23 @@ import logging
 import json
 
 from flask_restful import Resource  # type: ignore
-from flask import request, Response
-
-from .helper import clean_data
+from flask import request
+
+from .serializer import json_response
+from .helper import (
+    entity_etag,
+    not_modified,
+    with_validators,
+    bulk_response,
+    encode_cursor,
+    page_id_cursor,
+    page_limit,
+    page_response,
+)
 
 from .. import core
 from ..errors import (
     EntryNotFound,
-    DataInconsistencyError,
     MissingEntryData,
     ImproperEntryData,
     PARTIAL_SUCCESS,
@@ -20,8 +29,17 @@ class CreateAddon(Resource):
     def __init__(self):
         self.logger = logging.getLogger("CreateAddon")
 
+    def get(self):
+        addons, next_after = core.find.addons(
+            page_id_cursor(), page_limit(), addon_type=request.args.get("type")
+        )
+        next_cursor = encode_cursor(next_after) if next_after is not None else None
+        return page_response(addons, next_cursor)
+
     def post(self):
         addon_data = request.get_json()
+        if addon_data and isinstance(addon_data, list):
+            return bulk_response(core.create.addons(addon_data))
         if not addon_data or not {"name", "type", "price"} <= set(addon_data):
             raise MissingEntryData
         addon = core.create.addon(
@@ -31,11 +49,12 @@ class CreateAddon(Resource):
             addon_size=addon_data.get("size"),
         )
 
-        data = clean_data(
-            {"success": True, "message": "", "code": 0, "data": addon}, serialize=True
-        )
         headers = {"location": f"api/menu/addon/{addon['id']}"}
-        return Response(data, status=201, mimetype="application/json", headers=headers)
+        return json_response(
+            {"success": True, "message": "", "code": 0, "data": addon},
+            status=201,
+            headers=headers,
+        )
 
 
 class ManageAddon(Resource):
@@ -43,13 +62,21 @@ class ManageAddon(Resource):
         self.logger = logging.getLogger("ManageAddon")
 
     def get(self, addon_id):
+        validators = core.find.addon_version(addon_id)
+        if not validators:
+            raise EntryNotFound
+        etag = entity_etag("addon", addon_id, *validators)
+        cached = not_modified(etag, validators[1])
+        if cached:
+            return cached
+
         addon = core.find.addon(addon_id)
         if not addon:
             raise EntryNotFound
-        resp = clean_data(
-            {"success": True, "message": "", "code": 0, "data": addon}, serialize=True
+        response = json_response(
+            {"success": True, "message": "", "code": 0, "data": addon}, status=200
         )
-        return Response(resp, status=200, mimetype="application/json")
+        return with_validators(response, etag, validators[1])
 
     def delete(self, addon_id):
         addon = core.delete.addon(addon_id)
@@ -62,55 +89,22 @@ class ManageAddon(Resource):
         if not addon_data:
             raise MissingEntryData
 
-        addon_entity = core.find.addon(addon_id)
-        if not addon_entity:
+        data, attempted_entries = core.update.addon(addon_id, addon_data)
+        if not data:
             raise EntryNotFound
 
-        attempted_entries = {}
-
-        if addon_data.get("name"):
-            attempted_entries["name"] = True
-            result = core.update.addon_name(addon_id, addon_data.get("name"))
-            if not result:
-                attempted_entries["name"] = False
-
-        if addon_data.get("type"):
-            attempted_entries["type"] = True
-            result = core.update.addon_type(addon_id, addon_data.get("type"))
-            if not result:
-                attempted_entries["type"] = False
-
-        if addon_data.get("price"):
-            attempted_entries["price"] = True
-            result = core.update.addon_price(addon_id, float(addon_data.get("price")))
-            if not result:
-                attempted_entries["price"] = False
-
-        if addon_data.get("size"):
-            attempted_entries["size"] = True
-            result = core.update.addon_size(addon_id, addon_data.get("size"))
-            if not result:
-                attempted_entries["size"] = False
-
         if not len(attempted_entries):
             # no useful data was provided by the user
             raise ImproperEntryData
 
-        data = core.find.addon(addon_id)
         success = all(attempted_entries.values())
 
-        if not data:
-            # between updating the data and fetching it again, it vanished!
-            raise DataInconsistencyError
-
         if success:
-            resp = clean_data(
-                {"success": True, "message": "", "code": 0, "data": data},
-                serialize=True,
+            return json_response(
+                {"success": True, "message": "", "code": 0, "data": data}, status=200
             )
-            return Response(resp, status=200, mimetype="application/json")
 
-        resp = clean_data(
+        return json_response(
             {
                 "success": False,
                 "message": "Some items did not successfully update. ",
@@ -118,7 +112,5 @@ class ManageAddon(Resource):
                 "data": data,
                 "results": attempted_entries,
             },
-            serialize=True,
+            status=207,
         )
-
-        return Response(resp, status=207, mimetype="application/json")
@@ -3,14 +3,24 @@ import logging
 from copy import deepcopy
 
 from flask_restful import Resource  # type: ignore
-from flask import request, Response
-
-from .helper import clean_data
+from flask import request
+
+from .serializer import json_response
+from .helper import (
+    entity_etag,
+    not_modified,
+    with_validators,
+    bulk_response,
+    encode_cursor,
+    page_id_cursor,
+    page_limit,
+    page_response,
+)
 
 from .. import core
+from ..database import phone_digits
 from ..errors import (
     EntryNotFound,
-    DataInconsistencyError,
     MissingEntryData,
     ImproperEntryData,
     PARTIAL_SUCCESS,
@@ -21,9 +31,16 @@ class CreateCustomer(Resource):
     def __init__(self):
         self.logger = logging.getLogger("CreateCustomer")
 
+    def get(self):
+        customers, next_after = core.find.customers(page_id_cursor(), page_limit())
+        next_cursor = encode_cursor(next_after) if next_after is not None else None
+        return page_response(customers, next_cursor)
+
     def post(self):
         data = request.get_json()
         customer_data = data.get("customer")
+        if customer_data and isinstance(customer_data, list):
+            return bulk_response(core.create.customers(customer_data))
         if not (
             customer_data
             or {"name", "address", "phone"} <= set(customer_data)
@@ -36,12 +53,34 @@ class CreateCustomer(Resource):
             customer_data.get("phone"),
             customer_data.get("address"),
         )
-        resp = clean_data(
+        headers = {"location": f"api/customer/{customer['id']}"}
+        return json_response(
             {"success": True, "message": "", "code": 0, "data": customer},
-            serialize=True,
+            status=201,
+            headers=headers,
         )
-        headers = {"location": f"api/customer/{customer['id']}"}
-        return Response(resp, status=201, mimetype="application/json", headers=headers)
+
+
+class SearchCustomers(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("SearchCustomers")
+
+    def get(self):
+        phone = request.args.get("phone")
+        name = request.args.get("name")
+        match = request.args.get("match", "prefix")
+        if not phone and not name:
+            raise MissingEntryData
+        if (phone is not None and not phone_digits(phone)) or match not in (
+            "prefix",
+            "exact",
+        ):
+            raise ImproperEntryData
+
+        customers = core.find.search_customers(
+            page_limit(), phone=phone, name=name, exact=match == "exact"
+        )
+        return page_response(customers, None)
 
 
 class ManageCustomer(Resource):
@@ -49,14 +88,21 @@ class ManageCustomer(Resource):
         self.logger = logging.getLogger("ManageCustomer")
 
     def get(self, customer_id: int):
+        validators = core.find.customer_version(customer_id)
+        if not validators:
+            raise EntryNotFound
+        etag = entity_etag("customer", customer_id, *validators)
+        cached = not_modified(etag, validators[1])
+        if cached:
+            return cached
+
         customer = core.find.customer(customer_id)
         if not customer:
             raise EntryNotFound
-        resp = clean_data(
-            {"success": True, "message": "", "code": 0, "data": customer},
-            serialize=True,
+        response = json_response(
+            {"success": True, "message": "", "code": 0, "data": customer}, status=200
         )
-        return Response(resp, status=200, mimetype="application/json")
+        return with_validators(response, etag, validators[1])
 
     def delete(self, customer_id: int):
         customer = core.delete.customer(customer_id)
@@ -70,48 +116,22 @@ class ManageCustomer(Resource):
         if not customer_data:
             raise MissingEntryData
 
-        customer_entity = core.find.customer(customer_id)
-        if not customer_entity:
+        data, attempted_entries = core.update.customer(customer_id, customer_data)
+        if not data:
             raise EntryNotFound
 
-        attempted_entries = {}
-
-        if customer_data.get("name"):
-            attempted_entries["name"] = True
-            if not core.update.customer_name(customer_id, customer_data.get("name")):
-                attempted_entries["name"] = False
-
-        if customer_data.get("phone"):
-            attempted_entries["phone"] = True
-            if not core.update.customer_phone(customer_id, customer_data.get("phone")):
-                attempted_entries["phone"] = False
-
-        if customer_data.get("address"):
-            attempted_entries["address"] = True
-            if not core.update.customer_address(
-                customer_id, customer_data.get("address")
-            ):
-                attempted_entries["address"] = False
-
         if not len(attempted_entries):
             # no useful data was provided by the user
             raise ImproperEntryData
 
-        data = core.find.customer(customer_id)
         success = all(attempted_entries.values())
 
-        if not data:
-            # between updating the data and fetching it again, it vanished!
-            raise DataInconsistencyError
-
         if success:
-            resp = clean_data(
-                {"success": True, "message": "", "code": 0, "data": data},
-                serialize=True,
+            return json_response(
+                {"success": True, "message": "", "code": 0, "data": data}, status=200
             )
-            return Response(resp, status=200, mimetype="application/json")
 
-        resp = clean_data(
+        return json_response(
             {
                 "success": False,
                 "message": "Some items did not successfully update. ",
@@ -119,7 +139,5 @@ class ManageCustomer(Resource):
                 "data": data,
                 "results": attempted_entries,
             },
-            serialize=True,
+            status=207,
         )
-
-        return Response(resp, status=207, mimetype="application/json")
@@ -1,15 +1,24 @@
 import logging
 
 from flask_restful import Resource  # type: ignore
-from flask import request, Response
-
-from .helper import clean_data
+from flask import request
+
+from .serializer import json_response
+from .helper import (
+    entity_etag,
+    not_modified,
+    with_validators,
+    bulk_response,
+    encode_cursor,
+    page_id_cursor,
+    page_limit,
+    page_response,
+)
 
 from .. import core
 from ..errors import (
     EntryNotFound,
     ImproperEntryData,
-    DataInconsistencyError,
     MissingEntryData,
     PARTIAL_SUCCESS,
 )
@@ -19,9 +28,18 @@ class CreateFood(Resource):
     def __init__(self):
         self.logger = logging.getLogger("CreateFood")
 
+    def get(self):
+        foods, next_after = core.find.foods(
+            page_id_cursor(), page_limit(), category=request.args.get("category")
+        )
+        next_cursor = encode_cursor(next_after) if next_after is not None else None
+        return page_response(foods, next_cursor)
+
     def post(self):
         data = request.get_json()
         food_data = data.get("food")
+        if food_data and isinstance(food_data, list):
+            return bulk_response(core.create.foods(food_data))
         if not food_data or not {"name", "price", "category"} <= set(food_data):
             raise MissingEntryData
         food = core.create.food(
@@ -33,11 +51,12 @@ class CreateFood(Resource):
         if not food:
             raise ImproperEntryData("Food size is required for this category.")
 
-        resp = clean_data(
-            {"success": True, "message": "", "code": 0, "data": food}, serialize=True
-        )
         headers = {"location": f"api/menu/food/{food['id']}"}
-        return Response(resp, status=201, mimetype="application/json", headers=headers)
+        return json_response(
+            {"success": True, "message": "", "code": 0, "data": food},
+            status=201,
+            headers=headers,
+        )
 
 
 class ManageFood(Resource):
@@ -45,13 +64,21 @@ class ManageFood(Resource):
         self.logger = logging.getLogger("ManageFood")
 
     def get(self, food_id):
+        validators = core.find.food_version(food_id)
+        if not validators:
+            raise EntryNotFound
+        etag = entity_etag("food", food_id, *validators)
+        cached = not_modified(etag, validators[1])
+        if cached:
+            return cached
+
         food = core.find.food(food_id)
         if not food:
             raise EntryNotFound
-        resp = clean_data(
-            {"success": True, "message": "", "code": 0, "data": food}, serialize=True
+        response = json_response(
+            {"success": True, "message": "", "code": 0, "data": food}, status=200
         )
-        return Response(resp, status=200, mimetype="application/json")
+        return with_validators(response, etag, validators[1])
 
     def delete(self, food_id):
         food = core.delete.food(food_id)
@@ -65,51 +92,22 @@ class ManageFood(Resource):
         if not food_data:
             raise MissingEntryData
 
-        food_entity = core.find.food(food_id)
-        if not food_entity:
+        data, attempted_entries = core.update.food(food_id, food_data)
+        if not data:
             raise EntryNotFound
 
-        attempted_entries = {}
-
-        if food_data.get("name"):
-            attempted_entries["name"] = True
-            if not core.update.food_name(food_id, food_data.get("name")):
-                attempted_entries["name"] = False
-
-        if food_data.get("price"):
-            attempted_entries["price"] = True
-            if not core.update.food_price(food_id, float(food_data.get("price"))):
-                attempted_entries["price"] = False
-
-        if food_data.get("category"):
-            attempted_entries["category"] = True
-            if not core.update.food_category(food_id, food_data.get("category")):
-                attempted_entries["category"] = False
-
-        if food_data.get("size"):
-            attempted_entries["size"] = True
-            if not core.update.food_size(food_id, food_data.get("size")):
-                attempted_entries["size"] = False
-
         if not len(attempted_entries):
             # no useful data was provided by the user
             raise ImproperEntryData
 
-        data = core.find.food(food_id)
         success = all(attempted_entries.values())
 
-        if not data:
-            # between updating the data and fetching it again, it vanished!
-            raise DataInconsistencyError
-
         if success:
-            resp = clean_data(
-                {"success": True, "message": "", "code": 0, "data": data},
-                serialize=True,
+            return json_response(
+                {"success": True, "message": "", "code": 0, "data": data}, status=200
             )
-            return Response(resp, status=200, mimetype="application/json")
 
-        resp = clean_data(
+        return json_response(
             {
                 "success": False,
                 "message": "Some items did not successfully update. ",
@@ -117,7 +115,5 @@ class ManageFood(Resource):
                 "data": data,
                 "results": attempted_entries,
             },
-            serialize=True,
+            status=207,
         )
-
-        return Response(resp, status=207, mimetype="application/json")
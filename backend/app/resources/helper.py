@@ -1,21 +1,199 @@
 import json
-import decimal
+import base64
+import hashlib
 import datetime
-from typing import Union
+from typing import Callable, Optional
 
+from flask import Response, current_app, request
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag
 
-class Encoder(json.JSONEncoder):
-    def default(self, z):
-        if isinstance(z, datetime.datetime):
-            return str(z)
-        elif isinstance(z, decimal.Decimal):
-            return float(z)
-        else:
-            return super().default(z)
+from .serializer import dumps, json_response
+from ..database import idempotency_store
+from ..errors import ImproperEntryData, PARTIAL_SUCCESS
 
 
-def clean_data(data: dict, serialize=False) -> Union[dict, str]:
-    data = json.dumps(data, cls=Encoder)
-    if serialize:
-        return data
-    return json.loads(data)
+def bulk_response(results: list[dict]) -> Response:
+    """Builds the response of a bulk creation from its per-row results."""
+    success = all(result["success"] for result in results)
+    data = {
+        "success": success,
+        "message": "" if success else "Some items were not successfully created. ",
+        "code": 0 if success else PARTIAL_SUCCESS,
+        "data": results,
+    }
+    return json_response(data, status=201 if success else 207)
+
+
+def encode_cursor(*values) -> str:
+    """Encodes the sort key of the last entry of a page into an opaque cursor."""
+    return base64.urlsafe_b64encode(dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """Decodes a cursor made by `encode_cursor` back into its sort key."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ImproperEntryData("The cursor is not valid.")
+    if not isinstance(values, list):
+        raise ImproperEntryData("The cursor is not valid.")
+    return values
+
+
+def page_limit(args=None, config=None) -> int:
+    """Returns the page size requested through `limit`, capped by the config.
+
+    `args` and `config` default to those of the current Flask request."""
+    args = request.args if args is None else args
+    config = current_app.config if config is None else config
+    limit = args.get("limit", config["PAGE_SIZE_DEFAULT"])
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ImproperEntryData("The limit must be an integer.")
+    if limit < 1:
+        raise ImproperEntryData("The limit must be positive.")
+    return min(limit, config["PAGE_SIZE_MAX"])
+
+
+def page_id_cursor(args=None) -> Optional[int]:
+    """Returns the ID encoded in the `cursor` argument, if any."""
+    cursor = (request.args if args is None else args).get("cursor")
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    if len(values) != 1 or not isinstance(values[0], int):
+        raise ImproperEntryData("The cursor is not valid.")
+    return values[0]
+
+
+def page_date_cursor(args=None) -> Optional[tuple[datetime.datetime, int]]:
+    """Returns the (date, ID) encoded in the `cursor` argument, if any."""
+    cursor = (request.args if args is None else args).get("cursor")
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    try:
+        after_date, after_id = values
+        return datetime.datetime.fromisoformat(after_date), int(after_id)
+    except (TypeError, ValueError):
+        raise ImproperEntryData("The cursor is not valid.")
+
+
+def query_datetime(name: str, args=None) -> Optional[datetime.datetime]:
+    """Returns an ISO 8601 datetime passed as a query argument, if any."""
+    value = (request.args if args is None else args).get(name)
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise ImproperEntryData(f"{name} must be an ISO 8601 date.")
+
+
+def page_data(results: list, next_cursor: Optional[str]) -> dict:
+    """Builds the body of a page of a listing."""
+    return {
+        "success": True,
+        "message": "",
+        "code": 0,
+        "data": {"results": results, "next": next_cursor},
+    }
+
+
+def page_response(results: list, next_cursor: Optional[str]) -> Response:
+    """Builds the response of a page of a listing."""
+    return json_response(page_data(results, next_cursor), status=200)
+
+
+def entity_etag(
+    name: str, entity_id: int, version: int, updated_at: Optional[datetime.datetime]
+) -> str:
+    """Builds the strong ETag of a resource from the version of its row."""
+    changed = updated_at.strftime("%Y%m%d%H%M%S%f") if updated_at else "0"
+    return f"{name}-{entity_id}-{version}-{changed}"
+
+
+def _http_date(updated_at: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    # modification times are stored as naive UTC, HTTP dates have whole seconds
+    if not updated_at:
+        return None
+    return updated_at.replace(microsecond=0, tzinfo=datetime.timezone.utc)
+
+
+def is_current(
+    etag: str, updated_at: Optional[datetime.datetime], headers=None
+) -> bool:
+    """Checks whether the copy the client holds is still current, going by the
+    If-None-Match or, without it, the If-Modified-Since header."""
+    headers = request.headers if headers is None else headers
+    if headers.get("If-None-Match"):
+        return parse_etags(headers["If-None-Match"]).contains_weak(etag)
+    if_modified_since = parse_date(headers.get("If-Modified-Since"))
+    last_modified = _http_date(updated_at)
+    if if_modified_since and last_modified:
+        return last_modified <= if_modified_since
+    return False
+
+
+def validator_headers(etag: str, updated_at: Optional[datetime.datetime]) -> dict:
+    """Returns the ETag and Last-Modified headers of a resource."""
+    headers = {"ETag": quote_etag(etag)}
+    last_modified = _http_date(updated_at)
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def with_validators(
+    response: Response, etag: str, updated_at: Optional[datetime.datetime]
+) -> Response:
+    """Sets the ETag and Last-Modified headers of a response."""
+    response.headers.update(validator_headers(etag, updated_at))
+    return response
+
+
+def not_modified(
+    etag: str, updated_at: Optional[datetime.datetime]
+) -> Optional[Response]:
+    """Returns a 304 response if the copy the client holds is still current."""
+    if not is_current(etag, updated_at):
+        return None
+    return with_validators(Response(status=304), etag, updated_at)
+
+
+def idempotent(
+    key: str, respond: Callable[[], Response], recover: Callable[[int], Response]
+) -> Response:
+    """Answers a request sent with an Idempotency-Key header with the response
+    stored for the key, or with `respond()`, storing its response if it succeeds.
+    `recover(order_id)` rebuilds the response from the order the first request
+    created, should it have died before its response was stored.
+
+    Replayed responses carry an Idempotent-Replayed header."""
+    if not key or len(key) > 255:
+        raise ImproperEntryData("The idempotency key must be 1 to 255 characters.")
+    request_hash = hashlib.sha256(
+        b"\n".join((request.method.encode(), request.path.encode(), request.get_data()))
+    ).hexdigest()
+
+    def stored(response: Response) -> tuple[int, dict, str]:
+        # only the headers describing the result are replayed, not those of the run
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() == "location"
+        }
+        return response.status_code, headers, response.get_data(as_text=True)
+
+    (status, headers, body), replayed = idempotency_store.run(
+        key,
+        request_hash,
+        lambda: stored(respond()),
+        lambda order_id: stored(recover(order_id)),
+    )
+    response = Response(body, status=status, headers=headers)
+    response.content_type = "application/json"
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
@@ -0,0 +1,25 @@
+import logging
+
+from flask_restful import Resource  # type: ignore
+from flask import request
+
+from .helper import page_limit, page_response
+
+from .. import core
+from ..errors import ImproperEntryData, MissingEntryData
+
+
+class SearchMenu(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("SearchMenu")
+
+    def get(self):
+        query = request.args.get("q", "").strip()
+        kind = request.args.get("type")
+        if not query:
+            raise MissingEntryData
+        if kind not in (None, "food", "addon"):
+            raise ImproperEntryData
+
+        items = core.find.search_menu(query, page_limit(), kind=kind)
+        return page_response(items, None)
@@ -1,27 +1,156 @@
 import json
 import logging
-from .helper import clean_data
 
 from flask_restful import Resource  # type: ignore
-from flask import request, Response
+from flask import current_app, request, Response, stream_with_context
 
-from .helper import clean_data
+from .serializer import dumps, json_response
+from .helper import (
+    entity_etag,
+    not_modified,
+    with_validators,
+    encode_cursor,
+    page_date_cursor,
+    page_limit,
+    page_response,
+    query_datetime,
+    idempotent,
+)
 
 from .. import core
+from ..database import order_events
 from ..errors import (
     EntryNotFound,
-    DataInconsistencyError,
     ImproperEntryData,
     MissingEntryData,
     PARTIAL_SUCCESS,
 )
 
 
+def order_page(customer_id=None) -> Response:
+    """Lists orders by date, filtered by the `since` and `until` arguments."""
+    orders, next_after = core.find.orders(
+        page_date_cursor(),
+        page_limit(),
+        since=query_datetime("since"),
+        until=query_datetime("until"),
+        customer_id=customer_id,
+    )
+    next_cursor = encode_cursor(*next_after) if next_after else None
+    return page_response(orders, next_cursor)
+
+
+class ListOrders(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("ListOrders")
+
+    def get(self):
+        return order_page()
+
+
+class ExportOrders(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("ExportOrders")
+
+    def get(self):
+        orders = core.find.export_orders(
+            current_app.config["EXPORT_BATCH_SIZE"],
+            since=query_datetime("since"),
+            until=query_datetime("until"),
+        )
+
+        def generate():
+            for order in orders:
+                yield dumps(order) + "\n"
+
+        return Response(
+            stream_with_context(generate()),
+            status=200,
+            mimetype="application/x-ndjson",
+        )
+
+
+class OrderFeed(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("OrderFeed")
+
+    def get(self):
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+            "last_event_id"
+        )
+        heartbeat = current_app.config["ORDER_EVENTS_HEARTBEAT"]
+        retry = current_app.config["ORDER_EVENTS_RETRY"]
+        subscription = order_events.subscribe(last_event_id)
+
+        def generate():
+            try:
+                yield f"retry: {retry}\n\n"
+                if subscription.missed:
+                    # the events since the client's last one are gone, so it
+                    # reloads the orders it shows
+                    yield f"id: {subscription.resume_id}\nevent: reset\ndata: {{}}\n\n"
+                # a subscriber dropped for falling behind gets what it buffered,
+                # then reconnects and resumes from the history
+                while not subscription.overflowed or not subscription.queue.empty():
+                    event = subscription.get(heartbeat)
+                    if event is None:
+                        # also finds out about clients that went away
+                        yield ": keepalive\n\n"
+                        continue
+                    # only created orders are sent along, as they were committed;
+                    # loading the others here could send a later state of them
+                    data = {"order_id": event.order_id}
+                    if event.order is not None:
+                        data["order"] = event.order
+                    data = dumps(data)
+                    yield f"id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n"
+            finally:
+                order_events.unsubscribe(subscription)
+
+        return Response(
+            stream_with_context(generate()),
+            status=200,
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
 class CreateOrder(Resource):
     def __init__(self):
         self.logger = logging.getLogger("CreateOrder")
 
+    def get(self, customer_id):
+        if not core.find.customer(customer_id):
+            raise EntryNotFound("This customer does not exist.")
+        return order_page(customer_id=customer_id)
+
     def post(self, customer_id):
+        key = request.headers.get("Idempotency-Key")
+        if key is not None:
+            return idempotent(
+                key,
+                lambda: self._create(customer_id),
+                lambda order_id: self._recover(customer_id, order_id),
+            )
+        return self._create(customer_id)
+
+    def _recover(self, customer_id, order_id):
+        # the order created by a request that died before storing its response
+        order = core.find.order(order_id)
+        if not order:
+            raise EntryNotFound("The order created with this key no longer exists.")
+        return self._created(customer_id, order)
+
+    @staticmethod
+    def _created(customer_id, order):
+        headers = {"location": f"api/customer/{customer_id}/order/{order['id']}"}
+        return json_response(
+            {"success": True, "message": "", "code": 0, "data": order},
+            status=201,
+            headers=headers,
+        )
+
+    def _create(self, customer_id):
         customer = core.find.customer(customer_id)
         if not customer:
             raise EntryNotFound("This customer does not exist.")
@@ -35,6 +164,18 @@ class CreateOrder(Resource):
             or not {"payment_method", "type"} <= set(order_data)
         ):
             raise MissingEntryData
+        if current_app.config["ORDER_INGEST_ENABLED"]:
+            ticket = core.ingest.submit(
+                customer_id,
+                order_item_data,
+                order_data.get("payment_method"),
+                order_data.get("type"),
+            )
+            return json_response(
+                {"success": True, "message": "", "code": 0, "data": ticket},
+                status=202,
+                headers={"location": f"api/order/ingest/{ticket['id']}"},
+            )
         order = core.create.order(
             # order_data.get("customer_id"),
             customer_id,
@@ -44,85 +185,71 @@ class CreateOrder(Resource):
         )
         if not order:
             raise ImproperEntryData("The order could not be created.")
-        data = clean_data(
-            {"success": True, "message": "", "code": 0, "data": order}, serialize=True
+        return self._created(customer_id, order)
+
+
+class OrderTicket(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("OrderTicket")
+
+    def get(self, ticket):
+        status = core.ingest.status(ticket)
+        if not status:
+            raise EntryNotFound("This ticket does not exist or has expired.")
+        return json_response(
+            {"success": True, "message": "", "code": 0, "data": status}, status=200
         )
-        headers = {"location": f"api/customer/{customer_id}/order/{order['id']}"}
-        return Response(data, status=201, mimetype="application/json", headers=headers)
 
 
 class ManageOrder(Resource):
     def __init__(self):
         self.logger = logging.getLogger("ManageOrder")
 
-    def get(self, entity_id):
-        order = core.find.order(entity_id)
+    def get(self, order_id):
+        validators = core.find.order_version(order_id)
+        if not validators:
+            raise EntryNotFound
+        etag = entity_etag("order", order_id, *validators)
+        cached = not_modified(etag, validators[1])
+        if cached:
+            return cached
+
+        order = core.find.order(order_id)
         if not order:
             raise EntryNotFound
-        resp = clean_data(
-            {"success": True, "message": "", "code": 0, "data": order}, serialize=True
+        response = json_response(
+            {"success": True, "message": "", "code": 0, "data": order}, status=200
         )
-        return Response(resp, status=200, mimetype="application/json")
+        return with_validators(response, etag, validators[1])
 
-    def delete(self, entity_id):
-        order = core.delete.order(entity_id)
+    def delete(self, order_id):
+        order = core.delete.order(order_id)
         if not order:
             raise EntryNotFound
         return {"success": True, "message": "", "code": 0, "data": {}}, 204
 
-    def put(self, entity_id):
+    def put(self, order_id):
         data = request.get_json()
         order_data = data.get("order")
         if not order_data:
             raise MissingEntryData
 
-        order_entity = core.find.order(entity_id)
-        if not order_entity:
+        data, attempted_entries = core.update.order(order_id, order_data)
+        if not data:
             raise EntryNotFound
 
-        attempted_entries = {}
-
-        if order_data.get("customer_id"):
-            attempted_entries["customer_id"] = True
-            if not core.update.order_customer(entity_id, order_data.get("customer_id")):
-                attempted_entries["customer_id"] = False
-
-        if order_data.get("payment_method"):
-            attempted_entries["payment_method"] = True
-            if not core.update.order_payment_method(
-                entity_id, order_data.get("payment_method")
-            ):
-                attempted_entries["payment_method"] = False
-
-        if order_data.get("order_type"):
-            attempted_entries["order_type"] = True
-            if not core.update.order_type(entity_id, order_data.get("order_type")):
-                attempted_entries["order_type"] = False
-
-        if order_data.get("order_items"):
-            attempted_entries["order_items"] = True
-            if not core.update.order_items(entity_id, order_data.get("order_items")):
-                attempted_entries["order_items"] = False
-
         if not len(attempted_entries):
             # no useful data was provided by the user
             raise ImproperEntryData
 
-        data = core.find.order(entity_id)  # fetch updated data
         success = all(attempted_entries.values())
 
-        if not data:
-            # between updating the data and fetching it again, it vanished!
-            raise DataInconsistencyError
-
         if success:
-            resp = clean_data(
-                {"success": True, "message": "", "code": 0, "data": data},
-                serialize=True,
+            return json_response(
+                {"success": True, "message": "", "code": 0, "data": data}, status=200
             )
-            return Response(resp, status=200, mimetype="application/json")
 
-        resp = clean_data(
+        return json_response(
             {
                 "success": False,
                 "message": "Some items did not successfully update. ",
@@ -130,7 +257,5 @@ class ManageOrder(Resource):
                 "data": data,
                 "results": attempted_entries,
             },
-            serialize=True,
+            status=207,
         )
-
-        return Response(resp, status=207, mimetype="application/json")
@@ -0,0 +1,34 @@
+import logging
+
+from flask_restful import Resource  # type: ignore
+from flask import request
+
+from .serializer import json_response
+from .helper import query_datetime
+
+from .. import core
+from ..errors import ImproperEntryData
+
+DIMENSIONS = ("category", "order_type", "payment_method")
+
+
+class SalesReport(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("SalesReport")
+
+    def get(self):
+        period = request.args.get("period", "day")
+        by = tuple(name for name in request.args.get("by", "").split(",") if name)
+        if period not in ("hour", "day") or not set(by) <= set(DIMENSIONS):
+            raise ImproperEntryData
+
+        report = core.find.sales_report(
+            period,
+            since=query_datetime("since"),
+            until=query_datetime("until"),
+            by=tuple(dict.fromkeys(by)),
+            **{name: request.args.get(name) for name in DIMENSIONS},
+        )
+        return json_response(
+            {"success": True, "message": "", "code": 0, "data": report}, status=200
+        )
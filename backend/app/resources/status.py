@@ -0,0 +1,42 @@
+import logging
+
+from flask import Response
+from flask_restful import Resource  # type: ignore
+
+from .serializer import json_response
+
+from .. import core, db
+from ..database import pool_stats
+from ..metrics import metrics
+
+
+class PoolStats(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("PoolStats")
+
+    def get(self):
+        return json_response(
+            {"success": True, "message": "", "code": 0, "data": pool_stats(db.engine)},
+            status=200,
+        )
+
+
+class IngestStats(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("IngestStats")
+
+    def get(self):
+        return json_response(
+            {"success": True, "message": "", "code": 0, "data": core.ingest.stats()},
+            status=200,
+        )
+
+
+class Metrics(Resource):
+    def __init__(self):
+        self.logger = logging.getLogger("Metrics")
+
+    def get(self):
+        return Response(
+            metrics.render(), status=200, mimetype="text/plain; version=0.0.4"
+        )
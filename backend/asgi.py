@@ -0,0 +1,8 @@
+from app.asgi import init_asgi_app
+
+app = init_asgi_app()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app)
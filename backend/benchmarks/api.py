@@ -0,0 +1,481 @@
+"""Benchmark suite of the API's hot endpoints.
+
+Boots the Flask app against a freshly seeded database, then sends each scenario
+its share of requests from a pool of client threads, and reports the throughput,
+latency percentiles and SQL statements per request of each. The scenarios are
+the operations of docs/swagger.yaml, with path parameters drawn from the seeded
+rows. Results are written as JSON, so that runs on different commits can be
+compared with --compare.
+
+Run from the backend directory:
+
+    python -m benchmarks.api [--scenarios get-order create-customer-order ...] [--list]
+        [--requests 1000] [--concurrency 4] [--orders 5000] [--database URI]
+        [--output results.json] [--compare previous.json]
+
+The database defaults to a temporary SQLite file. A --database (e.g. a local
+PostgreSQL) is emptied and reseeded, so never point it at real data.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import decimal
+import datetime
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+SWAGGER = os.path.join(os.path.dirname(__file__), "..", "..", "docs", "swagger.yaml")
+RESULTS = os.path.join(os.path.dirname(__file__), "results")
+
+# The endpoints run by default
+HOT = [
+    "get-food",
+    "get-addon",
+    "list-food",
+    "list-search",
+    "put-food",
+    "put-addon",
+    "get-customer",
+    "put-customer",
+    "list-customer-search",
+    "create-customer-order",
+    "get-order",
+    "list-order",
+    "put-order",
+    "list-report-sale",
+]
+
+CATEGORIES = ["pizza", "pasta", "salad", "drink", "dessert"]
+SIZES = ["S", "M", "L", None]
+ADDON_TYPES = ["topping", "sauce", "side"]
+PAYMENT_METHODS = ["cash", "card", "online"]
+ORDER_TYPES = ["pickup", "delivery"]
+
+
+def _price(rng: random.Random, low: float, high: float) -> decimal.Decimal:
+    return decimal.Decimal(f"{rng.uniform(low, high):.2f}")
+
+
+def seed(dataset: dict, rng: random.Random) -> dict:
+    """Empties the database and fills it with menu items, customers and orders
+    placed over the last 180 days. Returns the IDs of the seeded rows."""
+    from sqlalchemy import insert
+
+    from app import db
+    from app.commands import _sync_sequence
+    from app.database import (
+        ManageResturantData,
+        Food,
+        Addon,
+        Customer,
+        Order,
+        OrderItem,
+        ItemMod,
+        CustomerOrder,
+    )
+
+    db.drop_all()
+    db.create_all()
+
+    foods = [
+        {
+            "food_id": food_id,
+            "food_name": f"Food {food_id}",
+            "food_category": rng.choice(CATEGORIES),
+            "food_price": _price(rng, 6, 25),
+            "food_size": rng.choice(SIZES),
+        }
+        for food_id in range(1, dataset["foods"] + 1)
+    ]
+    addons = [
+        {
+            "addon_id": addon_id,
+            "addon_name": f"Addon {addon_id}",
+            "addon_type": rng.choice(ADDON_TYPES),
+            "addon_price": _price(rng, 0.5, 4),
+            "addon_size": None,
+        }
+        for addon_id in range(1, dataset["addons"] + 1)
+    ]
+    customers = [
+        {
+            "customer_id": customer_id,
+            "customer_name": f"Customer {customer_id}",
+            "customer_phone_number": f"555{customer_id:07d}",
+            "customer_street": f"{rng.randint(1, 999)} Main St",
+            "customer_city": "Springfield",
+            "customer_province": "ON",
+            "customer_postal_code": f"K{rng.randint(0, 9)}A {rng.randint(0, 9)}B{rng.randint(0, 9)}",
+        }
+        for customer_id in range(1, dataset["customers"] + 1)
+    ]
+    for customer in customers:
+        customer.update(Customer.search_keys(customer))
+
+    now = datetime.datetime.now()
+    orders, links, items, mods = [], [], [], []
+    for order_id in range(1, dataset["orders"] + 1):
+        total = decimal.Decimal(0)
+        for _ in range(rng.randint(1, 4)):
+            food = rng.choice(foods)
+            order_item_id = len(items) + 1
+            items.append(
+                {
+                    "order_item_id": order_item_id,
+                    "order_id": order_id,
+                    "food_id": food["food_id"],
+                    "order_item_price": food["food_price"],
+                }
+            )
+            total += food["food_price"]
+            for addon in rng.sample(addons, rng.randint(0, min(3, len(addons)))):
+                mods.append(
+                    {
+                        "order_item_id": order_item_id,
+                        "addon_id": addon["addon_id"],
+                        "item_mod_qty": 1,
+                        "item_mod_price": addon["addon_price"],
+                    }
+                )
+                total += addon["addon_price"]
+        orders.append(
+            {
+                "order_id": order_id,
+                "order_date": now
+                - datetime.timedelta(seconds=rng.randint(0, 180 * 24 * 3600)),
+                "order_payment_method": rng.choice(PAYMENT_METHODS),
+                "order_type": rng.choice(ORDER_TYPES),
+                "order_total": total,
+            }
+        )
+        links.append(
+            {"customer_id": rng.randint(1, dataset["customers"]), "order_id": order_id}
+        )
+
+    for model, rows in (
+        (Food, foods),
+        (Addon, addons),
+        (Customer, customers),
+        (Order, orders),
+        (CustomerOrder, links),
+        (OrderItem, items),
+        (ItemMod, mods),
+    ):
+        for start in range(0, len(rows), 5000):
+            db.session.execute(insert(model.__table__), rows[start : start + 5000])
+    db.session.commit()
+    for model in (Food, Addon, Customer, Order, OrderItem):
+        _sync_sequence(model)
+    ManageResturantData().rebuild_sales_rollup()
+
+    return {
+        "food_id": [food["food_id"] for food in foods],
+        "addon_id": [addon["addon_id"] for addon in addons],
+        "customer_id": [customer["customer_id"] for customer in customers],
+        "order_id": [order["order_id"] for order in orders],
+    }
+
+
+# Request bodies of the operations that take one, keyed by method and path
+BODIES = {
+    ("POST", "/api/menu/food"): lambda rng, ids: {
+        "food": {
+            "name": f"Food {rng.randint(0, 10**6)}",
+            "price": round(rng.uniform(6, 25), 2),
+            "category": rng.choice(CATEGORIES),
+            "size": "L",
+        }
+    },
+    ("PUT", "/api/menu/food/{food_id}"): lambda rng, ids: {
+        "food": {"price": round(rng.uniform(6, 25), 2)}
+    },
+    ("POST", "/api/menu/addon"): lambda rng, ids: {
+        "name": f"Addon {rng.randint(0, 10**6)}",
+        "type": rng.choice(ADDON_TYPES),
+        "price": round(rng.uniform(0.5, 4), 2),
+    },
+    ("PUT", "/api/menu/addon/{addon_id}"): lambda rng, ids: {
+        "price": round(rng.uniform(0.5, 4), 2)
+    },
+    ("POST", "/api/customer"): lambda rng, ids: {
+        "customer": {
+            "name": f"Customer {rng.randint(0, 10**6)}",
+            "phone": f"555{rng.randint(0, 10**7 - 1):07d}",
+            "address": {
+                "street": "1 Main St",
+                "city": "Springfield",
+                "province": "ON",
+                "postal_code": "K1A 0B1",
+            },
+        }
+    },
+    ("PUT", "/api/customer/{customer_id}"): lambda rng, ids: {
+        "customer": {"name": f"Customer {rng.randint(0, 10**6)}"}
+    },
+    ("POST", "/api/customer/{customer_id}/order"): lambda rng, ids: {
+        "order": {
+            "payment_method": rng.choice(PAYMENT_METHODS),
+            "type": rng.choice(ORDER_TYPES),
+        },
+        "items": {
+            str(food_id): rng.sample(ids["addon_id"], min(2, len(ids["addon_id"])))
+            for food_id in rng.sample(ids["food_id"], min(2, len(ids["food_id"])))
+        },
+    },
+    ("PUT", "/api/order/{order_id}"): lambda rng, ids: {
+        "order": {"payment_method": rng.choice(PAYMENT_METHODS)}
+    },
+}
+
+
+# Query strings of the operations that need one, keyed by method and path
+QUERIES = {
+    ("GET", "/api/report/sales"): lambda rng, ids: {
+        "period": rng.choice(["hour", "day"]),
+        "since": (
+            datetime.datetime.now() - datetime.timedelta(days=rng.randint(1, 30))
+        ).isoformat(),
+        "by": rng.choice(["", "category", "category,payment_method"]),
+    },
+    ("GET", "/api/menu/search"): lambda rng, ids: {
+        "q": rng.choice(CATEGORIES + ADDON_TYPES)[: rng.randint(2, 6)]
+        + f" {rng.choice(ids['food_id'])}"[: rng.randint(0, 3)]
+    },
+    ("GET", "/api/customer/search"): lambda rng, ids: (
+        {"phone": f"555{rng.choice(ids['customer_id']):07d}"[:8]}
+        if rng.random() < 0.5
+        else {"name": f"customer {rng.choice(ids['customer_id'])}"[:11]}
+    ),
+}
+
+
+def scenario_name(method: str, path: str) -> str:
+    """Names an operation after its method and resource, e.g. GET
+    /api/order/{order_id} is get-order, GET /api/order is list-order and POST
+    /api/customer/{customer_id}/order is create-customer-order."""
+    parts = [part for part in path.split("/")[1:] if part not in ("api", "menu")]
+    names = [part.rstrip("s") for part in parts if not part.startswith("{")]
+    if parts[-1].startswith("{"):
+        verb = {"GET": "get", "PUT": "put", "DELETE": "delete"}[method]
+        return f"{verb}-{names[-1]}"
+    verb = {"GET": "list", "POST": "create"}[method]
+    return f"{verb}-{'-'.join(names)}"
+
+
+def load_scenarios() -> dict:
+    """Builds a scenario out of every read, create and update operation of the
+    swagger document whose path parameters and body can be filled in."""
+    import yaml
+
+    with open(SWAGGER) as file:
+        spec = yaml.safe_load(file)
+
+    scenarios = {}
+    for path, operations in spec["paths"].items():
+        if not path.startswith("/api/") or path.startswith("/api/status"):
+            continue
+        for method in ("get", "post", "put"):
+            if method not in operations:
+                continue
+            method = method.upper()
+            if method != "GET" and (method, path) not in BODIES:
+                continue
+            params = re.findall(r"{(\w+)}", path)
+            if not set(params) <= {"food_id", "addon_id", "customer_id", "order_id"}:
+                continue
+            scenarios.setdefault(
+                scenario_name(method, path),
+                {"method": method, "path": path, "params": params},
+            )
+    return scenarios
+
+
+def request_args(scenario: dict, rng: random.Random, ids: dict) -> tuple:
+    path = scenario["path"].format(
+        **{param: rng.choice(ids[param]) for param in scenario["params"]}
+    )
+    query = QUERIES.get((scenario["method"], scenario["path"]))
+    if query:
+        path += "?" + urlencode(query(rng, ids))
+    body = BODIES.get((scenario["method"], scenario["path"]))
+    return path, body(rng, ids) if body else None
+
+
+def statements(response) -> int:
+    match = re.search(
+        r'desc="(\d+) statements"', response.headers.get("Server-Timing", "")
+    )
+    return int(match.group(1)) if match else 0
+
+
+def run(app, scenario: dict, ids: dict, requests: int, concurrency: int, seed_: int):
+    """Sends `requests` requests of a scenario from `concurrency` threads."""
+
+    def worker(index: int) -> list:
+        rng = random.Random(seed_ * 1000 + index)
+        client = app.test_client()
+        samples = []
+        for _ in range(index, requests, concurrency):
+            path, body = request_args(scenario, rng, ids)
+            started = time.perf_counter()
+            response = client.open(path, method=scenario["method"], json=body)
+            samples.append(
+                (
+                    time.perf_counter() - started,
+                    response.status_code < 400,
+                    statements(response),
+                )
+            )
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        samples = [
+            sample
+            for part in executor.map(worker, range(concurrency))
+            for sample in part
+        ]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(sample[0] for sample in samples)
+    quantiles = (
+        statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    )
+    return {
+        "method": scenario["method"],
+        "path": scenario["path"],
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if not sample[1]),
+        "rps": len(samples) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "statements": statistics.fmean(sample[2] for sample in samples),
+    }
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, path: str) -> None:
+    with open(path) as file:
+        previous = json.load(file)
+    print(f"\nCompared to {previous['commit']} ({path}):")
+    print(f"{'scenario':<22} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, result in results["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if not before:
+            continue
+        changes = [
+            (result[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(f"{name:<22} " + " ".join(f"{change:>+8.1f}%" for change in changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", default=HOT)
+    parser.add_argument("--list", action="store_true", help="List the scenarios.")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--foods", type=int, default=40)
+    parser.add_argument("--addons", type=int, default=30)
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database", help="Database URI, emptied before seeding.")
+    parser.add_argument("--output", help="Path of the JSON results.")
+    parser.add_argument("--compare", help="JSON results of a previous run.")
+    args = parser.parse_args()
+
+    scenarios = load_scenarios()
+    if args.list:
+        for name, scenario in scenarios.items():
+            print(f"{name:<22} {scenario['method']:<5} {scenario['path']}")
+        return
+    unknown = set(args.scenarios) - set(scenarios)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.database:
+        os.environ["DATABASE_URI"] = args.database
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        os.environ["DATABASE_URI"] = f"sqlite:///{path}"
+    os.environ.setdefault("LOG_LEVEL", "30")
+    os.environ.setdefault("REQUEST_PROFILING", "true")
+
+    from app import init_app, db
+
+    app = init_app()
+    dataset = {
+        "foods": args.foods,
+        "addons": args.addons,
+        "customers": args.customers,
+        "orders": args.orders,
+    }
+    with app.app_context():
+        ids = seed(dataset, random.Random(args.seed))
+        dialect = db.engine.dialect.name
+
+    results = {
+        "commit": commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": dialect,
+        "dataset": dataset,
+        "seed": args.seed,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "scenarios": {},
+    }
+    print(
+        f"{'scenario':<22} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'stmts':>6} {'errors':>6}"
+    )
+    for name in args.scenarios:
+        scenario = scenarios[name]
+        if args.warmup:
+            run(app, scenario, ids, args.warmup, 1, args.seed)
+        result = run(app, scenario, ids, args.requests, args.concurrency, args.seed)
+        results["scenarios"][name] = result
+        print(
+            f"{name:<22} {result['rps']:>9.1f} {result['p50_ms']:>8.2f} "
+            f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['statements']:>6.1f} {result['errors']:>6}"
+        )
+
+    output = args.output or os.path.join(
+        RESULTS, f"api-{results['commit']}-{datetime.datetime.now():%Y%m%d%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {output}", file=sys.stderr)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark of the WSGI and ASGI entry points under concurrent load.
+
+Seeds a database, then starts each server in its own process against it and
+sends the same mix of read requests at every concurrency level, reporting the
+throughput and latency percentiles of each. The WSGI app runs on the threaded
+development server, and the ASGI app on a single uvicorn worker.
+
+Run from the backend directory:
+
+    python -m benchmarks.concurrency [--concurrency 1 10 50] [--requests 500]
+
+DATABASE_URI defaults to a temporary SQLite database.
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PATHS = [
+    "/api/menu/food/1",
+    "/api/menu/food?limit=20",
+    "/api/customer/1",
+    "/api/order/{order_id}",
+    "/api/order?limit=20",
+    "/api/customer/1/order?limit=10",
+]
+
+SERVERS = {
+    "wsgi": ["-m", "flask", "--app", "wsgi", "run", "--with-threads", "--port"],
+    "asgi": ["-m", "uvicorn", "asgi:app", "--log-level", "warning", "--port"],
+}
+
+
+def seed(orders: int) -> None:
+    from app import init_app
+
+    app = init_app()
+    client = app.test_client()
+    for index in range(10):
+        client.post(
+            "/api/menu/food",
+            json={
+                "food": {
+                    "name": f"Food {index}",
+                    "price": 10 + index,
+                    "category": "pizza",
+                    "size": "L",
+                }
+            },
+        )
+        client.post(
+            "/api/menu/addon",
+            json={"name": f"Addon {index}", "type": "topping", "price": 1.5},
+        )
+    client.post(
+        "/api/customer",
+        json={"customer": {"name": "Benchmark", "phone": "5550000", "address": {}}},
+    )
+    for index in range(orders):
+        client.post(
+            "/api/customer/1/order",
+            json={
+                "order": {"payment_method": "cash", "type": "pickup"},
+                "items": {str(index % 10 + 1): [1, 2], str((index + 1) % 10 + 1): []},
+            },
+        )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(url).read()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def fetch(url: str) -> float:
+    started = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def run(base: str, concurrency: int, requests: int, orders: int) -> dict:
+    urls = [
+        base + PATHS[index % len(PATHS)].format(order_id=index % orders + 1)
+        for index in range(requests)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        latencies = sorted(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": requests / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=200)
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URI"):
+        path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        os.environ["DATABASE_URI"] = f"sqlite:///{path}"
+    os.environ.setdefault("LOG_LEVEL", "30")
+    seed(args.orders)
+
+    print(
+        f"{'server':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for name, command in SERVERS.items():
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, *command, str(port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            wait_for(base + PATHS[0])
+            for concurrency in args.concurrency:
+                result = run(base, concurrency, args.requests, args.orders)
+                print(
+                    f"{name:<6} {concurrency:>7} {result['rps']:>9.1f} "
+                    f"{result['p50']:>8.2f} {result['p95']:>8.2f} {result['p99']:>8.2f}"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
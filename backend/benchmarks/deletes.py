@@ -0,0 +1,109 @@
+"""Benchmark of deleting customers and orders, with all of their rows.
+
+Seeds a database where a few customers hold many orders each, then deletes
+customers one by one through DELETE /api/customer/{customer_id} and a sample of
+the remaining orders through DELETE /api/order/{order_id}, and reports the SQL
+statements and time each delete took.
+
+Run from the backend directory:
+
+    python -m benchmarks.deletes [--customers 10] [--orders 5000] [--deletes 5]
+        [--database URI]
+
+The database defaults to a temporary SQLite file. A --database (e.g. a local
+PostgreSQL) is emptied and reseeded, so never point it at real data.
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from .api import commit, seed, statements
+
+
+def delete_all(app, paths: list[str]) -> dict:
+    """Sends a DELETE to each path in turn."""
+    client = app.test_client()
+    latencies, counts, errors = [], [], 0
+    for path in paths:
+        started = time.perf_counter()
+        response = client.delete(path)
+        latencies.append(time.perf_counter() - started)
+        counts.append(statements(response))
+        errors += response.status_code >= 400
+    return {
+        "requests": len(paths),
+        "errors": errors,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "statements": statistics.fmean(counts),
+        "max_statements": max(counts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--foods", type=int, default=40)
+    parser.add_argument("--addons", type=int, default=30)
+    parser.add_argument("--customers", type=int, default=10)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--deletes", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database", help="Database URI, emptied before seeding.")
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ["DATABASE_URI"] = args.database
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        os.environ["DATABASE_URI"] = f"sqlite:///{path}"
+    os.environ.setdefault("LOG_LEVEL", "30")
+    os.environ.setdefault("REQUEST_PROFILING", "true")
+
+    from app import init_app, db
+    from app.database import CustomerOrder
+
+    app = init_app()
+    dataset = {
+        "foods": args.foods,
+        "addons": args.addons,
+        "customers": args.customers,
+        "orders": args.orders,
+    }
+    rng = random.Random(args.seed)
+    with app.app_context():
+        ids = seed(dataset, rng)
+        customers = ids["customer_id"][: args.deletes]
+        owned = db.session.scalars(
+            db.select(CustomerOrder.order_id).where(
+                CustomerOrder.customer_id.in_(customers)
+            )
+        ).all()
+        dialect = db.engine.dialect.name
+    orders = rng.sample(sorted(set(ids["order_id"]) - set(owned)), args.deletes)
+
+    print(
+        f"{dialect} database, commit {commit()}, "
+        f"{args.orders / args.customers:.0f} orders per customer"
+    )
+    print(
+        f"{'delete':<10} {'requests':>8} {'mean ms':>9} {'max ms':>9} "
+        f"{'stmts':>7} {'max':>6} {'errors':>6}"
+    )
+    for name, paths in (
+        ("customer", [f"/api/customer/{customer_id}" for customer_id in customers]),
+        ("order", [f"/api/order/{order_id}" for order_id in orders]),
+    ):
+        result = delete_all(app, paths)
+        print(
+            f"{name:<10} {result['requests']:>8} {result['mean_ms']:>9.2f} "
+            f"{result['max_ms']:>9.2f} {result['statements']:>7.1f} "
+            f"{result['max_statements']:>6} {result['errors']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Micro-benchmark of response serialization.
+
+Compares the previous path (raw Decimal/datetime dicts encoded with a
+JSONEncoder subclass, then parsed back when not serializing) against the
+per-model field specs and shared encoder used by the resources.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization [--orders 200] [--items 5] [--repeat 50]
+"""
+
+import json
+import decimal
+import datetime
+import argparse
+import timeit
+
+from app.database import Order, OrderItem, ItemMod
+from app.resources.serializer import dumps
+
+
+class LegacyEncoder(json.JSONEncoder):
+    def default(self, z):
+        if isinstance(z, datetime.datetime):
+            return str(z)
+        elif isinstance(z, decimal.Decimal):
+            return float(z)
+        else:
+            return super().default(z)
+
+
+def legacy_clean_data(data, serialize=False):
+    data = json.dumps(data, cls=LegacyEncoder)
+    if serialize:
+        return data
+    return json.loads(data)
+
+
+def legacy_dict(row) -> dict:
+    """Builds the dict the models used to, holding raw column values."""
+    return {key: getattr(row, attr) for key, attr in type(row).__fields__}
+
+
+def build_orders(count: int, items: int) -> list:
+    orders = []
+    for order_id in range(1, count + 1):
+        order = Order(
+            order_id=order_id,
+            order_date=datetime.datetime(2024, 1, 1, 12, 30),
+            order_payment_method="Visa Debit",
+            order_type="Delivery",
+            order_total=decimal.Decimal("42.50"),
+        )
+        order_items = []
+        for index in range(items):
+            order_item = OrderItem(
+                order_item_id=order_id * items + index,
+                order_id=order_id,
+                food_id=index + 1,
+                order_item_price=decimal.Decimal("12.50"),
+            )
+            mods = [
+                ItemMod(
+                    order_item_id=order_item.order_item_id,
+                    addon_id=addon_id,
+                    item_mod_qty=1,
+                    item_mod_price=decimal.Decimal("1.25"),
+                )
+                for addon_id in range(3)
+            ]
+            order_items.append((order_item, mods))
+        orders.append((order, order_items))
+    return orders
+
+
+def payload(orders, to_dict) -> dict:
+    data = []
+    for order, order_items in orders:
+        order_dict = to_dict(order)
+        order_dict["items"] = []
+        for order_item, mods in order_items:
+            item = to_dict(order_item)
+            item["addons"] = [to_dict(mod) for mod in mods]
+            order_dict["items"].append(item)
+        order_dict["price"] = order.order_total
+        data.append(order_dict)
+    return {"success": True, "message": "", "code": 0, "data": data}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    orders = build_orders(args.orders, args.items)
+    paths = {
+        "legacy (serialize=True)": lambda: legacy_clean_data(
+            payload(orders, legacy_dict), serialize=True
+        ),
+        "legacy (serialize=False)": lambda: legacy_clean_data(
+            payload(orders, legacy_dict)
+        ),
+        "serializer": lambda: dumps(payload(orders, lambda row: row.convert_to_dict())),
+    }
+
+    assert json.loads(paths["serializer"]()) == json.loads(
+        paths["legacy (serialize=True)"]()
+    ), "both paths must produce the same document"
+
+    for name, path in paths.items():
+        best = min(timeit.repeat(path, number=5, repeat=args.repeat)) / 5
+        print(f"{name:<26} {best * 1000:8.2f} ms per {args.orders} orders")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,72 @@ from dotenv import load_dotenv
 # Load env from .env if possible.
 load_dotenv(verbose=True)
 
+# Pool defaults per database driver, overridable through the DB_POOL_* variables.
+# MySQL closes idle connections server side (wait_timeout), so its connections are
+# recycled early and pinged before use. SQLite has no network connection to go stale.
+ENGINE_DEFAULTS = {
+    "mysql": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+        "pool_recycle": 280,
+        "pool_pre_ping": True,
+    },
+    "postgresql": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    },
+    "sqlite": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+    },
+}
+
+
+def engine_options(uri: str) -> dict:
+    """Builds the SQLAlchemy engine options for a database URI from the defaults
+    of its driver, and the DB_POOL_* environment variables."""
+    uri = uri or ""
+    backend = uri.split(":", 1)[0].split("+", 1)[0]
+    if backend == "sqlite" and (uri.rstrip("/") == "sqlite:" or ":memory:" in uri):
+        # in-memory databases live on a single connection, so they can't be pooled
+        return {}
+
+    options = dict(ENGINE_DEFAULTS.get(backend, {}))
+    for option, variable, convert in (
+        ("pool_size", "DB_POOL_SIZE", int),
+        ("max_overflow", "DB_MAX_OVERFLOW", int),
+        ("pool_timeout", "DB_POOL_TIMEOUT", float),
+        ("pool_recycle", "DB_POOL_RECYCLE", int),
+        (
+            "pool_pre_ping",
+            "DB_POOL_PRE_PING",
+            lambda v: v.lower() in ("1", "true", "yes"),
+        ),
+    ):
+        if os.environ.get(variable):
+            options[option] = convert(os.environ[variable])
+    return options
+
 
 class Config:
     ENVIRONMENT = os.environ.get("ENVIRONMENT")
     FLASK_DEBUG = os.environ.get("FLASK_DEBUG")
 
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URI")
+    # Used by the ASGI entry point, derived from DATABASE_URI when unset
+    ASYNC_DATABASE_URI = os.environ.get("ASYNC_DATABASE_URI")
     SQLALCHEMY_ECHO = os.environ.get("SQLALCHEMY_ECHO", False)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Longest a single statement may run, in milliseconds (MySQL & PostgreSQL only)
+    DB_STATEMENT_TIMEOUT = int(os.environ.get("DB_STATEMENT_TIMEOUT", 30000))
 
     silent_exceptions = os.environ.get(
         "SILENT_EXCEPTIONS", ["ENTRY_NOT_FOUND", "MISSING_ENTRY_DATA"]
@@ -26,3 +84,78 @@ class Config:
         SILENT_EXCEPTIONS.append(value)
 
     LOG_LEVEL = int(os.environ.get("LOG_LEVEL", 10))
+
+    # Page sizes of the collection endpoints
+    PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", 50))
+    PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", 200))
+
+    # Number of orders fetched per round trip when exporting orders
+    EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 500))
+    # Number of rows inserted per transaction by the import-data command
+    IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", 5000))
+
+    # In-process cache in front of menu (food & addon) lookups
+    MENU_CACHE_ENABLED = os.environ.get("MENU_CACHE_ENABLED", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    MENU_CACHE_SIZE = int(os.environ.get("MENU_CACHE_SIZE", 1024))
+    MENU_CACHE_TTL = float(os.environ.get("MENU_CACHE_TTL", 300))
+
+    # Seconds between reloads of the in-memory menu search index from the database
+    MENU_SEARCH_REFRESH = float(os.environ.get("MENU_SEARCH_REFRESH", 300))
+
+    # Accept created orders onto an in-process queue, answering with a ticket to poll,
+    # and write them from a background thread in batches of up to
+    # ORDER_INGEST_BATCH_SIZE, one transaction per batch
+    ORDER_INGEST_ENABLED = os.environ.get("ORDER_INGEST_ENABLED", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    ORDER_INGEST_BATCH_SIZE = int(os.environ.get("ORDER_INGEST_BATCH_SIZE", 100))
+    # Seconds the writer waits for more orders before writing a partial batch
+    ORDER_INGEST_BATCH_WAIT = float(os.environ.get("ORDER_INGEST_BATCH_WAIT", 0.01))
+    # Orders waiting to be written, past which new orders wait up to
+    # ORDER_INGEST_PUT_TIMEOUT seconds for room before being turned away with a 503
+    ORDER_INGEST_QUEUE_SIZE = int(os.environ.get("ORDER_INGEST_QUEUE_SIZE", 1000))
+    ORDER_INGEST_PUT_TIMEOUT = float(os.environ.get("ORDER_INGEST_PUT_TIMEOUT", 0.5))
+    # Number of written orders whose status is kept, and for how many seconds
+    ORDER_INGEST_STATUS_SIZE = int(os.environ.get("ORDER_INGEST_STATUS_SIZE", 100000))
+    ORDER_INGEST_STATUS_TTL = float(os.environ.get("ORDER_INGEST_STATUS_TTL", 3600))
+
+    # Changes to orders kept for clients of the live order feed resuming after a
+    # disconnect, and buffered for each client before a slow one is dropped
+    ORDER_EVENTS_HISTORY = int(os.environ.get("ORDER_EVENTS_HISTORY", 1000))
+    ORDER_EVENTS_BUFFER = int(os.environ.get("ORDER_EVENTS_BUFFER", 256))
+    # Seconds between keepalives on an idle feed, and milliseconds clients wait
+    # before reconnecting
+    ORDER_EVENTS_HEARTBEAT = float(os.environ.get("ORDER_EVENTS_HEARTBEAT", 15))
+    ORDER_EVENTS_RETRY = int(os.environ.get("ORDER_EVENTS_RETRY", 3000))
+
+    # Responses to order creations sent with an Idempotency-Key header are kept
+    # this many seconds, the most recent of them also in memory
+    IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", 86400))
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 1024))
+    # Seconds a retry waits for the first request with its key to finish, and after
+    # which a first request that created nothing yet is presumed lost
+    IDEMPOTENCY_WAIT = float(os.environ.get("IDEMPOTENCY_WAIT", 10))
+    IDEMPOTENCY_LOCK_TIMEOUT = float(os.environ.get("IDEMPOTENCY_LOCK_TIMEOUT", 60))
+
+    # Report the SQL statements of each request in a Server-Timing header & log line
+    REQUEST_PROFILING = os.environ.get("REQUEST_PROFILING", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    # Requests issuing more statements than this are logged as warnings (0 disables)
+    REQUEST_STATEMENT_THRESHOLD = int(os.environ.get("REQUEST_STATEMENT_THRESHOLD", 20))
+
+    # Expose request, database and cache metrics at /metrics. Database time is only
+    # recorded while REQUEST_PROFILING is on
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
@@ -0,0 +1,50 @@
+import pytest
+
+from app import init_app
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The API on a SQLite database of its own."""
+    monkeypatch.setattr(
+        Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}"
+    )
+    return init_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def customer_id(client) -> int:
+    """A customer able to order the foods 1 and 2, with the addons 1 and 2."""
+    for name, price in (("Margherita", 12.5), ("Pepperoni", 14)):
+        client.post(
+            "/api/menu/food",
+            json={
+                "food": {"name": name, "price": price, "category": "pizza", "size": "L"}
+            },
+        )
+    for name in ("Olives", "Basil"):
+        client.post(
+            "/api/menu/addon", json={"name": name, "type": "topping", "price": 1.25}
+        )
+    response = client.post(
+        "/api/customer",
+        json={
+            "customer": {
+                "name": "Ada",
+                "phone": "555-0100",
+                "address": {
+                    "street": "1 Main St",
+                    "city": "Springfield",
+                    "province": "ON",
+                    "postal_code": "A1A 1A1",
+                },
+            }
+        },
+    )
+    return response.get_json()["data"]["id"]
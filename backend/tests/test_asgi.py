@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+
+from app.asgi import AsyncAPI
+
+
+def run(app, requests):
+    """Sends requests to the ASGI app, on aiosqlite, returning the responses of
+    `requests(client)`."""
+
+    async def send():
+        api = AsyncAPI(app)
+        transport = httpx.ASGITransport(app=api)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await requests(client)
+        finally:
+            await api.engine.dispose()
+
+    return asyncio.run(send())
+
+
+def test_menu_routes(app, customer_id):
+    async def requests(client):
+        foods = await client.get("/api/menu/food", params={"limit": 1})
+        rest = await client.get(
+            "/api/menu/food", params={"cursor": foods.json()["data"]["next"]}
+        )
+        toppings = await client.get("/api/menu/addon", params={"type": "topping"})
+        food = await client.get("/api/menu/food/1")
+        cached = await client.get(
+            "/api/menu/food/1", headers={"If-None-Match": food.headers["ETag"]}
+        )
+        missing = await client.get("/api/menu/addon/9")
+        return foods, rest, toppings, food, cached, missing
+
+    foods, rest, toppings, food, cached, missing = run(app, requests)
+    assert [item["name"] for item in foods.json()["data"]["results"]] == ["Margherita"]
+    assert [item["name"] for item in rest.json()["data"]["results"]] == ["Pepperoni"]
+    assert len(toppings.json()["data"]["results"]) == 2
+    assert food.json()["data"]["price"] == 12.5
+    assert cached.status_code == 304
+    assert missing.status_code == 404
+
+
+def test_order_routes(app, customer_id):
+    order = {
+        "order": {"payment_method": "cash", "type": "pickup"},
+        "items": {"1": [1, 2], "2": []},
+    }
+
+    async def requests(client):
+        created = await client.post(f"/api/customer/{customer_id}/order", json=order)
+        order_id = created.json()["data"]["id"]
+        fetched = await client.get(f"/api/order/{order_id}")
+        listed = await client.get(f"/api/customer/{customer_id}/order")
+        unknown = await client.post(
+            f"/api/customer/{customer_id}/order", json=dict(order, items={"9": []})
+        )
+        # handed to the Flask app, which stores the response under the key
+        keyed = await client.post(
+            f"/api/customer/{customer_id}/order",
+            json=order,
+            headers={"Idempotency-Key": "key-1"},
+        )
+        return created, fetched, listed, unknown, keyed
+
+    created, fetched, listed, unknown, keyed = run(app, requests)
+    assert created.status_code == 201
+    assert created.json()["data"]["price"] == 29.0
+    assert created.headers["location"].endswith(
+        f"/order/{created.json()['data']['id']}"
+    )
+    assert fetched.json()["data"]["price"] == 29.0
+    assert len(fetched.json()["data"]["items"]) == 2
+    assert [entry["id"] for entry in listed.json()["data"]["results"]] == [
+        created.json()["data"]["id"]
+    ]
+    assert unknown.status_code == 400
+    assert keyed.status_code == 201
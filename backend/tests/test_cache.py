@@ -0,0 +1,17 @@
+from app import db
+from app.database import Food
+from app.database.cache import MenuCache
+
+
+def test_rows_read_before_an_eviction_are_not_stored(app, customer_id):
+    cache = MenuCache()
+    with app.app_context():
+        generation = cache.generation()
+        food = db.session.get(Food, 1)
+        # updated and evicted by another request meanwhile
+        cache.evict(Food, 1)
+        cache.store(food, generation)
+        assert cache.load_detached(Food, 1) is None
+
+        cache.store(food, cache.generation())
+        assert cache.load_detached(Food, 1).food_name == "Margherita"
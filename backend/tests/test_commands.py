@@ -0,0 +1,56 @@
+import json
+
+from app import db
+from app.database import Food
+
+
+def import_foods(app, tmp_path, rows: list[dict]):
+    path = tmp_path / "foods.jsonl"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    return app.test_cli_runner().invoke(args=["import-data", "food", str(path)])
+
+
+def test_imported_rows_get_the_defaults_of_missing_columns(app, tmp_path):
+    result = import_foods(
+        app,
+        tmp_path,
+        [
+            {
+                "food_id": 7,
+                "food_name": "Margherita",
+                "food_category": "pizza",
+                "food_price": "12.50",
+                "food_size": "L",
+            },
+            {"food_name": "Fries", "food_category": "side", "food_price": "4"},
+            {
+                "food_name": "Salad",
+                "food_category": "side",
+                "food_price": "6",
+                "food_size": "",
+                "food_version": "",
+            },
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        foods = db.session.scalars(db.select(Food).order_by(Food.food_id)).all()
+        assert [(food.food_id, food.food_name) for food in foods] == [
+            (7, "Margherita"),
+            (8, "Fries"),
+            (9, "Salad"),
+        ]
+        assert [food.food_version for food in foods] == [1, 1, 1]
+
+
+def test_invalid_values_are_reported_with_their_row(app, tmp_path):
+    result = import_foods(
+        app,
+        tmp_path,
+        [
+            {"food_name": "Fries", "food_category": "side", "food_price": "4"},
+            {"food_name": "Salad", "food_category": "side", "food_price": "six"},
+        ],
+    )
+    assert result.exit_code == 1
+    assert "Row 2 has an invalid value" in result.output
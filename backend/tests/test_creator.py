@@ -0,0 +1,51 @@
+ADDRESS = {
+    "street": "1 Main St",
+    "city": "Springfield",
+    "province": "ON",
+    "postal_code": "A1A 1A1",
+}
+
+
+def test_malformed_rows_fail_on_their_own(client):
+    response = client.post(
+        "/api/customer",
+        json={
+            "customer": [
+                {"name": "Ada", "phone": "555-0100", "address": ADDRESS},
+                {"name": "Bob", "phone": "555-0101", "address": "oops"},
+                {"name": None, "phone": "555-0102"},
+                {"name": "Cy", "phone": 5550103},
+                "oops",
+            ]
+        },
+    )
+    assert response.status_code == 207
+    results = response.get_json()["data"]
+    assert [result["success"] for result in results] == [
+        True,
+        False,
+        False,
+        False,
+        False,
+    ]
+    assert results[0]["data"]["name"] == "Ada"
+    assert results[1]["message"] == "The address must be an object."
+    assert results[2]["message"] == "customer_name is required."
+    assert results[3]["message"] == "customer_phone_number must be a string."
+
+
+def test_menu_rows_need_their_required_values(client):
+    response = client.post(
+        "/api/menu/food",
+        json={
+            "food": [
+                {"name": "Margherita", "price": 12.5, "category": "pizza", "size": "L"},
+                {"name": "Garlic bread", "price": 4, "category": None},
+                {"name": "Salad", "price": None, "category": "side"},
+            ]
+        },
+    )
+    assert response.status_code == 207
+    results = response.get_json()["data"]
+    assert [result["success"] for result in results] == [True, False, False]
+    assert results[1]["message"] == "food_category is required."
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from app import db
+from app.database import CustomerOrder, ItemMod, Order, OrderItem, SalesRollup
+
+from tests.test_manager import create_order
+
+
+def add_customer(client, name: str, phone: str) -> int:
+    response = client.post(
+        "/api/customer",
+        json={"customer": {"name": name, "phone": phone, "address": {}}},
+    )
+    assert response.status_code == 201
+    return response.get_json()["data"]["id"]
+
+
+def search(client, **args) -> list[str]:
+    response = client.get("/api/customer/search", query_string=args)
+    assert response.status_code == 200
+    return sorted(
+        customer["name"] for customer in response.get_json()["data"]["results"]
+    )
+
+
+def test_customers_are_found_by_phone_digits_and_name(client):
+    grace = add_customer(client, "Grace Hopper", "(555) 010-2000")
+    add_customer(client, "Alan Turing", "+1 555 020 3000")
+    add_customer(client, "grace kelly", "555.020.4000")
+
+    assert search(client, phone="555-010") == ["Grace Hopper"]
+    assert search(client, phone="5550102000", match="exact") == ["Grace Hopper"]
+    assert search(client, phone="1555020") == ["Alan Turing"]
+    assert search(client, name="GRACE") == ["Grace Hopper", "grace kelly"]
+    assert search(client, name="grace h", phone="555") == ["Grace Hopper"]
+    # only phone numbers are matched exactly
+    assert search(client, phone="555010", match="exact") == []
+
+    response = client.put(
+        f"/api/customer/{grace}", json={"customer": {"phone": "555 999 0000"}}
+    )
+    assert response.status_code == 200
+    assert search(client, phone="555010") == []
+    assert search(client, phone="555-999") == ["Grace Hopper"]
+
+
+def test_searches_need_a_usable_term(client):
+    assert client.get("/api/customer/search").status_code == 400
+    response = client.get("/api/customer/search", query_string={"phone": "call me"})
+    assert response.status_code == 400
+
+
+def count(model) -> int:
+    return db.session.scalar(db.select(db.func.count()).select_from(model))
+
+
+def test_deleting_a_customer_removes_their_orders(app, client, customer_id):
+    create_order(client, customer_id)
+    create_order(client, customer_id)
+    other_id = add_customer(client, "Grace Hopper", "555-0199")
+    kept = create_order(client, other_id)
+
+    assert client.delete(f"/api/customer/{customer_id}").status_code == 204
+    assert client.get(f"/api/customer/{customer_id}").status_code == 404
+    with app.app_context():
+        assert db.session.scalars(db.select(Order.order_id)).all() == [kept]
+        assert count(CustomerOrder) == 1
+        assert count(OrderItem) == 2
+        assert count(ItemMod) == 2
+        items, sales = db.session.execute(
+            db.select(
+                db.func.sum(SalesRollup.rollup_items),
+                db.func.sum(SalesRollup.rollup_sales),
+            ).where(SalesRollup.rollup_grain == "day")
+        ).one()
+        assert (items, sales) == (2, Decimal("29.00"))
@@ -0,0 +1,67 @@
+from app import db
+from app.database import ManageResturantData, OrderItem
+
+from tests.test_manager import create_order
+
+
+def etag(client, order_id: int) -> str:
+    response = client.get(f"/api/order/{order_id}")
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_unchanged_orders_are_not_modified(client, customer_id):
+    order_id = create_order(client, customer_id)
+    response = client.get(f"/api/order/{order_id}")
+
+    cached = client.get(
+        f"/api/order/{order_id}", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == response.headers["ETag"]
+    cached = client.get(
+        f"/api/order/{order_id}",
+        headers={"If-Modified-Since": response.headers["Last-Modified"]},
+    )
+    assert cached.status_code == 304
+    changed = client.get(f"/api/order/{order_id}", headers={"If-None-Match": '"old"'})
+    assert changed.status_code == 200
+
+
+def test_every_change_of_an_order_changes_its_etag(app, client, customer_id):
+    order_id = create_order(client, customer_id)
+    etags = [etag(client, order_id)]
+
+    response = client.put(
+        f"/api/order/{order_id}", json={"order": {"order_type": "delivery"}}
+    )
+    assert response.status_code == 200
+    etags.append(etag(client, order_id))
+
+    with app.app_context():
+        order_item_id = db.session.scalar(
+            db.select(OrderItem.order_item_id).where(
+                OrderItem.order_id == order_id, OrderItem.food_id == 1
+            )
+        )
+        ManageResturantData().remove_item_mod(order_item_id, 1)
+    etags.append(etag(client, order_id))
+
+    response = client.post(
+        "/api/customer",
+        json={
+            "customer": {
+                "name": "Grace",
+                "phone": "555-0199",
+                "address": {"street": "2 Main St", "city": "Springfield"},
+            }
+        },
+    )
+    other_id = response.get_json()["data"]["id"]
+    response = client.put(
+        f"/api/order/{order_id}", json={"order": {"customer_id": other_id}}
+    )
+    assert response.status_code == 200
+    etags.append(etag(client, order_id))
+
+    assert len(set(etags)) == 4
@@ -0,0 +1,46 @@
+from sqlalchemy import event
+
+from app import core, db
+
+
+def selects(app, order_id: int) -> int:
+    """Counts the SELECTs of looking up an order."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, many):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            assert core.find.order(order_id)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+def test_an_order_is_found_in_a_bounded_number_of_selects(app, client, customer_id):
+    for number in range(4):
+        response = client.post(
+            "/api/menu/food",
+            json={
+                "food": {"name": f"Calzone {number}", "price": 9, "category": "calzone"}
+            },
+        )
+        assert response.status_code == 201
+
+    order_ids = []
+    for items in ({"1": [1]}, {str(food_id): [1, 2] for food_id in range(1, 7)}):
+        response = client.post(
+            f"/api/customer/{customer_id}/order",
+            json={
+                "order": {"payment_method": "cash", "type": "pickup"},
+                "items": items,
+            },
+        )
+        assert response.status_code == 201
+        order_ids.append(response.get_json()["data"]["id"])
+
+    small, large = (selects(app, order_id) for order_id in order_ids)
+    assert small == large <= 3
@@ -0,0 +1,111 @@
+import threading
+from datetime import timedelta
+
+import pytest
+
+from app import core, db
+from app.database import IdempotencyKey, Order, idempotency_store
+from app.database.models import utcnow
+from app.errors import RequestInProgress
+
+ORDER = {
+    "order": {"payment_method": "cash", "type": "pickup"},
+    "items": {"1": [1, 2], "2": []},
+}
+
+
+def post_order(client, customer_id: int, key: str, body: dict = ORDER):
+    return client.post(
+        f"/api/customer/{customer_id}/order",
+        json=body,
+        headers={"Idempotency-Key": key},
+    )
+
+
+def orders(app) -> int:
+    with app.app_context():
+        return db.session.scalar(db.select(db.func.count()).select_from(Order))
+
+
+def test_retries_replay_the_first_response(app, client, customer_id):
+    first = post_order(client, customer_id, "key-1")
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    retry = post_order(client, customer_id, "key-1")
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.headers["Location"] == first.headers["Location"]
+    assert retry.get_json() == first.get_json()
+    assert orders(app) == 1
+
+
+def test_a_key_sent_with_another_request_is_refused(app, client, customer_id):
+    assert post_order(client, customer_id, "key-1").status_code == 201
+    other = dict(ORDER, items={"2": [1]})
+    response = post_order(client, customer_id, "key-1", other)
+    assert response.status_code == 422
+    assert orders(app) == 1
+
+
+def test_concurrent_duplicates_create_one_order(app, customer_id):
+    responses = []
+    start = threading.Barrier(4)
+
+    def send():
+        client = app.test_client()
+        start.wait()
+        responses.append(post_order(client, customer_id, "key-1"))
+
+    threads = [threading.Thread(target=send) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [201] * 4
+    assert len({response.get_json()["data"]["id"] for response in responses}) == 1
+    assert sum("Idempotent-Replayed" in response.headers for response in responses) == 3
+    assert orders(app) == 1
+
+
+def test_an_order_created_without_its_response_stored_is_replayed(
+    app, client, customer_id
+):
+    first = post_order(client, customer_id, "key-1")
+    # the request died between committing the order and storing its response
+    with app.app_context():
+        db.session.execute(
+            db.update(IdempotencyKey).values(
+                response_status=None, response_headers=None, response_body=None
+            )
+        )
+        db.session.commit()
+    idempotency_store.cache.clear()
+
+    retry = post_order(client, customer_id, "key-1")
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json()["data"]["id"] == first.get_json()["data"]["id"]
+    assert orders(app) == 1
+
+
+def test_a_request_whose_claim_was_taken_over_creates_nothing(app, customer_id):
+    with app.app_context():
+        now = utcnow()
+        db.session.add(
+            IdempotencyKey(
+                idempotency_key="key-1",
+                request_hash="0" * 64,
+                claim_id="retry",
+                created_at=now,
+                expires_at=now + timedelta(days=1),
+            )
+        )
+        db.session.commit()
+        # the request holding the lost claim finally creates its order
+        db.session.info["idempotency_claim"] = ("key-1", "lost")
+        with pytest.raises(RequestInProgress):
+            core.create.order(customer_id, {1: [], 2: []}, "cash", "pickup")
+        db.session.info.pop("idempotency_claim", None)
+    assert orders(app) == 0
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app import core, db
+from app.core import Ingest
+from app.database import Order
+from app.errors import OrderQueueFull
+
+
+@pytest.fixture
+def ingest(app, customer_id):
+    ingest = Ingest(core.create)
+    ingest.start(
+        app,
+        queue_size=100,
+        batch_size=10,
+        batch_wait=0.05,
+        put_timeout=0.1,
+        status_size=100,
+        status_ttl=60.0,
+    )
+    yield ingest
+    ingest.stop(5)
+
+
+def submit(app, ingest, customer_id: int, items: dict) -> str:
+    with app.app_context():
+        return ingest.submit(customer_id, items, "cash", "pickup")["id"]
+
+
+def wait_for(ingest, ticket: str) -> dict:
+    deadline = time.monotonic() + 5
+    while ingest.status(ticket)["status"] == "queued":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return ingest.status(ticket)
+
+
+def test_batches_resolve_the_menu_once(app, customer_id, monkeypatch):
+    views = []
+    view_foods = core.create.viewer.view_foods
+    monkeypatch.setattr(
+        core.create.viewer,
+        "view_foods",
+        lambda food_ids: views.append(1) or view_foods(food_ids),
+    )
+    with app.app_context():
+        created = core.create.orders(
+            [
+                {
+                    "customer_id": customer_id,
+                    "order_items": items,
+                    "payment_method": "cash",
+                    "order_type": "pickup",
+                    "order_date": datetime.now(),
+                }
+                for items in ({1: [1]}, {2: []}, {1: [], 2: [2]})
+            ]
+        )
+        assert [len(order["items"]) for order in created] == [1, 1, 2]
+        assert db.session.scalar(db.select(db.func.count()).select_from(Order)) == 3
+    assert len(views) == 1
+
+
+def test_the_writer_survives_a_failing_batch(app, ingest, customer_id):
+    class Broken:
+        def app_context(self):
+            raise RuntimeError("no context")
+
+    ingest.app = Broken()
+    failed = submit(app, ingest, customer_id, {1: []})
+    assert wait_for(ingest, failed)["status"] == "failed"
+
+    ingest.app = app
+    written = submit(app, ingest, customer_id, {2: []})
+    assert wait_for(ingest, written)["status"] == "created"
+
+
+def test_stopping_writes_the_queued_orders(app, ingest, customer_id):
+    tickets = [submit(app, ingest, customer_id, {1: []}) for _ in range(5)]
+    ingest.stop(5)
+    assert all(ingest.status(ticket)["status"] == "created" for ticket in tickets)
+    with pytest.raises(OrderQueueFull):
+        submit(app, ingest, customer_id, {1: []})
@@ -0,0 +1,86 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.database import (
+    ManageResturantData,
+    CustomerOrder,
+    ItemMod,
+    Order,
+    OrderItem,
+)
+
+
+def create_order(client, customer_id: int) -> int:
+    response = client.post(
+        f"/api/customer/{customer_id}/order",
+        json={
+            "order": {"payment_method": "cash", "type": "pickup"},
+            "items": {"1": [1, 2], "2": []},
+        },
+    )
+    assert response.status_code == 201
+    return response.get_json()["data"]["id"]
+
+
+def order_total(order_id: int) -> Decimal:
+    return db.session.scalar(
+        db.select(Order.order_total).where(Order.order_id == order_id)
+    )
+
+
+def test_removing_item_mods_lowers_the_total(app, client, customer_id):
+    order_id = create_order(client, customer_id)
+    with app.app_context():
+        assert order_total(order_id) == Decimal("29.00")
+        order_item_id = db.session.scalar(
+            db.select(OrderItem.order_item_id).where(OrderItem.food_id == 1)
+        )
+        manager = ManageResturantData()
+        manager.remove_item_mod(order_item_id, 1)
+        assert order_total(order_id) == Decimal("27.75")
+        manager.remove_item_mods(order_item_id)
+        assert order_total(order_id) == Decimal("26.50")
+
+
+def test_removing_order_items_removes_their_mods(app, client, customer_id):
+    order_id = create_order(client, customer_id)
+    with app.app_context():
+        ManageResturantData().remove_order_items(order_id)
+
+        assert order_total(order_id) == 0
+        assert db.session.scalar(db.select(db.func.count()).select_from(ItemMod)) == 0
+        response = client.get(f"/api/order/{order_id}")
+        assert response.get_json()["data"]["price"] == 0
+
+
+def test_nested_units_of_work_commit_once(app, customer_id):
+    commits = []
+    with app.app_context():
+        manager = ManageResturantData()
+        event.listen(db.session(), "after_commit", lambda session: commits.append(1))
+        with manager.unit_of_work():
+            order = manager.new_order(datetime.now(), "cash", "pickup")
+            with manager.unit_of_work():
+                manager.new_customer_order(customer_id, order.order_id)
+            assert commits == []
+        assert commits == [1]
+
+
+def test_a_failing_inner_unit_of_work_rolls_everything_back(app, customer_id):
+    with app.app_context():
+        manager = ManageResturantData()
+        with pytest.raises(RuntimeError):
+            with manager.unit_of_work():
+                order = manager.new_order(datetime.now(), "cash", "pickup")
+                with manager.unit_of_work():
+                    manager.new_customer_order(customer_id, order.order_id)
+                    raise RuntimeError
+        assert db.session.scalar(db.select(db.func.count()).select_from(Order)) == 0
+        assert (
+            db.session.scalar(db.select(db.func.count()).select_from(CustomerOrder))
+            == 0
+        )
@@ -0,0 +1,17 @@
+import threading
+
+from app.metrics import MetricsRegistry
+
+
+def test_shards_of_exited_threads_are_retired():
+    metrics = MetricsRegistry()
+    for _ in range(20):
+        thread = threading.Thread(
+            target=metrics.record_request, args=("/api/order", "GET", 200, 0.01)
+        )
+        thread.start()
+        thread.join()
+
+    # each new thread retires the shards of those that exited before it
+    assert len(metrics._shards) == 1
+    assert metrics.collect()["requests"] == {("/api/order", "GET", 200): 20}
@@ -0,0 +1,49 @@
+import json
+import time
+import threading
+
+from app.database import order_events
+
+from tests.test_manager import create_order
+
+
+def stream_events(app, count: int, events: list) -> None:
+    """Reads `count` events off the feed, in a thread of its own as the stream
+    holds its request context open."""
+    response = app.test_client().get("/api/order/events", buffered=False)
+    for chunk in response.response:
+        fields = dict(
+            line.split(": ", 1)
+            for line in chunk.decode().splitlines()
+            if line and not line.startswith(":")
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+            if len(events) == count:
+                break
+    response.close()
+
+
+def test_events_carry_only_the_orders_as_committed(app, client, customer_id):
+    app.config["ORDER_EVENTS_HEARTBEAT"] = 0.05
+    events: list = []
+    reader = threading.Thread(target=stream_events, args=(app, 3, events))
+    reader.start()
+    deadline = time.monotonic() + 5
+    while not order_events.subscribers and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    order_id = create_order(client, customer_id)
+    response = client.put(
+        f"/api/order/{order_id}", json={"order": {"order_type": "delivery"}}
+    )
+    assert response.status_code == 200
+    assert client.delete(f"/api/order/{order_id}").status_code == 204
+    reader.join(5)
+
+    created, updated, deleted = events
+    assert created[0] == "created"
+    assert created[1]["order"]["id"] == order_id
+    # the order is deleted by the time the update is sent
+    assert updated == ("updated", {"order_id": order_id})
+    assert deleted == ("deleted", {"order_id": order_id})
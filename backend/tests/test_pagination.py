@@ -0,0 +1,31 @@
+from app.resources.helper import encode_cursor
+
+from tests.test_manager import create_order
+
+
+def page(client, **args) -> tuple[list[int], str]:
+    response = client.get("/api/order", query_string=args)
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    return [order["id"] for order in data["results"]], data["next"]
+
+
+def test_cursors_are_stable_across_changes(client, customer_id):
+    first, second, third = (create_order(client, customer_id) for _ in range(3))
+    ids, cursor = page(client, limit=2)
+    assert ids == [first, second]
+
+    # an offset would now skip the third order, and a new one must not be missed
+    assert client.delete(f"/api/order/{first}").status_code == 204
+    fourth = create_order(client, customer_id)
+    ids, cursor = page(client, limit=2, cursor=cursor)
+    assert ids == [third, fourth]
+    assert cursor is None
+
+
+def test_bad_cursors_are_rejected(client, customer_id):
+    for cursor in ("not a cursor", encode_cursor("yesterday", 1), encode_cursor(1)):
+        response = client.get("/api/order", query_string={"cursor": cursor})
+        assert response.status_code == 400
+    response = client.get("/api/menu/food", query_string={"cursor": encode_cursor("1")})
+    assert response.status_code == 400
@@ -0,0 +1,8 @@
+from app import db
+from app.database import table_scans
+
+
+def test_hot_queries_scan_no_table(app):
+    with app.app_context():
+        scans = table_scans(db.engine)
+    assert {name: tables for name, tables in scans.items() if tables} == {}
@@ -0,0 +1,61 @@
+from app import db
+from app.database import ManageResturantData, SalesRollup
+
+from tests.test_manager import create_order
+
+
+def rollup(app) -> set:
+    """The sales rollup, less the rows emptied by moved and deleted orders."""
+    with app.app_context():
+        rows = db.session.execute(
+            db.select(SalesRollup).where(SalesRollup.rollup_items != 0)
+        ).scalars()
+        return {
+            (
+                row.rollup_grain,
+                row.rollup_start,
+                row.food_category,
+                row.order_type,
+                row.order_payment_method,
+                row.rollup_items,
+                row.rollup_sales,
+            )
+            for row in rows
+        }
+
+
+def assert_matches_rebuild(app) -> set:
+    incremental = rollup(app)
+    with app.app_context():
+        ManageResturantData().rebuild_sales_rollup()
+    assert incremental == rollup(app)
+    return incremental
+
+
+def test_orders_roll_up_as_they_change(app, client, customer_id):
+    kept = create_order(client, customer_id)
+    removed = create_order(client, customer_id)
+    assert_matches_rebuild(app)
+
+    response = client.put(
+        f"/api/order/{kept}",
+        json={"order": {"order_type": "delivery", "order_items": {"2": [1]}}},
+    )
+    assert response.status_code == 200
+    assert_matches_rebuild(app)
+
+    assert client.delete(f"/api/order/{removed}").status_code == 204
+    assert {row[3] for row in assert_matches_rebuild(app)} == {"delivery"}
+
+
+def test_sales_stay_under_the_category_they_were_made_in(app, client, customer_id):
+    order_id = create_order(client, customer_id)
+    response = client.put("/api/menu/food/1", json={"food": {"category": "classic"}})
+    assert response.status_code == 200
+    create_order(client, customer_id)
+    assert {row[2] for row in assert_matches_rebuild(app)} == {"pizza", "classic"}
+
+    assert client.delete(f"/api/order/{order_id}").status_code == 204
+    rows = assert_matches_rebuild(app)
+    assert all(row[5] > 0 for row in rows)
+    assert {(row[2], row[5]) for row in rows} == {("pizza", 1), ("classic", 1)}
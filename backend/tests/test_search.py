@@ -0,0 +1,62 @@
+from app.database import Food
+from app.database.search import MenuIndex
+
+
+def add_food(client, name: str, category: str = "pizza") -> None:
+    client.post(
+        "/api/menu/food",
+        json={"food": {"name": name, "price": 10, "category": category, "size": "M"}},
+    )
+
+
+def search(client, query: str, **args) -> list[str]:
+    response = client.get("/api/menu/search", query_string={"q": query, **args})
+    assert response.status_code == 200
+    return [item["name"] for item in response.get_json()["data"]["results"]]
+
+
+def test_equal_matches_tie_and_sort_by_name(client):
+    for number in (3, 5, 1, 4, 2):
+        add_food(client, f"Pizza {number}")
+
+    assert search(client, "pizza") == [f"Pizza {number}" for number in range(1, 6)]
+
+
+def test_name_matches_rank_above_category_matches(client):
+    add_food(client, "Garlic Bread", category="pizza")
+    add_food(client, "Pizza Bianca", category="bread")
+
+    assert search(client, "pizza") == ["Pizza Bianca", "Garlic Bread"]
+
+
+def test_every_word_must_match(client):
+    add_food(client, "Pepperoni Pizza")
+    add_food(client, "Pepperoni Calzone", category="calzone")
+
+    assert search(client, "pep calz") == ["Pepperoni Calzone"]
+    assert search(client, "pepperoni", type="addon") == []
+
+
+def test_index_follows_menu_changes(client):
+    add_food(client, "Hawaiian")
+    assert search(client, "hawaii") == ["Hawaiian"]
+
+    client.delete("/api/menu/food/1")
+    assert search(client, "hawaii") == []
+
+
+def test_changes_made_during_a_reload_are_kept(app, customer_id):
+    index = MenuIndex()
+    read = []
+
+    def document(entity):
+        if not read:
+            # deleted by another thread after the reload read it
+            index.remove(Food, 1)
+        read.append(entity)
+        return MenuIndex.document(entity)
+
+    index.document = document
+    with app.app_context():
+        index.ensure_loaded()
+    assert [item["name"] for item in index.search("pizza", 10)] == ["Pepperoni"]
@@ -0,0 +1,47 @@
+import pytest
+
+from app.core.validation import check_lengths, check_values, parse_price
+from app.database import Food
+from app.errors import ImproperEntryData, MissingEntryData
+
+
+def test_values_are_checked_against_their_columns():
+    check_lengths(Food, {"food_name": "x" * 45, "food_price": 10})
+    with pytest.raises(ImproperEntryData, match="food_name must be at most 45"):
+        check_lengths(Food, {"food_name": "x" * 46})
+
+    check_values(Food, {"food_name": "Calzone", "food_size": None})
+    with pytest.raises(MissingEntryData, match="food_name is required"):
+        check_values(Food, {"food_name": None})
+    with pytest.raises(ImproperEntryData, match="food_category must be a string"):
+        check_values(Food, {"food_category": 3})
+
+    assert parse_price("12.5") == 12.5
+    with pytest.raises(ImproperEntryData, match="price must be a number"):
+        parse_price("twelve")
+
+
+def test_invalid_rows_and_fields_are_reported(client, customer_id):
+    response = client.post(
+        "/api/menu/food",
+        json={
+            "food": [
+                {"name": "Calzone", "price": 9, "category": "calzone"},
+                {"name": "x" * 46, "price": 9, "category": "calzone"},
+                {"name": "Stromboli", "price": "free", "category": "calzone"},
+                {"name": None, "price": 9, "category": "calzone"},
+            ]
+        },
+    )
+    assert response.status_code == 207
+    results = response.get_json()["data"]
+    assert [result["success"] for result in results] == [True, False, False, False]
+    assert "at most 45" in results[1]["message"]
+    assert "must be a number" in results[2]["message"]
+    assert "is required" in results[3]["message"]
+
+    response = client.put(
+        "/api/menu/food/1", json={"food": {"name": "x" * 46, "price": 13}}
+    )
+    assert response.status_code == 207
+    assert response.get_json()["results"] == {"name": False, "price": True}